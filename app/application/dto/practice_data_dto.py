@@ -13,4 +13,6 @@ class PracticeDataDTO:
     duration: int
     bpm: int
     figure: float
-    octaves: int
\ No newline at end of file
+    octaves: int
+    force_reprocess: bool = False  # skip the already-processed check
+    profile: bool = False  # profile the analysis of this practice
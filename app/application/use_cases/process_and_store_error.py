@@ -1,5 +1,6 @@
+import asyncio
 import logging
-from typing import List
+from typing import List, Optional, Tuple
 from app.application.dto.musical_error_dto import MusicalErrorDTO
 from app.application.dto.practice_data_dto import PracticeDataDTO
 from app.domain.entities.practice_data import PracticeData
@@ -9,6 +10,8 @@ from app.infrastructure.kafka.kafka_message import KafkaMessage
 from app.infrastructure.kafka.kafka_producer import KafkaProducer
 from app.core.exceptions import DatabaseConnectionException, ValidationException
 from app.core.config import settings
+from app.shared.utils import BoundedLRU
+from app.infrastructure.monitoring.metrics import time_stage
 
 logger = logging.getLogger(__name__)
 
@@ -24,8 +27,22 @@ class ProcessAndStoreErrorUseCase:
         self.music_service = music_service
         self.mongo_service = mongo_service
         self.kafka_producer = kafka_producer
+        # (uid, practice_id) completed by this process, skipped when Kafka redelivers them
+        self._completed = BoundedLRU(settings.DEDUP_CACHE_SIZE)
 
     async def execute(self, data: PracticeDataDTO) -> List[MusicalErrorDTO]:
+        errors, delivery = await self.process(data)
+        if delivery is not None:
+            await delivery
+        return errors
+
+    async def process(self, data: PracticeDataDTO) -> Tuple[List[MusicalErrorDTO], Optional[asyncio.Future]]:
+        """
+        Runs the whole use case but, in async publish mode, only enqueues the output message.
+        Returns the errors and the delivery future (None when the practice was skipped); callers
+        must await the future before treating the practice as done and, if it fails, call
+        republish() instead of processing the practice again.
+        """
         if not data.uid or not data.practice_id:
             logger.warning(
                 "Validation failed: uid=%s, practice_id=%s",
@@ -33,7 +50,18 @@ class ProcessAndStoreErrorUseCase:
             )
             raise ValidationException("uid and practice_id are required")
         
+        key = (str(data.uid), data.practice_id)
+        if not data.force_reprocess and key in self._completed:
+            logger.info("Skipping already processed practice uid=%s, practice_id=%s", data.uid, data.practice_id)
+            return [], None
+
         try:
+            # 0 Redelivery of a practice another process (or run) already finished
+            if not data.force_reprocess and settings.DEDUP_CHECK_METADATA and await self._is_audio_done(*key):
+                # The output message may not have been published before a crash, so only that is repeated
+                logger.info("Practice uid=%s, practice_id=%s already audio_done, republishing only", data.uid, data.practice_id)
+                return [], await self.republish(data)
+
             # 1️ Process and store errors in MySQL
             practice_data = PracticeData(
                 uid=data.uid,
@@ -44,33 +72,19 @@ class ProcessAndStoreErrorUseCase:
                 bpm=data.bpm,
                 figure=data.figure,
                 octaves=data.octaves,
+                profile=data.profile,
             )
             
             errors = await self.music_service.process_and_store_error(practice_data)
             logger.info("Stored %d errors for practice_id=%s", len(errors), data.practice_id)
 
             # 2️ Updates metadata in MongoDB
-            await self.mongo_service.mark_audio_done(uid=str(data.uid), id_practice=data.practice_id)
+            with time_stage("mongo_update"):
+                await self.mongo_service.mark_audio_done(uid=str(data.uid), id_practice=data.practice_id)
             logger.info("Marked audio as done in Mongo for uid=%s, practice_id=%s", data.uid, data.practice_id)
 
             # 3️ Publish message to Kafka
-            kafka_message = KafkaMessage(
-                uid=data.uid,
-                practice_id=data.practice_id,
-                date=data.date,
-                time=data.time,
-                message="audio_done",
-                scale=data.scale,
-                scale_type=data.scale_type,
-                duration=data.duration,
-                bpm=data.bpm,
-                figure=data.figure,
-                octaves=data.octaves,
-            )
-            
-            logger.debug("Prepared Kafka message: %s", kafka_message)
-
-            await self.kafka_producer.publish_message(topic=settings.KAFKA_OUTPUT_TOPIC, message=kafka_message)
+            delivery = await self.republish(data)
 
             # 4️ Map to DTOs
             return [
@@ -79,8 +93,69 @@ class ProcessAndStoreErrorUseCase:
                     note_played=e.note_played,
                     note_correct=e.note_correct
                 ) for e in errors
-            ]
+            ], delivery
 
         except Exception as e:
             logger.error("Error processing and storing practice", exc_info=True)
             raise DatabaseConnectionException(f"Failed to process practice: {str(e)}")
+
+    async def republish(self, data: PracticeDataDTO) -> asyncio.Future:
+        """
+        Publishes the audio_done message of a practice already marked in Mongo. Publish errors are
+        returned in the delivery future instead of raised: from here on only the publish may be retried.
+        """
+        try:
+            delivery = await self._publish_done(data)
+        except Exception as e:
+            delivery = asyncio.get_running_loop().create_future()
+            delivery.set_exception(e)
+        if delivery is None:
+            # Sync mode: already confirmed by the broker
+            delivery = asyncio.get_running_loop().create_future()
+            delivery.set_result(None)
+        return self._remember_when_delivered((str(data.uid), data.practice_id), delivery)
+
+    async def _publish_done(self, data: PracticeDataDTO) -> Optional[asyncio.Future]:
+        kafka_message = KafkaMessage(
+            uid=data.uid,
+            practice_id=data.practice_id,
+            date=data.date,
+            time=data.time,
+            message="audio_done",
+            scale=data.scale,
+            scale_type=data.scale_type,
+            duration=data.duration,
+            bpm=data.bpm,
+            figure=data.figure,
+            octaves=data.octaves,
+        )
+
+        logger.debug("Prepared Kafka message: %s", kafka_message)
+
+        # In async mode this only covers the enqueue; the consumer times the delivery wait
+        with time_stage("kafka_publish"):
+            return await self.kafka_producer.publish_message(
+                topic=settings.KAFKA_OUTPUT_TOPIC,
+                message=kafka_message,
+                wait=settings.KAFKA_PUBLISH_MODE != "async",
+            )
+
+    async def _is_audio_done(self, uid: str, practice_id: int) -> bool:
+        """Redelivery pre-check; fails open, since a failed read only costs analysing the practice again."""
+        try:
+            return await self.mongo_service.is_audio_done(uid, practice_id)
+        except Exception as e:
+            logger.warning(
+                "audio_done pre-check failed for uid=%s, practice_id=%s, processing anyway: %s",
+                uid, practice_id, e
+            )
+            return False
+
+    def _remember_when_delivered(self, key, delivery: asyncio.Future) -> asyncio.Future:
+        """Adds the practice to the completed cache once its output message is confirmed."""
+        def on_delivered(fut: asyncio.Future):
+            if not fut.cancelled() and fut.exception() is None:
+                self._completed.add(key)
+
+        delivery.add_done_callback(on_delivered)
+        return delivery
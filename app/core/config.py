@@ -10,6 +10,9 @@ class Settings(BaseSettings):
     APP_ENV: str = Field(default="development")
     DEBUG: bool = False
     RELOAD: bool = False
+    WORKERS: int = 1  # consumer processes forked by the supervisor (python -m app.main --workers N)
+    WORKER_RESTART_MAX_BACKOFF: float = 30.0
+    WORKER_SHUTDOWN_TIMEOUT: float = 30.0
 
     # Kafka
     KAFKA_BROKER: str
@@ -17,6 +20,17 @@ class Settings(BaseSettings):
     KAFKA_OUTPUT_TOPIC: str
     KAFKA_AUTO_OFFSET_RESET: str = "earliest"
     KAFKA_GROUP_ID: str
+    KAFKA_MAX_IN_FLIGHT: int = 6  # fetched but unfinished messages before partitions are paused
+    KAFKA_MAX_POLL_RECORDS: int = 50
+    KAFKA_POLL_TIMEOUT_MS: int = 1000
+    KAFKA_PUBLISH_MODE: str = "async"  # "async" (enqueue, confirm in background) | "sync" (send_and_wait)
+    KAFKA_PRODUCER_LINGER_MS: int = 5
+    KAFKA_PRODUCER_MAX_BATCH_SIZE: int = 16384
+    KAFKA_PRODUCER_COMPRESSION: str = ""  # "" | gzip | snappy | lz4 | zstd
+    KAFKA_DELIVERY_RETRIES: int = 3  # republishes of a failed output message before the consumer stops (restart redelivers it)
+    KAFKA_DELIVERY_RETRY_BACKOFF_S: float = 1.0
+    DEDUP_CACHE_SIZE: int = 10000  # recently completed practices skipped on redelivery; 0 disables
+    DEDUP_CHECK_METADATA: bool = True  # also skip practices already audio_done in Mongo
 
     # MySQL
     MYSQL_HOST: str
@@ -45,6 +59,8 @@ class Settings(BaseSettings):
     MONGO_USER: str
     MONGO_PASSWORD: str
     MONGO_DB: str
+    MONGO_COALESCE_WINDOW_MS: float = 20.0  # buffer audio_done updates into one bulk_write; 0 disables
+    MONGO_COALESCE_MAX_ITEMS: int = 100
 
     @property
     def MONGO_URI(self) -> str:
@@ -56,6 +72,45 @@ class Settings(BaseSettings):
     # Storage
     HOST_VIDEO_PATH: str
     CONTAINER_VIDEO_PATH: str
+    AUDIO_ARTIFACT_EXTENSIONS: str = "wav,flac,opus"  # audio-only practice files preferred over the mp4
+
+    # Audio analysis
+    MAX_CONCURRENT_VIDEOS: int = 3
+    ANALYSIS_EXECUTOR: str = "process"  # process | thread
+    ANALYSIS_WORKERS: int = 3
+    FFMPEG_BINARY: str = "ffmpeg"
+    AUDIO_CACHE_DIR: str = ""  # empty disables the decoded-audio cache
+    AUDIO_CACHE_MAX_BYTES: int = 2 * 1024 ** 3
+    AUDIO_CACHE_KEY: str = "stat"  # stat | content
+    ANALYSIS_MODE: str = "notes"  # notes | posteriorgram
+    POSTERIOR_CONFIDENCE_THRESHOLD: float = 0.3
+    ANALYSIS_SEGMENTS: int = 0  # 0 = auto, one per ANALYSIS_MIN_SEGMENT_SECONDS
+    ANALYSIS_MIN_SEGMENT_SECONDS: float = 10.0
+    ANALYSIS_SEGMENT_OVERLAP: float = 0.5  # seconds of audio shared with neighbour segments
+    ANALYSIS_SEGMENT_WORKERS: int = 0  # 0 = cores / concurrent jobs
+    ANALYSIS_STREAMING: bool = False  # overlap ffmpeg decoding and inference window by window (no segment parallelism)
+    ANALYSIS_STREAM_BUFFER_CHUNKS: int = 4  # decoded windows ffmpeg may run ahead of inference
+    MODEL_INTRA_OP_THREADS: int = 0  # 0 = cores / (concurrent jobs * segment workers)
+    MODEL_INTER_OP_THREADS: int = 0  # 0 = 1
+    MODEL_BACKEND: str = "tf"  # tf | tflite | onnx
+    MODEL_PATH: str = ""  # overrides the model shipped with basic_pitch for MODEL_BACKEND
+    MODEL_QUANTIZATION: str = "none"  # none | dynamic_int8 (tflite and onnx backends)
+    QUANTIZED_MODEL_DIR: str = "/tmp/basic_pitch_quantized"
+    INFERENCE_BATCHING: bool = False
+    INFERENCE_MAX_BATCH_SIZE: int = 16
+    INFERENCE_MAX_WAIT_MS: float = 5.0
+
+    # Metrics
+    METRICS_ENABLED: bool = True
+    METRICS_HOST: str = "127.0.0.1"
+    METRICS_PORT: int = 9108  # supervisor workers use METRICS_PORT + worker index
+
+    # Profiling (per job, off by default)
+    PROFILING_SAMPLE_RATE: float = 0.0  # fraction of jobs profiled; messages with "profile": true always are
+    PROFILING_MODE: str = "sampling"  # sampling (collapsed stacks, all threads) | cprofile (pstats, job thread)
+    PROFILING_DIR: str = "/tmp/audio_profiles"
+    PROFILING_INTERVAL_MS: float = 5.0  # sampling mode
+    PROFILING_TOP_N: int = 30
 
     # Logging
     LOG_LEVEL: str = "INFO"
@@ -13,4 +13,19 @@ class DatabaseConnectionException(MusicErrorServiceException):
 class ValidationException(MusicErrorServiceException):
     """Data validation error"""
     def __init__(self, message: str = "Validation error"):
-        super().__init__(message, "400")
\ No newline at end of file
+        super().__init__(message, "400")
+
+class AudioDecodingException(MusicErrorServiceException):
+    """Audio could not be decoded from the practice file"""
+    def __init__(self, message: str = "Audio decoding error"):
+        super().__init__(message, "500")
+
+class AnalysisWorkerCrashException(MusicErrorServiceException):
+    """The analysis process running the practice died, also on a rebuilt pool"""
+    def __init__(self, message: str = "Analysis worker crashed"):
+        super().__init__(message, "500")
+
+class MessageDeliveryException(MusicErrorServiceException):
+    """Output message could not be delivered to Kafka"""
+    def __init__(self, message: str = "Kafka delivery error"):
+        super().__init__(message, "500")
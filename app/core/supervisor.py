@@ -0,0 +1,137 @@
+import os
+import signal
+import time
+import logging
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerSupervisor:
+    """
+    Runs N forked copies of a worker function and keeps them alive.
+
+    Workers are forked from the supervisor, so everything imported before run() is
+    shared copy-on-write. Crashed workers are restarted with exponential backoff;
+    SIGTERM/SIGINT are forwarded to every worker, which get WORKER_SHUTDOWN_TIMEOUT
+    seconds to finish before being killed.
+    """
+
+    # A worker that lived this long is considered healthy and resets its backoff
+    STABLE_AFTER_S = 60.0
+
+    def __init__(
+        self,
+        target: Callable[[int], int],
+        workers: int,
+        max_backoff: float = 30.0,
+        shutdown_timeout: float = 30.0,
+    ):
+        self.target = target
+        self.workers = max(1, workers)
+        self.max_backoff = max_backoff
+        self.shutdown_timeout = shutdown_timeout
+        self._pids: Dict[int, int] = {}  # pid -> worker index
+        self._started_at: Dict[int, float] = {}  # worker index -> monotonic start
+        self._backoff: Dict[int, float] = {}  # worker index -> next restart delay
+        self._restart_at: Dict[int, float] = {}  # worker index -> monotonic restart time
+        self._stopping = False
+
+    def run(self) -> int:
+        """Forks the workers and supervises them until a shutdown signal arrives."""
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        logger.info(f"Supervisor {os.getpid()} starting {self.workers} workers")
+        for index in range(self.workers):
+            self._spawn(index)
+
+        while not self._stopping:
+            self._reap()
+            self._restart_due()
+            time.sleep(0.5)
+
+        return self._shutdown()
+
+    def _spawn(self, index: int):
+        pid = os.fork()
+        if pid == 0:
+            # Worker: default signal handling, the worker installs its own
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 1
+            try:
+                code = self.target(index) or 0
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else 1
+            except BaseException:
+                logger.exception(f"Worker {index} crashed")
+            finally:
+                logging.shutdown()
+                os._exit(code)
+
+        self._pids[pid] = index
+        self._started_at[index] = time.monotonic()
+        logger.info(f"Started worker {index} (pid {pid})")
+
+    def _reap(self):
+        """Collects exited workers and schedules their restart."""
+        while self._pids:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+
+            index = self._pids.pop(pid, None)
+            if index is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if self._stopping:
+                logger.info(f"Worker {index} (pid {pid}) exited with {code}")
+                continue
+
+            lived = time.monotonic() - self._started_at.get(index, 0.0)
+            if lived >= self.STABLE_AFTER_S:
+                self._backoff[index] = 1.0
+            delay = self._backoff.get(index, 1.0)
+            self._backoff[index] = min(delay * 2, self.max_backoff)
+            self._restart_at[index] = time.monotonic() + delay
+            logger.error(f"Worker {index} (pid {pid}) exited with {code}, restarting in {delay:.0f}s")
+
+    def _restart_due(self):
+        now = time.monotonic()
+        for index, when in list(self._restart_at.items()):
+            if when <= now:
+                del self._restart_at[index]
+                self._spawn(index)
+
+    def _request_stop(self, signum, frame):
+        if not self._stopping:
+            logger.info(f"Supervisor received {signal.Signals(signum).name}, stopping workers")
+        self._stopping = True
+
+    def _shutdown(self) -> int:
+        for pid in list(self._pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        deadline = time.monotonic() + self.shutdown_timeout
+        while self._pids and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.2)
+
+        for pid, index in list(self._pids.items()):
+            logger.warning(f"Worker {index} (pid {pid}) did not stop in time, killing it")
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self._pids.clear()
+
+        logger.info("All workers stopped")
+        return 0
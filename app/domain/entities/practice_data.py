@@ -9,4 +9,5 @@ class PracticeData:
     duration: int
     bpm: int
     figure: float
-    octaves: int
\ No newline at end of file
+    octaves: int
+    profile: bool = False
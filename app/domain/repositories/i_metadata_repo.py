@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import List, Sequence, Tuple
 
 class IMetadataRepo(ABC):
     
@@ -6,3 +7,13 @@ class IMetadataRepo(ABC):
     async def mark_practice_audio_done(self, uid: str, id_practice: int) -> bool:
         """Marks audio_done = true for the specific user and practice"""
         pass
+
+    @abstractmethod
+    async def mark_practices_audio_done(self, items: Sequence[Tuple[str, int]]) -> List[bool]:
+        """Marks audio_done = true for several (uid, id_practice) pairs, one result per pair"""
+        pass
+
+    @abstractmethod
+    async def is_practice_audio_done(self, uid: str, id_practice: int) -> bool:
+        """Returns whether audio_done = true for the specific user and practice"""
+        pass
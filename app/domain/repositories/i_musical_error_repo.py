@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import List, Optional
 from app.domain.entities.musical_error import MusicalError
 
 class IMusicalErrorRepo(ABC):
@@ -7,3 +8,18 @@ class IMusicalErrorRepo(ABC):
     async def create(self, musical_error: MusicalError) -> MusicalError:
         """Stores a musical error in the database and returns the stored entity."""
         pass
+
+    @abstractmethod
+    async def create_many(self, musical_errors: List[MusicalError]) -> int:
+        """Stores several musical errors in one transaction, skipping duplicates. Returns the inserted count."""
+        pass
+
+    @abstractmethod
+    async def replace_for_practice(self, id_practice: int, musical_errors: List[MusicalError]) -> int:
+        """Atomically replaces every stored error of a practice with the given ones. Returns the inserted count."""
+        pass
+
+    @abstractmethod
+    async def list_by_practice(self, id_practice: int, limit: int = 100, after_id: Optional[int] = None) -> List[MusicalError]:
+        """Returns up to `limit` errors of a practice ordered by id, starting after `after_id`."""
+        pass
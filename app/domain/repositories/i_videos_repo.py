@@ -4,5 +4,5 @@ class IVideoRepo(ABC):
 
     @abstractmethod
     async def read(self, path: str, uid: str, practice_id: str) -> str:
-        """Reads the video content and returns the content. Currently returns the path because of possible audio implementation"""
+        """Reads the practice media and returns the content. Currently returns the path: an audio-only artifact of the practice when there is one, otherwise the video"""
         pass
\ No newline at end of file
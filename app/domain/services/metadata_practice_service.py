@@ -30,3 +30,14 @@ class MetadataPracticeService:
                 extra={"uid": uid, "practice_id": id_practice}
             )
             raise
+
+    async def is_audio_done(self, uid: str, id_practice: int) -> bool:
+        try:
+            return await self.mongo_repo.is_practice_audio_done(uid, id_practice)
+        except Exception as e:
+            logger.error(
+                "Error reading audio_done in Mongo",
+                exc_info=True,
+                extra={"uid": uid, "practice_id": id_practice}
+            )
+            raise
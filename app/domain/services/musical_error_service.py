@@ -8,10 +8,29 @@ from app.infrastructure.audio.model_manager import ModelManager
 from app.infrastructure.audio.utils.time_utils import format_seconds_to_mmss
 from app.infrastructure.audio.utils.note_utils import get_correct_notes, solfege_to_note, note_to_solfege
 from app.infrastructure.audio.analyzer import extract_notes_audio
-import asyncio
+from app.infrastructure.audio.analysis_executor import AnalysisExecutor
+from app.infrastructure.monitoring.metrics import time_stage
+from app.infrastructure.monitoring.profiling import run_profiled, should_profile
 
 logger = logging.getLogger(__name__)
 
+def build_musical_errors(expected_notes: List[str], extracted_notes: List[dict], practice_id: int) -> List[MusicalError]:
+    """Compara las notas esperadas con las extraidas y crea un MusicalError por cada contenedor que no coincide."""
+    errors: List[MusicalError] = []
+    for i in range(len(expected_notes)):
+        if expected_notes[i] != extracted_notes[i]['name']:
+            note = extracted_notes[i]
+            error_time = format_seconds_to_mmss(note['start'])
+            note_played = note_to_solfege(note['name'])
+            correct_note = note_to_solfege(expected_notes[i])
+
+            errors.append(MusicalError(format_seconds_to_mmss(error_time),
+                                       note_played,
+                                       correct_note,
+                                       practice_id))
+    return errors
+
+
 class MusicalErrorService:
     """Domain service for management of musical errors"""
 
@@ -53,47 +72,41 @@ class MusicalErrorService:
             )
 
 
-            # TODO: Implementar análisis de audio y extracción de errores
             # 1. obtener el video en video_route
-            path = await self.video_repo.read(uid, practice_id)
+            with time_stage("resolve_path"):
+                path = await self.video_repo.read(uid, practice_id)
             logger.debug(f"Starting audio analysis for practice_id={practice_id}")
             # 2. Obtener las notas correctas de la escala
             solfege_of_scale = scale.split()[0]
             expected_notes = get_correct_notes(solfege_to_note(solfege_of_scale), scale_type, octaves)
-            # 3. Analizar el audio a partir del video mp4.
-            extracted_notes = extract_notes_audio(path, bpm, figure, len(expected_notes))
+            # 3. Analizar el audio a partir del video mp4 (en el executor de analisis, fuera del event loop).
+            with time_stage("analysis"):
+                if should_profile(data.profile):
+                    extracted_notes = await AnalysisExecutor.run(
+                        run_profiled, f"practice_{practice_id}", extract_notes_audio, path, bpm, figure, len(expected_notes)
+                    )
+                else:
+                    extracted_notes = await AnalysisExecutor.run(extract_notes_audio, path, bpm, figure, len(expected_notes))
             # 4. Comparar las notas esperadas con las notas extraidas y guardar errores musicales.
-            stored_errors: List[MusicalError] = []
-            print(f"NOTAS: {len(expected_notes)}")
+            with time_stage("compare"):
+                stored_errors = build_musical_errors(expected_notes, extracted_notes, practice_id)
 
-            for i in range(len(expected_notes)):
-                # print(f"Esperada: {expected_notes[i]} | Detectada: {extracted_notes[i]['name']}")
-                if expected_notes[i] != extracted_notes[i]['name']:
-                    print(f"Esperada: {expected_notes[i]}, Detectada: {extracted_notes[i]['name']} | start: {extracted_notes[i]['start']:.4f} |✖| Indice: {i}")
-                else:
-                    print(f"Esperada: {expected_notes[i]}, Detectada: {extracted_notes[i]['name']} | start: {extracted_notes[i]['start']:.4f} |✔| Indice: {i}")
-
-            
-            for i in range(len(expected_notes)):
-                # print(f"Esperada: {expected_notes[i]} | Detectada: {extracted_notes[i]['name']}")
-                if expected_notes[i] != extracted_notes[i]['name']:
-                    # print(f"Esperada: {expected_notes[i]}, Detectada: {extracted_notes[i]['name']} | start: {extracted_notes[i]['start']:.4f} |✖|")
-                    note = extracted_notes[i]
-                    error_time = format_seconds_to_mmss(note['start'])
-                    note_played = note_to_solfege(note['name'])
-                    correct_note = note_to_solfege(expected_notes[i])
-
-                    stored_errors.append(MusicalError(format_seconds_to_mmss(error_time),
-                                                      note_played,
-                                                      correct_note,
-                                                      practice_id))
-
-            # 4. guardar cada uno de los errores en la base de datos
-            # print(stored_errors)
-            if stored_errors:
-                await self._store_musical_errors_batch(stored_errors, practice_id)
-            else:
+            if logger.isEnabledFor(logging.DEBUG):
+                # Detalle nota por nota, fuera de la medicion de la comparacion
+                logger.debug("NOTAS: %d", len(expected_notes))
+                for i, (expected, extracted) in enumerate(zip(expected_notes, extracted_notes)):
+                    mark = "✔" if expected == extracted['name'] else "✖"
+                    logger.debug(
+                        "Esperada: %s, Detectada: %s | start: %.4f |%s| Indice: %d",
+                        expected, extracted['name'], extracted['start'], mark, i
+                    )
+
+            # 5. guardar cada uno de los errores en la base de datos
+            # Reemplaza los errores de la practica (un reprocesamiento no deja errores previos)
+            if not stored_errors:
                 logger.info(f"No musical errors found for practice_id={practice_id}")
+            with time_stage("mysql_write"):
+                await self._store_musical_errors_batch(stored_errors, practice_id)
 
             logger.info(
                 "Finished processing errors for uid=%s, practice_id=%s. Stored=%d",
@@ -116,34 +129,11 @@ class MusicalErrorService:
             raise
 
     async def _store_musical_errors_batch(self, errors: List[MusicalError], practice_id: int):
-        """Stores musical errors in batches to optimize database writes."""
-        batch_size = 5
-        total_errors = len(errors)
-        
-        logger.debug(f"Storing {total_errors} musical errors in batches of {batch_size} for practice_id={practice_id}")
-        
-        for i in range(0, total_errors, batch_size):
-            batch = errors[i:i + batch_size]
-            batch_num = (i // batch_size) + 1
-            total_batches = (total_errors + batch_size - 1) // batch_size
-            
-            logger.debug(f"Processing batch {batch_num}/{total_batches} ({len(batch)} errors)")
-            
-            tasks = []
-            for error in batch:
-                task = asyncio.create_task(self.music_repo.create(error))
-                tasks.append(task)
-                await asyncio.sleep(0.01)  # 10ms delay between task creation
-            
-            try:
-                await asyncio.gather(*tasks)
-                logger.debug(f"Batch {batch_num}/{total_batches} completed successfully")
-            except Exception as e:
-                logger.error(f"Error in batch {batch_num}/{total_batches}: {e}", exc_info=True)
-                raise
-            
-            # Delay between batches (except for last batch)
-            if i + batch_size < total_errors:
-                await asyncio.sleep(0.05)  # 50ms delay between batches
-        
-        logger.info(f"Successfully stored {total_errors} musical errors for practice_id={practice_id}")
+        """Replaces the stored musical errors of a practice in one transaction (delete + bulk insert)."""
+        logger.debug(f"Storing {len(errors)} musical errors for practice_id={practice_id}")
+
+        inserted = await self.music_repo.replace_for_practice(practice_id, errors)
+        if inserted < len(errors):
+            logger.info(f"Skipped {len(errors) - inserted} duplicated musical errors for practice_id={practice_id}")
+
+        logger.info(f"Successfully stored {inserted} musical errors for practice_id={practice_id}")
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Optional, Tuple
+from app.core.config import settings
+from app.core.exceptions import AnalysisWorkerCrashException
+from app.infrastructure.audio.model_manager import ModelManager
+from app.infrastructure.monitoring.metrics import ANALYSIS_POOL_BREAKS, registry
+
+logger = logging.getLogger(__name__)
+
+# Exit status when the pool cannot be rebuilt; the supervisor (or the orchestrator) restarts the process
+BROKEN_POOL_EXIT_CODE = 70
+
+
+def _init_analysis_worker():
+    """Initializer of every analysis process: configures logging and preloads basic_pitch."""
+    from app.core.logging_config import configure_logging
+
+    configure_logging()
+    ModelManager.warmup()
+    logger.info("Analysis worker ready (pid=%s)", os.getpid())
+
+
+def _ping() -> Tuple[int, dict]:
+    return os.getpid(), registry.collect_delta()
+
+
+def _run_with_metrics(fn: Callable[..., Any]) -> Tuple[Any, dict]:
+    """Runs fn in a process worker and returns the metrics it recorded along with the result."""
+    return fn(), registry.collect_delta()
+
+
+class AnalysisExecutor:
+    """Singleton that owns the pool where CPU-bound audio analysis runs, off the event loop."""
+
+    _instance = None
+    _executor: Optional[Executor] = None
+    _rebuild_lock: Optional[asyncio.Lock] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    @classmethod
+    def get_executor(cls) -> Executor:
+        """
+        Gets or creates the analysis executor configured by ANALYSIS_EXECUTOR.
+
+        - process: a spawn-based process pool, each worker with its own preloaded model.
+        - thread: a thread pool inside this process, sharing the model of this process.
+        """
+        instance = cls()
+        if instance._executor is None:
+            instance._executor = instance._create_executor()
+        return instance._executor
+
+    def _create_executor(self) -> Executor:
+        mode = settings.ANALYSIS_EXECUTOR.lower()
+        workers = max(1, settings.ANALYSIS_WORKERS)
+
+        if mode == "process":
+            # spawn: TensorFlow is not fork-safe once initialized in the parent
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_analysis_worker,
+            )
+        elif mode == "thread":
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis")
+        else:
+            raise ValueError(f"Unknown ANALYSIS_EXECUTOR: {settings.ANALYSIS_EXECUTOR}")
+
+        logger.info("Analysis executor created: mode=%s, workers=%d", mode, workers)
+        return executor
+
+    @classmethod
+    def uses_processes(cls) -> bool:
+        return isinstance(cls.get_executor(), ProcessPoolExecutor)
+
+    @classmethod
+    async def start(cls):
+        """Starts the workers ahead of the first job so model loading happens at startup."""
+        await cls._ping_workers(cls.get_executor())
+
+    @classmethod
+    async def _ping_workers(cls, executor: Executor):
+        loop = asyncio.get_running_loop()
+        replies = await asyncio.gather(
+            *(loop.run_in_executor(executor, _ping) for _ in range(max(1, settings.ANALYSIS_WORKERS)))
+        )
+        pids = []
+        for pid, delta in replies:
+            pids.append(pid)
+            registry.merge(delta)
+        logger.info("Analysis executor started, worker pids=%s", sorted(set(pids)))
+
+    @classmethod
+    async def run(cls, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Runs fn(*args, **kwargs) on the analysis executor and awaits its result."""
+        loop = asyncio.get_running_loop()
+        executor = cls.get_executor()
+        if not isinstance(executor, ProcessPoolExecutor):
+            return await loop.run_in_executor(executor, partial(fn, *args, **kwargs))
+
+        # Metrics recorded in the worker process are merged into this process' registry
+        job = partial(_run_with_metrics, partial(fn, *args, **kwargs))
+        try:
+            result, delta = await loop.run_in_executor(executor, job)
+        except BrokenProcessPool:
+            # A worker died (OOM kill, segfault): every pending and later job of this pool would fail
+            await cls._replace_broken(executor)
+            retry_executor = cls.get_executor()
+            try:
+                result, delta = await loop.run_in_executor(retry_executor, job)
+            except BrokenProcessPool:
+                # The job itself kills its worker (e.g. a practice that exhausts memory): it fails alone,
+                # the consumer completes its offset and the other jobs get a fresh pool
+                ANALYSIS_POOL_BREAKS.inc(outcome="job_failed")
+                await cls._replace_broken(retry_executor)
+                raise AnalysisWorkerCrashException(
+                    f"Analysis worker died twice running {getattr(fn, '__name__', fn)}"
+                )
+            ANALYSIS_POOL_BREAKS.inc(outcome="retried")
+        registry.merge(delta)
+        return result
+
+    @classmethod
+    async def _replace_broken(cls, executor: Executor):
+        """
+        Discards a broken pool and starts a new one; concurrent jobs that saw the same pool break
+        wait for that single rebuild. Exits the process when the new pool cannot start its workers.
+        """
+        instance = cls()
+        if cls._rebuild_lock is None:
+            cls._rebuild_lock = asyncio.Lock()
+        async with cls._rebuild_lock:
+            if instance._executor is not executor:
+                return
+            logger.error("Analysis process pool is broken (a worker died), rebuilding it")
+            executor.shutdown(wait=False, cancel_futures=True)
+            try:
+                # Jobs submitted meanwhile still see the broken pool and queue up here behind this rebuild
+                replacement = instance._create_executor()
+                await cls._ping_workers(replacement)
+            except Exception:
+                logger.critical("Analysis pool cannot be rebuilt, exiting so the process is restarted", exc_info=True)
+                logging.shutdown()
+                os._exit(BROKEN_POOL_EXIT_CODE)
+            instance._executor = replacement
+
+    @classmethod
+    def shutdown(cls, wait: bool = True):
+        """Shuts down the pool; a later call to get_executor creates a new one."""
+        instance = cls()
+        if instance._executor is not None:
+            instance._executor.shutdown(wait=wait, cancel_futures=True)
+            instance._executor = None
+            logger.info("Analysis executor shut down")
@@ -1,27 +1,33 @@
 import sys
+import logging
 from concurrent.futures import ThreadPoolExecutor
-import librosa
+from typing import Iterable, Iterator, List, Optional, Tuple
 import numpy as np
-from moviepy import VideoFileClip
 import math
 import time
 from music21 import stream, note, scale, pitch
+from app.core.config import settings
 from app.infrastructure.audio.model_manager import ModelManager
+from app.infrastructure.audio.decoder import decode_audio, iter_decoded_audio
+from app.infrastructure.audio.audio_cache import get_audio_cache
+from app.infrastructure.audio.utils.note_utils import MIDI_NOTE_NAMES, PITCH_CLASS_NAMES
+from app.shared.constants import AUDIO_SAMPLE_RATE, MODEL_MIDI_OFFSET
+from app.infrastructure.audio.thread_layout import compute_thread_layout
+from app.infrastructure.monitoring.metrics import record_stage, time_stage
 
+logger = logging.getLogger(__name__)
 
 
-def convert_mp4_to_wav(input_video: str, total_duration: float, split_time: float):
-    print(f"TOTAL DURATION: {total_duration}")
-
-    clip = VideoFileClip(input_video)
-    clip_first_half = clip.subclipped(0, split_time)
-    clip_second_half = clip.subclipped(split_time, total_duration)
-
-    audio_first_half = clip_first_half.audio
-    audio_second_half = clip_second_half.audio
-
-    audio_first_half.write_audiofile("piano_scale_1st.wav", fps=48000, codec="pcm_s24le", logger=None)
-    audio_second_half.write_audiofile("piano_scale_2nd.wav", fps=48000, codec="pcm_s24le", logger=None)
+def load_audio(path: str) -> np.ndarray:
+    """
+    Obtiene el audio decodificado del archivo. Si AUDIO_CACHE_DIR esta configurado, se lee
+    memory-mapped desde la cache y ffmpeg solo se ejecuta la primera vez.
+    """
+    cache = get_audio_cache()
+    with time_stage("decode"):
+        if cache is None:
+            return decode_audio(path)
+        return cache.get_or_decode(path, decode_audio)
 
 def get_correct_notes(scale_name, type_scale, octaves):
     
@@ -40,90 +46,191 @@ def get_correct_notes(scale_name, type_scale, octaves):
 
     return note_names
 
-def basic_pitch_model_executor(audio_path: str, edges: list, n_bins: int):
-
-    predict, ICASSP_2022_MODEL_PATH = ModelManager.get_basic_pitch()
-
+def shifted_edges(edges) -> np.ndarray:
+    """ Adelanta 50 ms los limites de cada contenedor (menos el primero) para capturar ataques anticipados """
     edges = np.asarray(edges, dtype=float).copy()
+    edges[1:] -= 0.05
+    return edges
+
+# Estructura de cada nota detectada: un arreglo estructurado en vez de un dict por nota
+NOTE_DTYPE = np.dtype([("start", "f8"), ("end", "f8"), ("pitch", "i2"), ("velocity", "i2")])
+_EVENT_DTYPE = np.dtype([("start", "f8"), ("end", "f8"), ("pitch", "i2"), ("amplitude", "f8")])
+# Velocidad minima (0-127) para considerar que la nota mas fuerte del contenedor fue tocada
+MIN_VELOCITY = 56
+MISSING_NOTE = "Faltó"
+
+# Umbrales de Basic Pitch (ajustar si no detecta notas suaves/cortas)
+ONSET_TH = 0.2       # más bajo -> más inicios detectados
+FRAME_TH = 0.05      # más bajo -> más frames sostenidos detectados
+MIN_NOTE_LEN_FR = 3  # en frames del modelo; más bajo -> permite notas más cortas
+_MIDI_NOTE_NAMES = np.array(MIDI_NOTE_NAMES, dtype=object)
+
+def note_events_to_array(note_events, offset: float = 0.0) -> np.ndarray:
+    """ Convierte los note_events de basic_pitch (start_s, end_s, pitch, amplitude) a un arreglo NOTE_DTYPE """
+    events = np.array(note_events, dtype=_EVENT_DTYPE)
+    notes = np.empty(events.shape[0], dtype=NOTE_DTYPE)
+    notes["start"] = events["start"] + offset
+    notes["end"] = events["end"] + offset
+    notes["pitch"] = events["pitch"]
+    notes["velocity"] = np.round(127 * events["amplitude"])  # misma escala que la velocidad MIDI
+    return notes
+
+def select_notes_per_bin(notes: np.ndarray, edges: np.ndarray, first_bin: int, last_bin: int) -> List[dict]:
+    """
+    Elige, para cada contenedor no vacio en [first_bin, last_bin), la nota mas fuerte cuyo inicio cae en el.
+    Ante velocidades iguales gana la que empieza primero. Si la nota elegida no supera MIN_VELOCITY se
+    marca como faltante.
 
-    for i in range(1, len(edges)):
-        edges[i] = edges[i] - 0.05
-    # Creacion de los contenedores
-    bins = [[] for _ in range(n_bins)]
-
-    # Umbrales de Basic Pitch (ajustar si no detecta notas suaves/cortas)
-    ONSET_TH = 0.2       # más bajo -> más inicios detectados
-    FRAME_TH = 0.05      # más bajo -> más frames sostenidos detectados
-    MIN_NOTE_LEN_FR = 3  # en frames del modelo; más bajo -> permite notas más cortas
-        
-    # Ejecucion del modelo basic-pitch en todo el audio
-    model_output, midi, note_events = predict(
-        audio_path,
-        model_or_model_path=ICASSP_2022_MODEL_PATH,
-        onset_threshold=ONSET_TH,
-        frame_threshold=FRAME_TH,
-        minimum_note_length=MIN_NOTE_LEN_FR
-    )
-
-    # Esta sección extrae y organiza todas las notas detectadas por Basic Pitch a partir del objeto MIDI:
+    notes: arreglo NOTE_DTYPE con tiempos de la practica
+    edges: limites (ya desplazados) de todos los contenedores de la practica
     """
-    start: Cuándo empieza la nota (en segundos desde el inicio)
-    end: Cuándo termina la nota (en segundos)
-    pitch: Número MIDI (60=C4, 61=C#4, etc.)
-    name: Nombre legible de la nota ("C4", "A#3", etc.)
-    velocity: Qué tan fuerte se tocó la nota (0=silencio, 127=máximo)
+    # Un solo digitize para todas las notas
+    idx = np.digitize(notes["start"], edges, right=False) - 1
+    # Las notas del solapamiento pertenecen a los contenedores del segmento vecino
+    in_range = (idx >= first_bin) & (idx < last_bin)
+    notes, idx = notes[in_range], idx[in_range]
+    if notes.shape[0] == 0:
+        return []
+
+    # Orden por contenedor, luego velocidad descendente, luego inicio: la primera de cada contenedor es la elegida
+    order = np.lexsort((notes["start"], -notes["velocity"], idx))
+    sorted_idx = idx[order]
+    first_of_bin = np.flatnonzero(np.r_[True, sorted_idx[1:] != sorted_idx[:-1]])
+    chosen = notes[order[first_of_bin]]
+
+    names = _MIDI_NOTE_NAMES[chosen["pitch"]]
+    names[chosen["velocity"] <= MIN_VELOCITY] = MISSING_NOTE
+
+    return [
+        {"start": float(start), "end": float(end), "pitch": int(pitch_midi), "name": name, "velocity": int(velocity)}
+        for (start, end, pitch_midi, velocity), name in zip(chosen.tolist(), names.tolist())
+    ]
+
+def select_notes_from_posteriorgram(
+    model_output: dict,
+    frame_times: np.ndarray,
+    edges: np.ndarray,
+    first_bin: int,
+    last_bin: int,
+    threshold: float,
+) -> List[dict]:
+    """
+    Elige la nota de cada contenedor [first_bin, last_bin) directamente de la matriz de onsets del modelo,
+    sin seguimiento de notas ni MIDI: gana la clase de altura (C, C#, ...) con mayor probabilidad de ataque
+    dentro del contenedor. Si esa probabilidad no supera `threshold` la nota se marca como faltante.
+
+    frame_times: tiempo de cada frame en segundos de la practica
+    edges: limites (ya desplazados) de todos los contenedores de la practica
     """
-    notes_in_win = []
-    for inst in midi.instruments:
-        for n in inst.notes:
-            notes_in_win.append({
-                "start": float(n.start),
-                "end": float(n.end),
-                "pitch": int(n.pitch),  # numero MIDI
-                "name": librosa.midi_to_note(n.pitch, octave=True),
-                "velocity": int(n.velocity),
-            })
-
-    # Se organiza por tiempo de inicio de las notas
-    notes_in_win.sort(key=lambda x: x["start"])
-
-    # Asignar cada nota a su contenedor temporal correspondiente según su tiempo de inicio
-    for n in notes_in_win:
-        t = float(n["start"])                          # Obtener tiempo de inicio de la nota
-        idx = int(np.digitize(t, edges, right=False) - 1)  # Encontrar en qué contenedor temporal va
-        # idx = max(0, min(idx, n_bins - 1))                 # Asegurar que el índice esté dentro del rango válido
-        bins[idx].append(n)                                # Agregar la nota al contenedor correspondiente
-
-    # A partir de los contenedores con las notas en su correspondiente espacio de tiempo, se seleccionan
-    # como nota ejecutada, la mas fuerte dentro del espacio temporal
+    onsets = model_output["onset"]
+    n_pitches = onsets.shape[1]
+    pitch_classes = (np.arange(n_pitches) + MODEL_MIDI_OFFSET) % 12
+
+    # Frames que caen en cada contenedor
+    bounds = np.searchsorted(frame_times, edges[first_bin:last_bin + 1], side="left")
+
     extracted_notes = []
-    for i in range(n_bins):
-        section_start = edges[i]
-        section_end = edges[i + 1]
-        notes_in_section = bins[i]
-        if not notes_in_section:
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        if hi <= lo:
             continue
 
-        notes_in_section.sort(key=lambda x: x['start'])
+        # Maxima probabilidad de ataque de cada altura en el contenedor, agrupada por clase de altura
+        bin_onsets = onsets[lo:hi]
+        pitch_scores = bin_onsets.max(axis=0)
+        class_scores = np.zeros(12, dtype=pitch_scores.dtype)
+        np.maximum.at(class_scores, pitch_classes, pitch_scores)
+
+        best_class = int(class_scores.argmax())
+        confidence = float(class_scores[best_class])
+        best_pitch = int(np.where(pitch_classes == best_class, pitch_scores, -1).argmax())
+        onset_frame = lo + int(bin_onsets[:, best_pitch].argmax())
+
+        extracted_notes.append({
+            "start": float(frame_times[onset_frame]),
+            "end": float(frame_times[hi - 1]),
+            "pitch": best_pitch + MODEL_MIDI_OFFSET,
+            "name": PITCH_CLASS_NAMES[best_class] if confidence >= threshold else MISSING_NOTE,
+            "velocity": int(round(127 * confidence)),
+        })
+
+    return extracted_notes
 
-        for n in notes_in_section:
-            n['name'] = n['name'][:-1].replace("♯", "#")
+def basic_pitch_model_executor(audio: np.ndarray, edges: list, first_bin: int, last_bin: int, offset: float = 0.0, model=None):
+    """
+    Analiza un segmento de la practica y elige la nota ejecutada en cada contenedor [first_bin, last_bin).
 
-        sorted_notes = sorted(notes_in_section, key=lambda x: (x["velocity"]), reverse=True)
-        if sorted_notes:
-            # Solo se elige la nota mas fuerte como la ejecutada, si su potencia('velocity') supera el umbral definido
-            # esto se lleva a cabo para manejar el caso en que el usuario no toque ninguna tecla entre beats 
-            if sorted_notes[0]['velocity'] > 56:
-                extracted_notes.append(sorted_notes[0])
-            else:
-                strongest_note = sorted_notes[0]
-                strongest_note['name'] = "Faltó"
-                extracted_notes.append(strongest_note)
-            
+    audio: muestras del segmento, que empieza en el segundo `offset` de la practica (puede incluir solapamiento)
+    edges: limites globales de los contenedores de la practica
+    """
 
-    return extracted_notes
+    if settings.ANALYSIS_MODE == "posteriorgram":
+        # Decision por contenedor leida de los posteriorgramas, sin seguimiento de notas
+        with time_stage("inference"):
+            model_output = ModelManager.infer_posteriorgram(audio, model=model)
+        with time_stage("binning"):
+            frame_times = ModelManager.frame_times(model_output["onset"].shape[0]) + offset
+            return select_notes_from_posteriorgram(
+                model_output,
+                frame_times,
+                shifted_edges(edges),
+                first_bin,
+                last_bin,
+                settings.POSTERIOR_CONFIDENCE_THRESHOLD
+            )
+
+    # Ejecucion del modelo basic-pitch en todo el audio del segmento
+    with time_stage("inference"):
+        model_output, note_events = ModelManager.infer(
+            audio,
+            onset_threshold=ONSET_TH,
+            frame_threshold=FRAME_TH,
+            minimum_note_length=MIN_NOTE_LEN_FR,
+            model=model
+        )
 
-def extract_notes_audio(video_file, tempo, rhythmic_Value, notes_quantity):
+    with time_stage("binning"):
+        # start/end en segundos desde el inicio de la practica, pitch MIDI, velocity 0-127
+        notes = note_events_to_array(note_events, offset)
+
+        # A partir de los contenedores con las notas en su correspondiente espacio de tiempo, se seleccionan
+        # como nota ejecutada, la mas fuerte dentro del espacio temporal
+        return select_notes_per_bin(notes, shifted_edges(edges), first_bin, last_bin)
+
+_segment_pool: Optional[ThreadPoolExecutor] = None
+
+def get_segment_pool() -> ThreadPoolExecutor:
+    """ Pool de hilos compartido por los segmentos de todas las practicas de este proceso """
+    global _segment_pool
+    if _segment_pool is None:
+        workers = compute_thread_layout().segment_pool_size
+        _segment_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="segment")
+    return _segment_pool
+
+def shutdown_segment_pool():
+    """ Cierra el pool de segmentos; el siguiente uso lo crea con el layout vigente """
+    global _segment_pool
+    if _segment_pool is not None:
+        _segment_pool.shutdown(wait=True)
+        _segment_pool = None
+
+def choose_segment_count(practice_duration: float, n_bins: int) -> int:
+    """
+    Cantidad de segmentos en que se divide la practica: ANALYSIS_SEGMENTS si esta configurado, si no
+    uno por cada ANALYSIS_MIN_SEGMENT_SECONDS de audio, limitado por los hilos de segmento de cada practica.
+    """
+    if settings.ANALYSIS_SEGMENTS > 0:
+        n_segments = settings.ANALYSIS_SEGMENTS
+    else:
+        n_segments = min(compute_thread_layout().segment_workers, int(practice_duration // settings.ANALYSIS_MIN_SEGMENT_SECONDS))
+    return max(1, min(n_segments, n_bins))
+
+def plan_segments(n_bins: int, n_segments: int) -> List[Tuple[int, int]]:
+    """ Reparte los contenedores en n_segments rangos contiguos [first_bin, last_bin) de tamaño similar """
+    bounds = np.linspace(0, n_bins, n_segments + 1).round().astype(int)
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+def practice_bins(tempo, rhythmic_Value, notes_quantity) -> Tuple[float, np.ndarray]:
+    """ Duracion neta de la practica y limites de los contenedores de cada nota """
     # Blanca (half note):  2 beats
     # Negra (quarter note):  1 beat
     # Corchea (eighth note):  0.5 beats
@@ -132,10 +239,7 @@ def extract_notes_audio(video_file, tempo, rhythmic_Value, notes_quantity):
     note_length_seconds = (60/tempo) * rhythmic_Value
     # Duracion neta de la ejecucion
     practice_duration = note_length_seconds * notes_quantity
-    print(f"TEMPO: {tempo}")
-    print(f"RITMO: {rhythmic_Value}")
-    print(f"CANTIDAD NOTAS: {notes_quantity}")
-
+    logger.debug("TEMPO: %s | RITMO: %s | CANTIDAD NOTAS: %s", tempo, rhythmic_Value, notes_quantity)
 
     TIME_SECTION = note_length_seconds 
     # Se crean contenedores sobre la ventana de analisis (Contenedor son espacios de ejecucion de cada nota)
@@ -143,43 +247,179 @@ def extract_notes_audio(video_file, tempo, rhythmic_Value, notes_quantity):
     # edges representan los espacios de tiempo que se consideraran para la ejecucion de cada nota (Sirve para categorizar las notas
     # en diferentes espacios de tiempo posteriormente)
     edges = np.array([i * TIME_SECTION for i in range(n_bins + 1)], dtype=float)
-    
-    note_executed_at_half = len(edges)//2
+    return practice_duration, edges
 
-    
-    convert_mp4_to_wav(video_file, practice_duration, edges[note_executed_at_half - 1]) 
+def anchor_bin_starts(extracted_notes: List[dict], edges: np.ndarray) -> List[dict]:
+    """ El inicio reportado de cada nota es el inicio (desplazado) de su contenedor """
+    edges = np.asarray(edges, dtype=float).copy()
+    extracted_notes[0]['start'] = 0
+    for i in range(1, len(edges)-1):
+        edges[i] = edges[i] - 0.05
+        extracted_notes[i]['start'] = edges[i]
 
-    start_time = time.time()
-    with ThreadPoolExecutor(max_workers=2) as executor:
-        future_l = executor.submit(
-            basic_pitch_model_executor,
-            audio_path="piano_scale_1st.wav",
-            edges=edges,
-            n_bins=n_bins
-        )
-        future_r = executor.submit(
-            basic_pitch_model_executor,
-            audio_path="piano_scale_2nd.wav",
-            edges=edges,
-            n_bins=n_bins
+    return extracted_notes
+
+def analyze_audio(audio: np.ndarray, tempo, rhythmic_Value, notes_quantity, model=None):
+    """ Extrae la nota ejecutada en cada contenedor a partir del audio decodificado de la practica """
+    practice_duration, edges = practice_bins(tempo, rhythmic_Value, notes_quantity)
+    n_bins = len(edges) - 1
+    analysis_edges = shifted_edges(edges)
+
+    # Los segmentos se cortan en limites de contenedores, con un solapamiento para no perder ataques en las uniones
+    segments = plan_segments(n_bins, choose_segment_count(practice_duration, n_bins))
+    overlap = settings.ANALYSIS_SEGMENT_OVERLAP
+    end_sample = min(audio.shape[0], int(round(practice_duration * AUDIO_SAMPLE_RATE)))
+
+    def run_segment(first_bin: int, last_bin: int):
+        seg_start = max(0.0, analysis_edges[first_bin] - overlap)
+        seg_end = analysis_edges[last_bin] + overlap
+        start_sample = int(round(seg_start * AUDIO_SAMPLE_RATE))
+        stop_sample = min(end_sample, int(round(seg_end * AUDIO_SAMPLE_RATE)))
+        return basic_pitch_model_executor(
+            audio[start_sample:stop_sample],
+            edges,
+            first_bin,
+            last_bin,
+            offset=start_sample / AUDIO_SAMPLE_RATE,
+            model=model
         )
 
-        # Espera a que ambos hilos acaben
-        l_res = future_l.result()
-        r_res = future_r.result()
+    start_time = time.time()
+    if len(segments) == 1:
+        results = [run_segment(*segments[0])]
+    else:
+        pool = get_segment_pool()
+        futures = [pool.submit(run_segment, first_bin, last_bin) for first_bin, last_bin in segments]
+        # Espera a que todos los segmentos acaben, en orden
+        results = [f.result() for f in futures]
 
     extracted_notes = []
-    if isinstance(l_res, list):
-        extracted_notes.extend(l_res)
-    if isinstance(r_res, list):
-        extracted_notes.extend(r_res)
-    end_time = time.time()
-    print(end_time - start_time)
+    for res in results:
+        extracted_notes.extend(res)
+    logger.debug("Analyzed %d segments in %.3fs", len(segments), time.time() - start_time)
+
+    return anchor_bin_starts(extracted_notes, edges)
+
+def take_samples(chunks: Iterable[np.ndarray], n_samples: int) -> Iterator[np.ndarray]:
+    """ Corta el flujo de audio tras n_samples muestras (el resto de la grabacion no se analiza) """
+    remaining = n_samples
+    for chunk in chunks:
+        if remaining <= 0:
+            return
+        chunk = chunk[:remaining]
+        remaining -= chunk.shape[0]
+        yield chunk
+
+def analyze_audio_stream(chunks: Iterable[np.ndarray], tempo, rhythmic_Value, notes_quantity, model=None):
+    """
+    Version incremental de analyze_audio: la inferencia corre sobre cada ventana del modelo en cuanto
+    llega su audio y los contenedores se cierran a medida que los frames los cubren.
 
-    extracted_notes[0]['start'] = 0
-    for i in range(1, len(edges)-1):
-        edges[i] = edges[i] - 0.05
-        extracted_notes[i]['start'] = edges[i]
+    chunks: audio de la practica a AUDIO_SAMPLE_RATE, en el orden en que se decodifica
+    Solo se guardan los frames desde el inicio del primer contenedor abierto (menos el solapamiento),
+    asi la memoria no crece con la duracion de la grabacion.
+    """
+    practice_duration, edges = practice_bins(tempo, rhythmic_Value, notes_quantity)
+    n_bins = len(edges) - 1
+    analysis_edges = shifted_edges(edges)
+    # Mismo contexto que tienen los segmentos a cada lado de sus contenedores
+    overlap = settings.ANALYSIS_SEGMENT_OVERLAP
+    end_sample = int(round(practice_duration * AUDIO_SAMPLE_RATE))
+
+    extracted_notes: List[dict] = []
+    next_bin = 0
+    first_frame = 0
+    frames: Optional[dict] = None
+
+    def close_bins(last_bin: int, frame_times: np.ndarray):
+        if settings.ANALYSIS_MODE == "posteriorgram":
+            extracted_notes.extend(select_notes_from_posteriorgram(
+                frames, frame_times, analysis_edges, next_bin, last_bin, settings.POSTERIOR_CONFIDENCE_THRESHOLD
+            ))
+            return
+        note_events = ModelManager.posteriorgram_to_note_events(
+            frames,
+            onset_threshold=ONSET_TH,
+            frame_threshold=FRAME_TH,
+            minimum_note_length=MIN_NOTE_LEN_FR,
+            times_s=frame_times
+        )
+        extracted_notes.extend(select_notes_per_bin(note_events_to_array(note_events), analysis_edges, next_bin, last_bin))
+
+    # Las etapas se intercalan ventana por ventana: se acumulan y se registran una vez por practica,
+    # igual que en analyze_audio. decode es solo la espera del decodificador (lo que no se solapa).
+    stage_seconds = {"decode": 0.0, "inference": 0.0, "binning": 0.0}
+
+    def timed_chunks() -> Iterator[np.ndarray]:
+        source = iter(take_samples(chunks, end_sample))
+        while True:
+            start = time.perf_counter()
+            chunk = next(source, None)
+            stage_seconds["decode"] += time.perf_counter() - start
+            if chunk is None:
+                return
+            yield chunk
 
-    return extracted_notes
+    start_time = time.time()
+    n_blocks = 0
+    outcome = "error"
+    try:
+        blocks = ModelManager.iter_posteriorgram(timed_chunks(), model=model)
+        while True:
+            start, decode_before = time.perf_counter(), stage_seconds["decode"]
+            block = next(blocks, None)
+            stage_seconds["inference"] += time.perf_counter() - start - (stage_seconds["decode"] - decode_before)
+            if block is None:
+                break
+
+            n_blocks += 1
+            start = time.perf_counter()
+            # El contorno no se usa para elegir notas
+            frames = {k: block[k] if frames is None else np.concatenate([frames[k], block[k]]) for k in ("note", "onset")}
+            n_frames = frames["onset"].shape[0]
+            frame_times = ModelManager.frame_times(first_frame + n_frames)[first_frame:]
+
+            # Contenedores cuyo final (mas el solapamiento) ya esta cubierto por los frames recibidos
+            ready = int(np.searchsorted(analysis_edges[1:], frame_times[-1] - overlap, side="right"))
+            ready = min(ready, n_bins)
+            if ready > next_bin:
+                close_bins(ready, frame_times)
+                next_bin = ready
+                if next_bin < n_bins:
+                    # Se descartan los frames que ya no necesita ningun contenedor abierto
+                    drop = int(np.searchsorted(frame_times, analysis_edges[next_bin] - overlap, side="left"))
+                    frames = {k: v[drop:] for k, v in frames.items()}
+                    first_frame += drop
+            stage_seconds["binning"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        if next_bin < n_bins and frames is not None and frames["onset"].shape[0]:
+            n_frames = frames["onset"].shape[0]
+            close_bins(n_bins, ModelManager.frame_times(first_frame + n_frames)[first_frame:])
+        stage_seconds["binning"] += time.perf_counter() - start
+        outcome = "ok"
+    finally:
+        for stage, seconds in stage_seconds.items():
+            record_stage(stage, seconds, outcome)
+    logger.debug("Streamed analysis of %d blocks in %.3fs", n_blocks, time.time() - start_time)
+
+    return anchor_bin_starts(extracted_notes, edges)
 
+def extract_notes_audio(video_file, tempo, rhythmic_Value, notes_quantity):
+    if settings.ANALYSIS_STREAMING and get_audio_cache() is None:
+        # La decodificacion (ffmpeg) y la inferencia avanzan a la vez, ventana por ventana
+        practice_duration, _ = practice_bins(tempo, rhythmic_Value, notes_quantity)
+        chunks = iter_decoded_audio(
+            video_file,
+            ModelManager.window_hop_samples(),
+            duration=practice_duration,
+            max_buffered_chunks=settings.ANALYSIS_STREAM_BUFFER_CHUNKS
+        )
+        try:
+            return analyze_audio_stream(chunks, tempo, rhythmic_Value, notes_quantity)
+        finally:
+            chunks.close()
+
+    # Se decodifica solo la pista de audio, directo a memoria y a la frecuencia de muestreo del modelo
+    audio = load_audio(video_file)
+    return analyze_audio(audio, tempo, rhythmic_Value, notes_quantity)
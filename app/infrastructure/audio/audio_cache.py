@@ -0,0 +1,138 @@
+import hashlib
+import logging
+import os
+import tempfile
+from typing import Callable, Optional
+import numpy as np
+from app.core.config import settings
+from app.shared.constants import AUDIO_SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class DecodedAudioCache:
+    """
+    On-disk cache of decoded PCM, content-addressed and stored as .npy files.
+
+    Entries are read back memory-mapped (zero-copy) and evicted in LRU order once the
+    directory exceeds max_bytes. The modification time of each entry is its last use, so
+    several processes can share the same directory without extra bookkeeping.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, key_mode: str = "stat", sample_rate: int = AUDIO_SAMPLE_RATE):
+        if key_mode not in ("stat", "content"):
+            raise ValueError(f"Unknown audio cache key mode: {key_mode}")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.key_mode = key_mode
+        self.sample_rate = sample_rate
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key_for(self, path: str) -> str:
+        """
+        Builds the cache key of a media file.
+
+        - stat: hash of (absolute path, size, mtime), costs one stat call.
+        - content: hash of the file bytes, survives renames and re-uploads of the same file.
+        """
+        if self.key_mode == "content":
+            digest = hashlib.blake2b(digest_size=20)
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+        else:
+            st = os.stat(path)
+            digest = hashlib.blake2b(
+                f"{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}".encode(), digest_size=20
+            )
+        return f"{digest.hexdigest()}-{self.sample_rate}"
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def get(self, path: str) -> Optional[np.ndarray]:
+        """Returns the cached audio of path memory-mapped, or None on a miss."""
+        entry = self._entry_path(self.key_for(path))
+        try:
+            audio = np.load(entry, mmap_mode="r")
+            os.utime(entry)  # mark as most recently used
+        except (FileNotFoundError, ValueError):
+            return None
+        logger.debug("Audio cache hit for %s", path)
+        return audio
+
+    def put(self, path: str, audio: np.ndarray) -> np.ndarray:
+        """Stores decoded audio for path and returns it memory-mapped from the cache."""
+        entry = self._entry_path(self.key_for(path))
+        # Write to a temp file and rename so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, np.ascontiguousarray(audio, dtype=np.float32))
+            os.replace(tmp_path, entry)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self._evict()
+        try:
+            return np.load(entry, mmap_mode="r")
+        except FileNotFoundError:
+            # Evicted right away because it alone exceeds the budget
+            return audio
+
+    def get_or_decode(self, path: str, decode_fn: Callable[[str], np.ndarray]) -> np.ndarray:
+        """Returns the cached audio of path, decoding and storing it on a miss."""
+        audio = self.get(path)
+        if audio is not None:
+            return audio
+        logger.debug("Audio cache miss for %s", path)
+        return self.put(path, decode_fn(path))
+
+    def _evict(self):
+        """Removes least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for e in it:
+                if not e.name.endswith(".npy"):
+                    continue
+                try:
+                    st = e.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, e.path))
+                total += st.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                # Open memory maps keep working after the unlink
+                os.remove(entry)
+                total -= size
+                logger.debug("Evicted %s from audio cache", entry)
+            except FileNotFoundError:
+                total -= size
+
+
+_audio_cache: Optional[DecodedAudioCache] = None
+
+
+def get_audio_cache() -> Optional[DecodedAudioCache]:
+    """Returns the process-wide audio cache, or None when AUDIO_CACHE_DIR is not set."""
+    global _audio_cache
+    if _audio_cache is None and settings.AUDIO_CACHE_DIR:
+        _audio_cache = DecodedAudioCache(
+            settings.AUDIO_CACHE_DIR,
+            settings.AUDIO_CACHE_MAX_BYTES,
+            key_mode=settings.AUDIO_CACHE_KEY,
+        )
+    return _audio_cache
@@ -0,0 +1,201 @@
+import logging
+import os
+import queue
+import subprocess
+import threading
+from typing import Iterator, Optional
+import numpy as np
+from app.core.config import settings
+from app.core.exceptions import AudioDecodingException
+from app.shared.constants import AUDIO_SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+
+def _ffmpeg_command(path: str, sample_rate: int, start: Optional[float], duration: Optional[float]) -> list:
+    """Builds an ffmpeg command that writes only the audio stream as raw float32 mono PCM to stdout."""
+    cmd = [settings.FFMPEG_BINARY, "-nostdin", "-hide_banner", "-loglevel", "error"]
+    if start:
+        cmd += ["-ss", f"{start:.6f}"]
+    cmd += ["-i", path]
+    if duration is not None:
+        cmd += ["-t", f"{duration:.6f}"]
+    # -vn: the video stream is never decoded
+    cmd += ["-vn", "-sn", "-dn", "-ac", "1", "-ar", str(sample_rate), "-f", "f32le", "pipe:1"]
+    return cmd
+
+
+# Containers libsndfile reads natively; anything else (mp4, opus, ...) goes through ffmpeg
+SOUNDFILE_EXTENSIONS = (".wav", ".flac")
+
+
+def _soundfile_info(path: str, sample_rate: int):
+    """
+    soundfile info of an audio file that can be read without ffmpeg: a wav/flac already mono and
+    at sample_rate. None otherwise (other container, resampling or downmix needed, unreadable).
+    """
+    if os.path.splitext(path)[1].lower() not in SOUNDFILE_EXTENSIONS:
+        return None
+    import soundfile
+
+    try:
+        info = soundfile.info(path)
+    except (RuntimeError, OSError):
+        return None
+    if info.samplerate != sample_rate or info.channels != 1:
+        return None
+    return info
+
+
+def _soundfile_range(sample_rate: int, start: Optional[float], duration: Optional[float]) -> tuple:
+    first = int(round((start or 0.0) * sample_rate))
+    frames = -1 if duration is None else int(round(duration * sample_rate))
+    return first, frames
+
+
+def decode_audio(
+    path: str,
+    sample_rate: int = AUDIO_SAMPLE_RATE,
+    start: Optional[float] = None,
+    duration: Optional[float] = None,
+) -> np.ndarray:
+    """
+    Decodes the audio track of a media file into memory.
+
+    Mono wav/flac files already at sample_rate are read directly with soundfile; everything
+    else is decoded by ffmpeg.
+
+    Args:
+        path: Video (mp4) or audio file readable by ffmpeg
+        sample_rate: Output sample rate, by default the native rate of basic_pitch
+        start: Optional offset in seconds where decoding starts
+        duration: Optional maximum number of seconds to decode
+
+    Returns:
+        1-D float32 mono array at sample_rate
+    """
+    if _soundfile_info(path, sample_rate) is not None:
+        # Audio artifact already in the model format: read directly, without spawning ffmpeg
+        import soundfile
+
+        first, frames = _soundfile_range(sample_rate, start, duration)
+        audio = soundfile.read(path, start=first, frames=frames, dtype="float32", always_2d=False)[0]
+        if audio.size == 0:
+            raise AudioDecodingException(f"No audio found in {path}")
+        logger.debug("Read %d samples (%.2fs) from %s", audio.size, audio.size / sample_rate, path)
+        return audio
+
+    cmd = _ffmpeg_command(path, sample_rate, start, duration)
+    try:
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+    except OSError as e:
+        raise AudioDecodingException(f"Unable to run ffmpeg: {e}")
+
+    if proc.returncode != 0:
+        stderr = proc.stderr.decode(errors="replace").strip()
+        logger.error("ffmpeg failed decoding %s: %s", path, stderr)
+        raise AudioDecodingException(f"Failed to decode audio from {path}: {stderr}")
+
+    audio = np.frombuffer(proc.stdout, dtype=np.float32)
+    if audio.size == 0:
+        raise AudioDecodingException(f"No audio stream found in {path}")
+
+    logger.debug("Decoded %d samples (%.2fs) from %s", audio.size, audio.size / sample_rate, path)
+    return audio
+
+
+def iter_decoded_audio(
+    path: str,
+    chunk_samples: int,
+    sample_rate: int = AUDIO_SAMPLE_RATE,
+    start: Optional[float] = None,
+    duration: Optional[float] = None,
+    max_buffered_chunks: int = 4,
+) -> Iterator[np.ndarray]:
+    """
+    Decodes the audio track of a media file incrementally, as ffmpeg produces it.
+
+    A reader thread keeps up to `max_buffered_chunks` chunks decoded ahead of the consumer, so
+    ffmpeg keeps working while the caller processes the previous chunk and memory stays bounded.
+    Closing the generator early stops ffmpeg.
+
+    Args:
+        path: Video (mp4) or audio file readable by ffmpeg
+        chunk_samples: Samples per yielded chunk (the last one may be shorter)
+        sample_rate, start, duration: Same meaning as in decode_audio
+        max_buffered_chunks: Decoded chunks waiting to be consumed at most
+
+    Yields:
+        1-D float32 mono arrays at sample_rate
+    """
+    if _soundfile_info(path, sample_rate) is not None:
+        # Audio artifact already in the model format: libsndfile reads the blocks as they are needed
+        import soundfile
+
+        first, frames = _soundfile_range(sample_rate, start, duration)
+        total = 0
+        for block in soundfile.blocks(path, blocksize=chunk_samples, start=first, frames=frames, dtype="float32"):
+            total += block.shape[0]
+            yield block
+        if total == 0:
+            raise AudioDecodingException(f"No audio found in {path}")
+        return
+
+    cmd = _ffmpeg_command(path, sample_rate, start, duration)
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        raise AudioDecodingException(f"Unable to run ffmpeg: {e}")
+
+    chunk_bytes = chunk_samples * np.dtype(np.float32).itemsize
+    chunks: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=max(1, max_buffered_chunks))
+    stop = threading.Event()
+    stderr = []
+
+    def put(item: Optional[bytes]):
+        # Gives up when the consumer is gone, instead of blocking on a full queue forever
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def reader():
+        try:
+            while not stop.is_set():
+                data = proc.stdout.read(chunk_bytes)
+                if not data:
+                    break
+                put(data[:len(data) - len(data) % 4])
+            stderr.append(proc.stderr.read())
+        finally:
+            put(None)
+
+    thread = threading.Thread(target=reader, name="ffmpeg-reader", daemon=True)
+    thread.start()
+    total = 0
+    try:
+        while True:
+            data = chunks.get()
+            if data is None:
+                break
+            audio = np.frombuffer(data, dtype=np.float32)
+            total += audio.size
+            yield audio
+
+        if proc.wait() != 0:
+            message = b"".join(stderr).decode(errors="replace").strip()
+            logger.error("ffmpeg failed decoding %s: %s", path, message)
+            raise AudioDecodingException(f"Failed to decode audio from {path}: {message}")
+        if total == 0:
+            raise AudioDecodingException(f"No audio stream found in {path}")
+        logger.debug("Streamed %d samples (%.2fs) from %s", total, total / sample_rate, path)
+    finally:
+        stop.set()
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        thread.join()
+        proc.stdout.close()
+        proc.stderr.close()
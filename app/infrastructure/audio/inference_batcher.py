@@ -0,0 +1,95 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _BatchRequest:
+    windows: np.ndarray
+    future: Future = field(default_factory=Future)
+
+
+class InferenceBatcher:
+    """
+    Collects model windows submitted by concurrent callers and runs them in batched calls.
+
+    A background thread takes requests from a queue, waits at most max_wait_ms for more
+    windows once the first one arrives, runs up to max_batch_size windows in a single
+    call to predict_fn and hands each caller back its own slice of the outputs.
+    """
+
+    def __init__(self, predict_fn: Callable[[np.ndarray], Dict[str, np.ndarray]], max_batch_size: int = 16, max_wait_ms: float = 5.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue[_BatchRequest | None]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, windows: np.ndarray) -> Future:
+        """Queues windows of shape (n, AUDIO_N_SAMPLES, 1); the future resolves to their outputs."""
+        request = _BatchRequest(windows)
+        self._queue.put(request)
+        return request.future
+
+    def predict(self, windows: np.ndarray) -> Dict[str, np.ndarray]:
+        """Blocking helper: submits windows and waits for their outputs."""
+        return self.submit(windows).result()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first: _BatchRequest) -> List[_BatchRequest]:
+        batch = [first]
+        size = first.windows.shape[0]
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if request is None:
+                # Keep the stop marker for the main loop
+                self._queue.put(None)
+                break
+            batch.append(request)
+            size += request.windows.shape[0]
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            try:
+                stacked = np.concatenate([r.windows for r in batch])
+                outputs: Dict[str, List[np.ndarray]] = {}
+                # A single large request is still split to respect max_batch_size
+                for i in range(0, stacked.shape[0], self.max_batch_size):
+                    for k, v in self.predict_fn(stacked[i:i + self.max_batch_size]).items():
+                        outputs.setdefault(k, []).append(v)
+                merged = {k: np.concatenate(v) for k, v in outputs.items()}
+            except Exception as e:
+                logger.error("Batched inference failed for %d requests", len(batch), exc_info=True)
+                for r in batch:
+                    r.future.set_exception(e)
+                continue
+
+            logger.debug("Ran batched inference: %d windows from %d requests", stacked.shape[0], len(batch))
+            offset = 0
+            for r in batch:
+                n = r.windows.shape[0]
+                r.future.set_result({k: v[offset:offset + n] for k, v in merged.items()})
+                offset += n
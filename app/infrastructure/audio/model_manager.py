@@ -1,76 +1,543 @@
 import os
+import sys
 import time
 import logging
-from typing import Tuple, Optional, Any
+import threading
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional, Any
+import numpy as np
+from app.core.config import settings
+from app.infrastructure.audio.inference_batcher import InferenceBatcher
+from app.infrastructure.audio.model_quantization import build_quantized_model
+from app.infrastructure.audio.thread_layout import ThreadLayout, compute_thread_layout
+from app.infrastructure.monitoring.metrics import MODEL_LOAD_SECONDS, MODEL_LOADED
+from app.shared.constants import AUDIO_SAMPLE_RATE
 
 logger = logging.getLogger(__name__)
 
+# (start_s, end_s, pitch_midi, amplitude)
+NoteEvent = Tuple[float, float, int, float]
+
+# Overlap between consecutive model windows, same value basic_pitch.inference uses
+N_OVERLAPPING_FRAMES = 30
+
+# Thread pool sizes exported by configure_threads (inherited by spawned analysis processes)
+BLAS_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+THREAD_ENV_VARS = BLAS_THREAD_ENV_VARS + ("TF_NUM_INTRAOP_THREADS", "TF_NUM_INTEROP_THREADS")
+
+# Serialized basic_pitch models shipped with the package, by backend
+MODEL_BACKENDS = ("tf", "tflite", "onnx")
+
 
 class ModelManager:
     """Singleton class to manage audio analysis models (basic_pitch)."""
-    
+
     _instance = None
     _basic_pitch_predict = None
     _basic_pitch_model_path = None
+    _basic_pitch_model = None
+    _backend: Optional[str] = None
     _model_loaded = False
-    
+    _thread_layout: Optional[ThreadLayout] = None
+    _batcher: Optional[InferenceBatcher] = None
+    _lock = threading.Lock()
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
-    
+
     @classmethod
-    def get_basic_pitch(cls) -> Tuple[Any, str]:
+    def get_basic_pitch(cls) -> Tuple[Any, Any]:
         """
         Gets or initializes the basic_pitch model.
-        
+
         Returns:
-            Tuple[predict_function, model_path]: The predict function and model path
-            
+            Tuple[predict_function, model]: The predict function and the resident Model instance
+
         Usage:
-            predict, model_path = AudioModelManager.get_basic_pitch()
-            model_output, midi, notes = predict(audio_path, model_or_model_path=model_path, ...)
+            predict, model = ModelManager.get_basic_pitch()
+            model_output, midi, notes = predict(audio_path, model_or_model_path=model, ...)
         """
         instance = cls()
         if not instance._model_loaded:
-            instance._initialize_basic_pitch()
-        return instance._basic_pitch_predict, instance._basic_pitch_model_path
-    
+            with cls._lock:
+                if not instance._model_loaded:
+                    instance._initialize_basic_pitch()
+        return instance._basic_pitch_predict, instance._basic_pitch_model
+
+    @classmethod
+    def get_model(cls) -> Any:
+        """Gets the resident basic_pitch Model, loading it on first use."""
+        _, model = cls.get_basic_pitch()
+        return model
+
+    @classmethod
+    def configure_threads(cls) -> ThreadLayout:
+        """
+        Pins the TF and BLAS/OpenMP thread pools to the layout derived from the job
+        concurrency and segment settings, so concurrent inferences do not oversubscribe
+        the cores. Must run before TensorFlow starts its pools: it is called before the model
+        is loaded, and by the parent before spawning analysis processes (which inherit the
+        environment). BLAS/OpenMP pools already loaded are limited with threadpoolctl, and
+        the TFLite/ONNX backends get the op threads in load_model.
+        """
+        instance = cls()
+        if instance._thread_layout is not None:
+            return instance._thread_layout
+
+        layout = compute_thread_layout()
+        intra, inter = str(layout.intra_op_threads), str(layout.inter_op_threads)
+        # Explicit values in the environment win over the computed layout
+        for var in BLAS_THREAD_ENV_VARS:
+            os.environ.setdefault(var, intra)
+        os.environ.setdefault("TF_NUM_INTRAOP_THREADS", intra)
+        os.environ.setdefault("TF_NUM_INTEROP_THREADS", inter)
+
+        # numpy (and its BLAS) is imported long before this runs, so the variables above only reach
+        # spawned processes; the pools already loaded in this process are limited at runtime
+        try:
+            from threadpoolctl import threadpool_limits
+
+            threadpool_limits(limits=int(os.environ["OPENBLAS_NUM_THREADS"]), user_api="blas")
+            threadpool_limits(limits=int(os.environ["OMP_NUM_THREADS"]), user_api="openmp")
+        except ImportError:
+            logger.warning("threadpoolctl not installed, BLAS/OpenMP threads of this process are not limited")
+
+        # TF reads TF_NUM_*_THREADS when its runtime starts; if it is already imported, set them directly
+        tf = sys.modules.get("tensorflow")
+        if tf is not None:
+            try:
+                tf.config.threading.set_intra_op_parallelism_threads(layout.intra_op_threads)
+                tf.config.threading.set_inter_op_parallelism_threads(layout.inter_op_threads)
+            except RuntimeError:
+                logger.warning("TensorFlow already initialized, thread settings only apply to new processes")
+
+        instance._thread_layout = layout
+        return layout
+
+    @classmethod
+    def get_thread_layout(cls) -> Optional[ThreadLayout]:
+        return cls()._thread_layout
+
+    @classmethod
+    def reset_thread_layout(cls):
+        """
+        Forgets the computed layout so the next configure_threads derives it again from the settings
+        (benchmarks sweeping concurrency). The exported THREAD_ENV_VARS are left to the caller, and a
+        TF runtime already started in this process keeps its pools.
+        """
+        cls()._thread_layout = None
+
+    @classmethod
+    def preload_modules(cls):
+        """
+        Imports basic_pitch and its inference backend without loading a model or running
+        any op. Called by the supervisor before forking so the worker processes share
+        these pages copy-on-write; each worker still loads its own model. Only useful with
+        the thread executor: spawned analysis processes import everything again.
+        """
+        os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+        os.environ.setdefault('TF_ENABLE_ONEDNN_OPTS', '0')
+        cls.configure_threads()
+        import basic_pitch.inference  # noqa: F401
+        import basic_pitch.note_creation  # noqa: F401
+
     def _initialize_basic_pitch(self):
         """Initializes the basic_pitch model with safe loading."""
         logger.info("Initializing basic_pitch model...")
-        
+
         try:
             # Set TensorFlow environment for stability
             os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
             os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
-            
+            self.configure_threads()
+
             # Lazy import to avoid startup freeze
             from basic_pitch.inference import predict
-            from basic_pitch import ICASSP_2022_MODEL_PATH
-            
+
+            backend = settings.MODEL_BACKEND
+            quantization = settings.MODEL_QUANTIZATION
+            model_path = self.resolve_model_path(backend, quantization)
+
+            start_time = time.time()
+            # Deserialized once per process; every inference reuses it
+            model = self.load_model(backend, model_path=model_path)
+
             # Store references
             self._basic_pitch_predict = predict
-            self._basic_pitch_model_path = ICASSP_2022_MODEL_PATH
+            self._basic_pitch_model_path = model_path
+            self._basic_pitch_model = model
+            self._backend = backend
             self._model_loaded = True
-            
-            logger.info(f"basic_pitch model loaded successfully from: {ICASSP_2022_MODEL_PATH}")
-            
+            MODEL_LOAD_SECONDS.observe(time.time() - start_time)
+            MODEL_LOADED.set(1, backend=backend)
+
+            logger.info(
+                f"basic_pitch model loaded successfully from: {model_path} "
+                f"(backend={backend}, quantization={quantization}) in {time.time() - start_time:.2f}s"
+            )
+
         except Exception as e:
             logger.error(f"Failed to load basic_pitch model: {e}")
             raise RuntimeError(f"Unable to initialize basic_pitch model: {e}")
-    
+
+    @classmethod
+    def resolve_model_path(cls, backend: str, quantization: str = "none") -> str:
+        """
+        Path of the serialized model for a backend: MODEL_PATH when set for the configured
+        backend, otherwise the ICASSP 2022 model shipped with basic_pitch.
+
+        With a quantization mode, the quantized variant built (once) in QUANTIZED_MODEL_DIR:
+        the TFLite one is converted from the TF SavedModel, the ONNX one from the .onnx model.
+        """
+        if backend not in MODEL_BACKENDS:
+            raise ValueError(f"Unknown model backend: {backend}. Expected one of {MODEL_BACKENDS}")
+        if quantization != "none":
+            source_backend = "tf" if backend == "tflite" else backend
+            return build_quantized_model(
+                backend, cls.resolve_model_path(source_backend), quantization, settings.QUANTIZED_MODEL_DIR
+            )
+        if settings.MODEL_PATH and backend == settings.MODEL_BACKEND:
+            return settings.MODEL_PATH
+
+        from basic_pitch import FilenameSuffix, build_icassp_2022_model_path
+
+        return str(build_icassp_2022_model_path(getattr(FilenameSuffix, backend)))
+
+    @classmethod
+    def load_model(cls, backend: Optional[str] = None, model_path: Optional[str] = None, quantization: str = "none") -> Any:
+        """
+        Loads a new basic_pitch Model (not cached) for a backend, optionally quantized.
+
+        Every backend exposes the same predict() contract: a dict of "note", "onset"
+        and "contour" arrays for a batch of windows.
+        """
+        from basic_pitch.inference import Model
+
+        backend = backend or settings.MODEL_BACKEND
+        model_path = model_path or cls.resolve_model_path(backend, quantization)
+        model = Model(model_path)
+        cls._apply_thread_layout(model, model_path)
+        return model
+
+    @classmethod
+    def _apply_thread_layout(cls, model: Any, model_path: str):
+        """
+        basic_pitch builds its TFLite interpreter and ONNX Runtime session with their default
+        thread pools (one thread per core each); they are rebuilt with the layout's op threads.
+        TF is covered by configure_threads.
+        """
+        layout = cls.configure_threads()
+        model_type = getattr(getattr(model, "model_type", None), "name", "")
+        if model_type == "ONNX":
+            import onnxruntime as ort
+
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = layout.intra_op_threads
+            options.inter_op_num_threads = layout.inter_op_threads
+            model.model = ort.InferenceSession(
+                str(model_path), sess_options=options, providers=model.model.get_providers()
+            )
+        elif model_type == "TFLITE" and hasattr(model, "interpreter"):
+            # Same Interpreter class basic_pitch picked (tflite_runtime or tf.lite)
+            model.interpreter = type(model.interpreter)(model_path=str(model_path), num_threads=layout.intra_op_threads)
+            model.model = model.interpreter.get_signature_runner()
+        elif model_type == "TFLITE":
+            logger.warning("TFLite interpreter not reachable, MODEL_INTRA_OP_THREADS does not apply to it")
+            return
+        else:
+            return
+        logger.info(
+            "%s model threads: intra_op=%d, inter_op=%d",
+            model_type, layout.intra_op_threads, layout.inter_op_threads,
+        )
+
+    @classmethod
+    def get_backend(cls) -> Optional[str]:
+        """Backend of the resident model, None if not loaded yet."""
+        return cls()._backend
+
+    @classmethod
+    def get_batcher(cls) -> InferenceBatcher:
+        """Gets the micro-batcher shared by every caller of the resident model in this process."""
+        instance = cls()
+        if instance._batcher is None:
+            with cls._lock:
+                if instance._batcher is None:
+                    instance._batcher = InferenceBatcher(
+                        lambda windows: cls._predict_batch(windows, cls.get_model()),
+                        max_batch_size=settings.INFERENCE_MAX_BATCH_SIZE,
+                        max_wait_ms=settings.INFERENCE_MAX_WAIT_MS,
+                    )
+                    logger.info(
+                        "Inference micro-batching enabled: max_batch_size=%d, max_wait_ms=%.1f",
+                        settings.INFERENCE_MAX_BATCH_SIZE,
+                        settings.INFERENCE_MAX_WAIT_MS,
+                    )
+        return instance._batcher
+
+    @staticmethod
+    def _predict_batch(windows: np.ndarray, model: Any) -> Dict[str, np.ndarray]:
+        """Single forward pass over a batch of windows."""
+        model_type = getattr(getattr(model, "model_type", None), "name", "")
+        if model_type == "TFLITE" and windows.shape[0] > 1:
+            # TFLite interpreters are allocated for a batch of one window
+            outputs = [model.predict(window[np.newaxis]) for window in windows]
+            return {k: np.concatenate([o[k] for o in outputs]) for k in outputs[0]}
+        return model.predict(windows)
+
+    @classmethod
+    def predict_windows(cls, windows: np.ndarray, model: Any = None) -> Dict[str, np.ndarray]:
+        """
+        Runs the model over already framed audio windows.
+
+        With INFERENCE_BATCHING the windows of the resident model go through the shared
+        micro-batcher, so concurrent jobs/segments of this process are merged into larger
+        forward passes. Otherwise they run in chunks of INFERENCE_MAX_BATCH_SIZE.
+
+        Args:
+            windows: float32 array of shape (n_windows, AUDIO_N_SAMPLES, 1)
+            model: Optional Model to use instead of the resident one
+
+        Returns:
+            Dict with "note", "onset" and "contour" arrays of shape (n_windows, frames, bins)
+        """
+        if model is None and settings.INFERENCE_BATCHING:
+            return cls.get_batcher().predict(windows)
+
+        model = model or cls.get_model()
+        batch_size = max(1, settings.INFERENCE_MAX_BATCH_SIZE)
+        outputs: Dict[str, List[np.ndarray]] = {"note": [], "onset": [], "contour": []}
+        for i in range(0, windows.shape[0], batch_size):
+            for k, v in cls._predict_batch(windows[i:i + batch_size], model).items():
+                outputs[k].append(v)
+        return {k: np.concatenate(v) for k, v in outputs.items()}
+
+    @classmethod
+    def infer_posteriorgram(cls, audio: np.ndarray, model: Any = None) -> Dict[str, np.ndarray]:
+        """
+        Runs the model over an in-memory audio buffer and returns only its posteriorgrams.
+
+        Uses the same windowing as basic_pitch.inference.predict.
+
+        Args:
+            audio: 1-D float32 mono array at AUDIO_SAMPLE_RATE
+            model: Optional Model to use instead of the resident one
+
+        Returns:
+            Dict with "note", "onset" (frames, 88) and "contour" (frames, 264) arrays
+        """
+        from basic_pitch.inference import unwrap_output
+        from basic_pitch.constants import AUDIO_N_SAMPLES, FFT_HOP
+
+        overlap_len = N_OVERLAPPING_FRAMES * FFT_HOP
+        hop_size = AUDIO_N_SAMPLES - overlap_len
+
+        original_length = audio.shape[0]
+        padded = np.concatenate([np.zeros(overlap_len // 2, dtype=np.float32), audio.astype(np.float32, copy=False)])
+
+        n_windows = max(1, int(np.ceil(padded.shape[0] / hop_size)))
+        windows = np.zeros((n_windows, AUDIO_N_SAMPLES, 1), dtype=np.float32)
+        for i in range(n_windows):
+            chunk = padded[i * hop_size:i * hop_size + AUDIO_N_SAMPLES]
+            windows[i, :chunk.shape[0], 0] = chunk
+
+        raw_output = cls.predict_windows(windows, model=model)
+        return {
+            k: unwrap_output(v, original_length, N_OVERLAPPING_FRAMES) for k, v in raw_output.items()
+        }
+
+    @staticmethod
+    def window_hop_samples() -> int:
+        """Audio samples each new model window adds to the posteriorgram (window length minus overlap)."""
+        from basic_pitch.constants import AUDIO_N_SAMPLES, FFT_HOP
+
+        return AUDIO_N_SAMPLES - N_OVERLAPPING_FRAMES * FFT_HOP
+
+    @classmethod
+    def iter_posteriorgram(
+        cls,
+        chunks: Iterable[np.ndarray],
+        model: Any = None,
+        windows_per_call: int = 1,
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Streaming counterpart of infer_posteriorgram: builds the model windows while the audio arrives.
+
+        Uses the same padding and hop as infer_posteriorgram, so concatenating every yielded
+        block gives the same posteriorgrams. A window runs as soon as its last sample is
+        available; only the unfinished window is kept in memory.
+
+        Args:
+            chunks: 1-D float32 mono arrays at AUDIO_SAMPLE_RATE, of any size, in order
+            model: Optional Model to use instead of the resident one
+            windows_per_call: Windows sent to the model together (1 = lowest latency)
+
+        Yields:
+            Dicts with "note", "onset" (frames, 88) and "contour" (frames, 264) arrays with the
+            frames that follow the previously yielded ones
+        """
+        from basic_pitch.constants import ANNOTATIONS_FPS, AUDIO_N_SAMPLES, FFT_HOP
+
+        overlap_len = N_OVERLAPPING_FRAMES * FFT_HOP
+        hop_size = AUDIO_N_SAMPLES - overlap_len
+        n_olap = N_OVERLAPPING_FRAMES // 2
+
+        def run(window_list: List[np.ndarray]) -> Dict[str, np.ndarray]:
+            windows = np.stack(window_list)[:, :, np.newaxis]
+            raw_output = cls.predict_windows(windows, model=model)
+            # Same trimming as basic_pitch.inference.unwrap_output, window by window
+            return {k: v[:, n_olap:-n_olap, :].reshape(-1, v.shape[2]) for k, v in raw_output.items()}
+
+        def n_output_frames(n_samples: int) -> int:
+            # Frames unwrap_output keeps for an audio of n_samples
+            return int(np.floor(n_samples * (ANNOTATIONS_FPS / AUDIO_SAMPLE_RATE)))
+
+        buffer = np.zeros(overlap_len // 2, dtype=np.float32)
+        original_length = 0
+        emitted = 0
+        pending: List[np.ndarray] = []
+        # Frames already predicted that may still fall beyond the final length of the audio
+        carry: Optional[Dict[str, np.ndarray]] = None
+        for chunk in chunks:
+            original_length += chunk.shape[0]
+            buffer = np.concatenate([buffer, chunk.astype(np.float32, copy=False)])
+            while buffer.shape[0] >= AUDIO_N_SAMPLES:
+                pending.append(buffer[:AUDIO_N_SAMPLES])
+                buffer = buffer[hop_size:]
+            if len(pending) < windows_per_call:
+                continue
+
+            output = run(pending)
+            pending = []
+            if carry is not None:
+                output = {k: np.concatenate([carry[k], v]) for k, v in output.items()}
+            safe = max(0, min(output["note"].shape[0], n_output_frames(original_length) - emitted))
+            carry = {k: v[safe:] for k, v in output.items()}
+            if safe:
+                emitted += safe
+                yield {k: v[:safe] for k, v in output.items()}
+
+        # Last windows, zero padded, exactly as infer_posteriorgram builds them
+        while True:
+            window = np.zeros(AUDIO_N_SAMPLES, dtype=np.float32)
+            window[:buffer.shape[0]] = buffer[:AUDIO_N_SAMPLES]
+            pending.append(window)
+            buffer = buffer[hop_size:]
+            if buffer.shape[0] == 0:
+                break
+
+        output = run(pending)
+        if carry is not None:
+            output = {k: np.concatenate([carry[k], v]) for k, v in output.items()}
+        remaining = max(0, n_output_frames(original_length) - emitted)
+        if remaining:
+            yield {k: v[:remaining] for k, v in output.items()}
+
+    @staticmethod
+    def frame_times(n_frames: int) -> np.ndarray:
+        """Time in seconds of each posteriorgram frame, as basic_pitch computes it."""
+        from basic_pitch import note_creation as infer
+
+        return infer.model_frames_to_time(n_frames)
+
+    @classmethod
+    def infer(
+        cls,
+        audio: np.ndarray,
+        onset_threshold: float = 0.5,
+        frame_threshold: float = 0.3,
+        minimum_note_length: float = 127.70,
+        model: Any = None,
+    ) -> Tuple[Dict[str, np.ndarray], List[NoteEvent]]:
+        """
+        Runs basic_pitch over an in-memory audio buffer.
+
+        Mirrors basic_pitch.inference.predict (same windowing and note tracking) without
+        reading a file and without building the pretty_midi object.
+
+        Args:
+            audio: 1-D float32 mono array at AUDIO_SAMPLE_RATE
+            onset_threshold, frame_threshold, minimum_note_length: Same meaning as in predict
+            model: Optional Model to use instead of the resident one
+
+        Returns:
+            Tuple[model_output, note_events]: Posteriorgrams ("note", "onset", "contour")
+            and the detected notes as (start_s, end_s, pitch_midi, amplitude)
+        """
+        model_output = cls.infer_posteriorgram(audio, model=model)
+        note_events = cls.posteriorgram_to_note_events(
+            model_output, onset_threshold, frame_threshold, minimum_note_length
+        )
+        return model_output, note_events
+
+    @classmethod
+    def posteriorgram_to_note_events(
+        cls,
+        model_output: Dict[str, np.ndarray],
+        onset_threshold: float = 0.5,
+        frame_threshold: float = 0.3,
+        minimum_note_length: float = 127.70,
+        times_s: Optional[np.ndarray] = None,
+    ) -> List[NoteEvent]:
+        """
+        basic_pitch note tracking over posteriorgrams (only "note" and "onset" are used).
+
+        Args:
+            model_output: Posteriorgrams of the whole audio or of a run of consecutive frames
+            onset_threshold, frame_threshold, minimum_note_length: Same meaning as in infer
+            times_s: Time of each frame; by default the frames start at second 0
+
+        Returns:
+            The detected notes as (start_s, end_s, pitch_midi, amplitude)
+        """
+        from basic_pitch.constants import FFT_HOP
+        from basic_pitch import note_creation as infer
+
+        min_note_len = int(np.round(minimum_note_length / 1000 * (AUDIO_SAMPLE_RATE / FFT_HOP)))
+        estimated_notes = infer.output_to_notes_polyphonic(
+            frames=model_output["note"],
+            onsets=model_output["onset"],
+            onset_thresh=onset_threshold,
+            frame_thresh=frame_threshold,
+            infer_onsets=True,
+            min_note_len=min_note_len,
+            min_freq=None,
+            max_freq=None,
+            melodia_trick=True,
+        )
+        if times_s is None:
+            times_s = cls.frame_times(model_output["note"].shape[0])
+        return [
+            (float(times_s[start]), float(times_s[end]), int(pitch_midi), float(amplitude))
+            for start, end, pitch_midi, amplitude in estimated_notes
+        ]
+
+    @classmethod
+    def warmup(cls):
+        """Loads the model and runs one inference over one second of silence."""
+        start_time = time.time()
+        cls.infer(np.zeros(AUDIO_SAMPLE_RATE, dtype=np.float32))
+        logger.info("basic_pitch model warmed up in %.2fs (pid=%s)", time.time() - start_time, os.getpid())
+
     @classmethod
     def is_loaded(cls) -> bool:
         """Check if the model is already loaded."""
         instance = cls()
         return instance._model_loaded
-    
+
     @classmethod
     def reload(cls):
         """Force reload of the model."""
         instance = cls()
+        if instance._backend is not None:
+            MODEL_LOADED.set(0, backend=instance._backend)
         instance._model_loaded = False
         instance._basic_pitch_predict = None
         instance._basic_pitch_model_path = None
-        logger.info("Model cache cleared, will reload on next use")
\ No newline at end of file
+        instance._basic_pitch_model = None
+        instance._backend = None
+        if instance._batcher is not None:
+            instance._batcher.close()
+            instance._batcher = None
+        logger.info("Model cache cleared, will reload on next use")
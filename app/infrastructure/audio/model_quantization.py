@@ -0,0 +1,91 @@
+import hashlib
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+# Quantization modes supported per backend
+QUANTIZATION_MODES = ("none", "dynamic_int8")
+_QUANTIZABLE_BACKENDS = ("tflite", "onnx")
+
+
+def source_fingerprint(source_path: str) -> str:
+    """
+    Short hash of the source model's path, sizes and modification times. A new MODEL_PATH
+    or an upgraded basic_pitch gets its own quantized file instead of a stale one.
+    """
+    source_path = os.path.abspath(source_path)
+    entries = [source_path]
+    if os.path.isdir(source_path):
+        # TF SavedModel: saved_model.pb plus the variables directory
+        paths = sorted(
+            os.path.join(root, name) for root, _, names in os.walk(source_path) for name in names
+        )
+    else:
+        paths = [source_path]
+    for path in paths:
+        stat = os.stat(path)
+        entries.append(f"{os.path.relpath(path, source_path)}:{stat.st_size}:{stat.st_mtime_ns}")
+    return hashlib.sha1("\n".join(entries).encode()).hexdigest()[:12]
+
+
+def quantized_model_filename(backend: str, mode: str, source_path: str) -> str:
+    suffix = "tflite" if backend == "tflite" else "onnx"
+    return f"basic_pitch_icassp_2022_{mode}_{source_fingerprint(source_path)}.{suffix}"
+
+
+def _quantize_tflite(saved_model_path: str, output_path: str):
+    """Dynamic-range int8 quantization of the TF SavedModel into a TFLite flatbuffer."""
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_saved_model(saved_model_path)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    with open(output_path, "wb") as f:
+        f.write(converter.convert())
+
+
+def _quantize_onnx(onnx_path: str, output_path: str):
+    """Dynamic int8 quantization of the ONNX model weights."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(model_input=onnx_path, model_output=output_path, weight_type=QuantType.QInt8)
+
+
+def build_quantized_model(backend: str, source_path: str, mode: str, output_dir: str) -> str:
+    """
+    Returns the path of the quantized model, building it on first use. The file name carries
+    the source fingerprint, so a different source model is quantized again.
+
+    Args:
+        backend: tflite (quantized from the TF SavedModel at source_path) or onnx (from the .onnx at source_path)
+        source_path: Full-precision model to quantize
+        mode: One of QUANTIZATION_MODES other than "none"
+        output_dir: Directory where quantized models are kept between runs
+    """
+    if mode not in QUANTIZATION_MODES or mode == "none":
+        raise ValueError(f"Unknown quantization mode: {mode}. Expected one of {QUANTIZATION_MODES[1:]}")
+    if backend not in _QUANTIZABLE_BACKENDS:
+        raise ValueError(f"Quantization is only available for the {_QUANTIZABLE_BACKENDS} backends, not {backend}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, quantized_model_filename(backend, mode, source_path))
+    if os.path.exists(output_path):
+        return output_path
+
+    logger.info("Building %s quantized %s model from %s", mode, backend, source_path)
+    # Build under a temp name and rename, so concurrent workers never load a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=output_dir, suffix=os.path.splitext(output_path)[1])
+    os.close(fd)
+    try:
+        if backend == "tflite":
+            _quantize_tflite(source_path, tmp_path)
+        else:
+            _quantize_onnx(source_path, tmp_path)
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    logger.info("Quantized model written to %s", output_path)
+    return output_path
@@ -0,0 +1,74 @@
+from dataclasses import dataclass, replace
+from app.core.config import settings
+from app.shared.utils import available_cores
+
+
+@dataclass(frozen=True)
+class ThreadLayout:
+    """How the available cores are split between concurrent jobs, segments and model ops."""
+
+    cores: int
+    concurrent_jobs: int
+    jobs_per_process: int
+    segment_workers: int
+    intra_op_threads: int
+    inter_op_threads: int
+    inference_batching: bool = False
+
+    @property
+    def model_callers(self) -> int:
+        """Threads calling the model at the same time in this worker."""
+        if self.inference_batching:
+            # One InferenceBatcher thread per process runs every window of its jobs
+            return self.concurrent_jobs // self.jobs_per_process
+        return self.concurrent_jobs * self.segment_workers
+
+    @property
+    def runnable_threads(self) -> int:
+        """Threads that may be running model ops at the same time in this worker."""
+        return self.model_callers * self.intra_op_threads
+
+    @property
+    def segment_pool_size(self) -> int:
+        """Size of the per-process segment pool, shared by the jobs running in that process."""
+        return self.jobs_per_process * self.segment_workers
+
+    def describe(self) -> str:
+        return (
+            f"cores={self.cores}, concurrent_jobs={self.concurrent_jobs}, "
+            f"segment_workers/job={self.segment_workers}, intra_op_threads={self.intra_op_threads}, "
+            f"inter_op_threads={self.inter_op_threads}, inference_batching={self.inference_batching}, "
+            f"runnable_threads={self.runnable_threads}"
+        )
+
+
+def compute_thread_layout() -> ThreadLayout:
+    """
+    Derives the thread counts from the job concurrency and segment settings so that
+    concurrent_jobs * segment_workers * intra_op_threads matches the available cores.
+    With INFERENCE_BATCHING only the batcher thread of each process calls the model, so
+    its ops get the cores of that process instead.
+    Explicit ANALYSIS_SEGMENT_WORKERS / MODEL_*_OP_THREADS values take precedence.
+    """
+    # Supervisor workers are separate processes splitting the same cores
+    cores = max(1, available_cores() // max(1, settings.WORKERS))
+    # Analyses running at once: bounded by the consumer semaphore and by the executor size
+    jobs = max(1, min(settings.MAX_CONCURRENT_VIDEOS, settings.ANALYSIS_WORKERS))
+    # Process workers run one job each; the thread executor runs all of them in this process
+    jobs_per_process = jobs if settings.ANALYSIS_EXECUTOR == "thread" else 1
+
+    segment_workers = settings.ANALYSIS_SEGMENT_WORKERS or max(1, cores // jobs)
+    if settings.ANALYSIS_SEGMENTS > 0:
+        segment_workers = min(segment_workers, settings.ANALYSIS_SEGMENTS)
+
+    layout = ThreadLayout(
+        cores=cores,
+        concurrent_jobs=jobs,
+        jobs_per_process=jobs_per_process,
+        segment_workers=segment_workers,
+        intra_op_threads=1,
+        inter_op_threads=settings.MODEL_INTER_OP_THREADS or 1,
+        inference_batching=settings.INFERENCE_BATCHING,
+    )
+    intra_op = settings.MODEL_INTRA_OP_THREADS or max(1, cores // layout.model_callers)
+    return replace(layout, intra_op_threads=intra_op)
@@ -34,6 +34,10 @@ note_solfege_dict = {
     "Faltó": "Faltó"
 }
 
+PITCH_CLASS_NAMES = ("C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B")
+# Nombre sin octava de cada numero MIDI (0-127), mismo formato que el analizador compara con la escala
+MIDI_NOTE_NAMES = tuple(PITCH_CLASS_NAMES[p % 12] for p in range(128))
+
 def get_correct_notes(scale_name, type_scale, octaves):
     
     if type_scale == "Mayor":
@@ -0,0 +1,5 @@
+-- Secondary index declared on MusicalErrorModel (ix_musical_error_practice).
+-- Lookups, keyset pagination and replacement of the errors of a practice filter by id_practice;
+-- the unique key uq_musical_error is led by min_sec and cannot serve them.
+-- Run once with a user that has the INDEX privilege; the service then only checks it exists.
+CREATE INDEX ix_musical_error_practice ON MusicalError (id_practice, id);
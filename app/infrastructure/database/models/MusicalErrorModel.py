@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, UniqueConstraint
+from sqlalchemy import Column, Index, Integer, String, UniqueConstraint
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
@@ -17,4 +17,6 @@ class MusicalErrorModel(Base):
             "min_sec", "note_played", "note_correct", "id_practice",
             name="uq_musical_error"
         ),
-    )
\ No newline at end of file
+        # Lookups, pagination and replacement by practice (the unique key is led by min_sec)
+        Index("ix_musical_error_practice", "id_practice", "id"),
+    )
@@ -1,13 +1,26 @@
 import asyncio
-import json
 import logging
-from aiokafka import AIOKafkaConsumer
+import time
+from dataclasses import fields
+from typing import Dict, List, Optional, Sequence, Tuple
+import orjson
+from aiokafka import AIOKafkaConsumer, ConsumerRebalanceListener, TopicPartition
+from aiokafka.errors import KafkaError
 from app.core.config import settings
+from app.core.exceptions import MessageDeliveryException
 from app.application.use_cases.process_and_store_error import ProcessAndStoreErrorUseCase
 from app.domain.services.musical_error_service import MusicalErrorService
 from app.domain.services.metadata_practice_service import MetadataPracticeService
+from app.domain.repositories.i_metadata_repo import IMetadataRepo
 from app.infrastructure.kafka.kafka_message import KafkaMessage
 from app.infrastructure.kafka.kafka_producer import KafkaProducer
+from app.infrastructure.kafka.offset_tracker import OffsetTracker
+from app.infrastructure.monitoring.metrics import (
+    JOBS_IN_FLIGHT,
+    KAFKA_MESSAGES,
+    SEMAPHORE_WAIT_SECONDS,
+    time_stage,
+)
 from app.infrastructure.repositories.local_video_repo import LocalVideoRepository
 from app.infrastructure.repositories.mysql_musical_error_repo import MySQLMusicalErrorRepository
 from app.infrastructure.repositories.mongo_metadata_repo import MongoMetadataRepo
@@ -15,83 +28,258 @@ from app.application.dto.practice_data_dto import PracticeDataDTO
 
 logger = logging.getLogger(__name__)
 
-MAX_CONCURRENT_VIDEOS = 3
-semaphore = asyncio.Semaphore(MAX_CONCURRENT_VIDEOS)
+# Fields every input message must carry ("message" is not used by this service)
+_REQUIRED_FIELDS = frozenset(f.name for f in fields(KafkaMessage)) - {"message"}
 
-async def start_kafka_consumer(kafka_producer: KafkaProducer):
-    # Initialize dependencies
-    mysql_repo = MySQLMusicalErrorRepository()
-    mongo_repo = MongoMetadataRepo()
-    video_repo = LocalVideoRepository()
 
-    music_service = MusicalErrorService(mysql_repo, video_repo)
-    mongo_service = MetadataPracticeService(mongo_repo)
+def decode_practice_batch(records: Sequence) -> Tuple[List[Tuple[int, PracticeDataDTO]], List[int]]:
+    """
+    Decodes a batch of records into PracticeDataDTOs.
 
-    use_case = ProcessAndStoreErrorUseCase(
-        music_service=music_service,
-        mongo_service=mongo_service,
-        kafka_producer=kafka_producer,
-    )
+    Returns the (offset, dto) of the valid records and the offsets of the rejected ones
+    (invalid JSON, not an object, or missing fields). Rejections are only counted, the
+    caller logs one summary line per batch. The optional "force_reprocess" flag bypasses
+    the already-processed check of the use case, and "profile" profiles the analysis.
+    """
+    accepted: List[Tuple[int, PracticeDataDTO]] = []
+    rejected: List[int] = []
+    for record in records:
+        try:
+            data = orjson.loads(record.value)
+        except (orjson.JSONDecodeError, TypeError):  # TypeError: tombstone (None value)
+            rejected.append(record.offset)
+            continue
+        if not isinstance(data, dict) or not _REQUIRED_FIELDS <= data.keys():
+            rejected.append(record.offset)
+            continue
 
-    consumer = AIOKafkaConsumer(
-        settings.KAFKA_INPUT_TOPIC,
-        bootstrap_servers=settings.KAFKA_BROKER,
-        enable_auto_commit=False,
-        auto_offset_reset=settings.KAFKA_AUTO_OFFSET_RESET,
-        group_id=settings.KAFKA_GROUP_ID,
-    )
+        accepted.append((record.offset, PracticeDataDTO(
+            uid=data["uid"],
+            practice_id=data["practice_id"],
+            date=data["date"],
+            time=data["time"],
+            scale=data["scale"],
+            scale_type=data["scale_type"],
+            num_postural_errors=0,  # Placeholder
+            num_musical_errors=0,   # Placeholder
+            duration=data["duration"],
+            bpm=data["bpm"],
+            figure=data["figure"],
+            octaves=data["octaves"],
+            force_reprocess=data.get("force_reprocess") is True,
+            profile=data.get("profile") is True,
+        )))
+    return accepted, rejected
 
+
+class _CommitOnRevoke(ConsumerRebalanceListener):
+    """
+    Commits the finished work of revoked partitions and forgets their in-flight offsets.
+    Newly assigned partitions are handed to `on_assigned` (pauses them while fetch is paused).
+    """
+
+    def __init__(self, tracker: OffsetTracker, commit, on_assigned=None):
+        self.tracker = tracker
+        self.commit = commit
+        self.on_assigned = on_assigned
+
+    async def on_partitions_revoked(self, revoked):
+        await self.commit(revoked)
+        self.tracker.forget(revoked)
+
+    async def on_partitions_assigned(self, assigned):
+        if self.on_assigned is not None:
+            self.on_assigned(assigned)
+
+
+async def start_kafka_consumer(
+    kafka_producer: KafkaProducer,
+    metadata_repo: Optional[IMetadataRepo] = None,
+    use_case: Optional[ProcessAndStoreErrorUseCase] = None,
+    consumer: Optional[AIOKafkaConsumer] = None,
+):
+    """
+    Consumes practices until cancelled. The use case and the consumer are built from the
+    settings unless given (benchmarks.throughput_harness passes in-memory stand-ins).
+
+    Raises MessageDeliveryException when an output message could not be delivered even after
+    its retries: the worker exits and its restart resumes from the last committed offset.
+    """
+    if use_case is None:
+        # Initialize dependencies
+        mysql_repo = MySQLMusicalErrorRepository()
+        mongo_repo = metadata_repo or MongoMetadataRepo()
+        video_repo = LocalVideoRepository()
+
+        music_service = MusicalErrorService(mysql_repo, video_repo)
+        mongo_service = MetadataPracticeService(mongo_repo)
+
+        use_case = ProcessAndStoreErrorUseCase(
+            music_service=music_service,
+            mongo_service=mongo_service,
+            kafka_producer=kafka_producer,
+        )
+
+    if consumer is None:
+        consumer = AIOKafkaConsumer(
+            bootstrap_servers=settings.KAFKA_BROKER,
+            enable_auto_commit=False,
+            auto_offset_reset=settings.KAFKA_AUTO_OFFSET_RESET,
+            group_id=settings.KAFKA_GROUP_ID,
+        )
+
+    semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_VIDEOS)  # Limit concurrent executions
+    max_in_flight = max(1, settings.KAFKA_MAX_IN_FLIGHT)
+    tracker = OffsetTracker()
+    commit_lock = asyncio.Lock()
+    tasks = set()
+    paused = False
+    delivery_failure: Optional[MessageDeliveryException] = None
+
+    async def commit_completed(partitions=None):
+        """Commits, per partition, up to the highest contiguous finished offset."""
+        async with commit_lock:
+            offsets: Dict[TopicPartition, int] = tracker.committable(partitions)
+            if not offsets:
+                return
+            try:
+                await consumer.commit(offsets)
+                tracker.mark_committed(offsets)
+            except KafkaError as e:
+                logger.warning(f"Offset commit failed, will retry on next completion: {e}")
+
+    def apply_backpressure():
+        nonlocal paused
+        in_flight = tracker.in_flight
+        JOBS_IN_FLIGHT.set(in_flight)
+        if not paused and in_flight >= max_in_flight:
+            consumer.pause(*consumer.assignment())
+            paused = True
+            logger.info(f"Pausing fetch: {in_flight} messages in flight (limit {max_in_flight})")
+        elif paused and in_flight < max_in_flight:
+            consumer.resume(*consumer.assignment())
+            paused = False
+            logger.info(f"Resuming fetch: {in_flight} messages in flight")
+
+    async def await_delivery(dto: PracticeDataDTO, delivery: asyncio.Future) -> bool:
+        """
+        Waits for the output message of a processed practice. A failed delivery is republished up to
+        KAFKA_DELIVERY_RETRIES times with exponential backoff; False when it never got through.
+        """
+        retries = max(0, settings.KAFKA_DELIVERY_RETRIES)
+        for attempt in range(retries + 1):
+            if attempt:
+                await asyncio.sleep(settings.KAFKA_DELIVERY_RETRY_BACKOFF_S * 2 ** (attempt - 1))
+                delivery = await use_case.republish(dto)
+            try:
+                with time_stage("kafka_delivery"):
+                    await delivery
+                return True
+            except Exception as e:
+                logger.warning(
+                    f"Output message of practice {dto.practice_id} not delivered "
+                    f"(attempt {attempt + 1}/{retries + 1}): {e}"
+                )
+        return False
+
+    def pause_assigned(assigned):
+        # Partitions assigned while fetch is paused would otherwise be fetched past the in-flight limit
+        if paused and assigned:
+            consumer.pause(*assigned)
+            logger.info(f"Pausing {len(assigned)} newly assigned partitions: fetch is paused")
+
+    async def process_message(dto: PracticeDataDTO, tp: TopicPartition, offset: int):
+        nonlocal delivery_failure
+        delivered = True
+        try:
+            with time_stage("job"):
+                wait_start = time.perf_counter()
+                async with semaphore:
+                    SEMAPHORE_WAIT_SECONDS.observe(time.perf_counter() - wait_start)
+                    # Execute use case; the output message is only enqueued
+                    errors, delivery = await use_case.process(dto)
+                # Delivery is awaited outside the semaphore so the next practice can start meanwhile,
+                # but the offset is only completed once the broker confirmed the output message
+                if delivery is not None:
+                    delivered = await await_delivery(dto, delivery)
+            logger.info(f"Processed KafkaMessage with {len(errors)} errors")
+        except asyncio.CancelledError:
+            # Shutdown cut the practice short: its offset stays pending so the message is redelivered
+            logger.warning(
+                f"Processing of practice {dto.practice_id} cancelled; "
+                f"offset {offset} of {tp.topic}[{tp.partition}] left uncommitted"
+            )
+            raise
+        except Exception as e:
+            logger.error(f"Error processing message: {e}", exc_info=True)
+
+        if delivered:
+            # Failed analyses are not retried, so they also let the commit position advance
+            tracker.complete(tp, offset)
+        else:
+            # The practice is already audio_done in Mongo: the offset stays pending so the commit of this
+            # partition stops here, and the consumer stops so the restarted worker gets the message
+            # redelivered (and only republishes it) instead of pausing on the pending offsets
+            logger.error(
+                f"Giving up on the output message of practice {dto.practice_id}; "
+                f"offset {offset} of {tp.topic}[{tp.partition}] left uncommitted"
+            )
+            if delivery_failure is None:
+                delivery_failure = MessageDeliveryException(
+                    f"Output message of practice {dto.practice_id} not delivered "
+                    f"({tp.topic}[{tp.partition}] offset {offset})"
+                )
+        apply_backpressure()
+        await commit_completed()
+
+    consumer.subscribe([settings.KAFKA_INPUT_TOPIC], listener=_CommitOnRevoke(tracker, commit_completed, pause_assigned))
     await consumer.start()
-    tasks = []
     try:
         logger.info("Kafka consumer started")
 
-        async def process_message(dto: PracticeDataDTO):
-            async with semaphore:  # Limit concurrent executions
-                try:
-                    # Execute use case
-                    errors = await use_case.execute(dto)  
-                    logger.info(f"Processed KafkaMessage with {len(errors)} errors")
-                    await consumer.commit()
-                except Exception as e:
-                    logger.error(f"Error processing message: {e}", exc_info=True)
-
-        async for msg in consumer:
-            try:
-                decoded = msg.value.decode()
-                logger.info(f"Received raw message: {decoded}")
-
-                # JSON → KafkaMessage
-                data = json.loads(decoded)
-                kafka_msg = KafkaMessage(**data)
-
-                dto = PracticeDataDTO(
-                    uid=kafka_msg.uid,
-                    practice_id=kafka_msg.practice_id,
-                    date=kafka_msg.date,
-                    time=kafka_msg.time,
-                    scale=kafka_msg.scale,
-                    scale_type=kafka_msg.scale_type,
-                    num_postural_errors=0,  # Placeholder
-                    num_musical_errors=0,   # Placeholder
-                    duration=kafka_msg.duration,
-                    bpm=kafka_msg.bpm,
-                    figure=kafka_msg.figure,
-                    octaves=kafka_msg.octaves,
-                )
+        while True:
+            if delivery_failure is not None:
+                raise delivery_failure
 
-                # Schedule background task with concurrency control
-                task = asyncio.create_task(process_message(dto))
-                tasks.append(task)
+            # Never fetch more than the free in-flight slots
+            free_slots = max(1, max_in_flight - tracker.in_flight)
+            batches = await consumer.getmany(
+                timeout_ms=settings.KAFKA_POLL_TIMEOUT_MS,
+                max_records=min(settings.KAFKA_MAX_POLL_RECORDS, free_slots),
+            )
 
-            except Exception as e:
-                logger.error(f"Error decoding or scheduling message: {e}", exc_info=True)
+            for tp, records in batches.items():
+                for record in records:
+                    tracker.track(tp, record.offset)
 
-    finally:
-        await consumer.stop()
-        logger.info("Kafka consumer stopped")
+                with time_stage("kafka_intake"):
+                    accepted, rejected = decode_practice_batch(records)
+                KAFKA_MESSAGES.inc(len(accepted), outcome="accepted")
+                KAFKA_MESSAGES.inc(len(rejected), outcome="rejected")
+                for offset in rejected:
+                    tracker.complete(tp, offset)
+                if rejected:
+                    logger.warning(
+                        f"Rejected {len(rejected)}/{len(records)} malformed messages from {tp.topic}[{tp.partition}]"
+                    )
+
+                for offset, dto in accepted:
+                    # Schedule background task with concurrency control; finished tasks drop themselves
+                    task = asyncio.create_task(process_message(dto, tp, offset))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+
+            if batches:
+                logger.debug(f"Fetched {sum(len(r) for r in batches.values())} messages, {tracker.in_flight} in flight")
+                apply_backpressure()
+                await commit_completed()
 
+    finally:
         if tasks:
             logger.info("Waiting for all background tasks to finish...")
-            await asyncio.gather(*tasks)
-            logger.info("All background tasks finished.")
\ No newline at end of file
+            await asyncio.gather(*tasks, return_exceptions=True)
+            logger.info("All background tasks finished.")
+
+        await commit_completed()
+        await consumer.stop()
+        logger.info("Kafka consumer stopped")
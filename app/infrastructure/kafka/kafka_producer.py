@@ -1,16 +1,29 @@
-import json
+import asyncio
 import logging
+from typing import List, Optional, Sequence, Set
+import orjson
 from aiokafka import AIOKafkaProducer
 from app.infrastructure.kafka.kafka_message import KafkaMessage
 
 logger = logging.getLogger(__name__)
 
 class KafkaProducer:
-    def __init__(self, bootstrap_servers: str):
+    def __init__(
+        self,
+        bootstrap_servers: str,
+        linger_ms: int = 0,
+        max_batch_size: int = 16384,
+        compression_type: Optional[str] = None,
+    ):
         self._producer = AIOKafkaProducer(
             bootstrap_servers=bootstrap_servers,
-            value_serializer=lambda v: json.dumps(v).encode("utf-8"),
+            # orjson serializes dataclasses natively, no intermediate dict
+            value_serializer=orjson.dumps,
+            linger_ms=linger_ms,
+            max_batch_size=max_batch_size,
+            compression_type=compression_type or None,
         )
+        self._pending: Set[asyncio.Future] = set()
 
     async def start(self):
         logger.info("Starting Kafka Producer...")
@@ -19,16 +32,55 @@ class KafkaProducer:
 
     async def stop(self):
         logger.info("Stopping Kafka Producer...")
+        await self.flush()
         await self._producer.stop()
 
-    async def publish_message(self, topic: str, message: KafkaMessage):
+    async def flush(self):
+        """Sends every buffered message and waits until all tracked deliveries are confirmed."""
+        await self._producer.flush()
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+    def _track(self, topic: str, delivery: asyncio.Future) -> asyncio.Future:
+        def on_done(fut: asyncio.Future):
+            self._pending.discard(fut)
+            if not fut.cancelled() and fut.exception() is not None:
+                logger.error("Failed to deliver Kafka message to %s", topic, exc_info=fut.exception())
+
+        self._pending.add(delivery)
+        delivery.add_done_callback(on_done)
+        return delivery
+
+    async def publish_message(self, topic: str, message: KafkaMessage, wait: bool = True) -> Optional[asyncio.Future]:
         """
-        Publica un KafkaMessage en un topic
+        Publishes a KafkaMessage. With wait=True it waits for the broker acknowledgement;
+        with wait=False it only enqueues the message in the producer batch and returns the
+        delivery future, which is also tracked in the background.
         """
         try:
-            payload = message.__dict__  # dataclass → dict
-            await self._producer.send_and_wait(topic, payload)
-            logger.info("Message published to %s: %s", topic, payload)
+            if wait:
+                await self._producer.send_and_wait(topic, message)
+                logger.info("Message published to %s: %s", topic, message)
+                return None
+
+            delivery = self._track(topic, await self._producer.send(topic, message))
+            logger.debug("Message queued for %s: %s", topic, message)
+            return delivery
         except Exception:
             logger.error("Failed to publish Kafka message", exc_info=True)
             raise
+
+    async def publish_many(self, topic: str, messages: Sequence[KafkaMessage], wait: bool = True) -> List[asyncio.Future]:
+        """
+        Enqueues several messages at once so they share producer batches.
+        With wait=True it returns once every delivery is confirmed.
+        """
+        try:
+            deliveries = [self._track(topic, await self._producer.send(topic, message)) for message in messages]
+            if wait:
+                await asyncio.gather(*deliveries)
+                logger.info("Published %d messages to %s", len(deliveries), topic)
+            return deliveries
+        except Exception:
+            logger.error("Failed to publish Kafka messages", exc_info=True)
+            raise
@@ -0,0 +1,63 @@
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional, Set
+from aiokafka import TopicPartition
+
+
+class _PartitionOffsets:
+    def __init__(self):
+        self.pending: Deque[int] = deque()  # offsets in fetch order
+        self.done: Set[int] = set()
+        self.next_commit: Optional[int] = None
+        self.committed: Optional[int] = None
+
+
+class OffsetTracker:
+    """
+    Tracks the in-flight offsets of every partition so commits only advance to the
+    highest contiguous completed offset: a crash never skips a message that was
+    fetched but not finished.
+    """
+
+    def __init__(self):
+        self._partitions: Dict[TopicPartition, _PartitionOffsets] = {}
+
+    def track(self, tp: TopicPartition, offset: int):
+        """Registers a fetched offset; offsets of a partition are fetched in increasing order."""
+        self._partitions.setdefault(tp, _PartitionOffsets()).pending.append(offset)
+
+    def complete(self, tp: TopicPartition, offset: int):
+        """Marks an offset as finished (successfully or not) and advances the commit position."""
+        state = self._partitions.get(tp)
+        if state is None:
+            # Partition revoked while the message was in flight
+            return
+        state.done.add(offset)
+        while state.pending and state.pending[0] in state.done:
+            finished = state.pending.popleft()
+            state.done.discard(finished)
+            state.next_commit = finished + 1
+
+    def committable(self, partitions: Optional[Iterable[TopicPartition]] = None) -> Dict[TopicPartition, int]:
+        """Commit positions that advanced since the last commit, optionally only for some partitions."""
+        tps = self._partitions.keys() if partitions is None else partitions
+        offsets = {}
+        for tp in tps:
+            state = self._partitions.get(tp)
+            if state and state.next_commit is not None and state.next_commit != state.committed:
+                offsets[tp] = state.next_commit
+        return offsets
+
+    def mark_committed(self, offsets: Dict[TopicPartition, int]):
+        for tp, offset in offsets.items():
+            state = self._partitions.get(tp)
+            if state is not None:
+                state.committed = offset
+
+    def forget(self, partitions: Iterable[TopicPartition]):
+        """Drops the state of partitions that are no longer assigned to this consumer."""
+        for tp in partitions:
+            self._partitions.pop(tp, None)
+
+    @property
+    def in_flight(self) -> int:
+        return sum(len(state.pending) for state in self._partitions.values())
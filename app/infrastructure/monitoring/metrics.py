@@ -0,0 +1,262 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; covers from sub-millisecond DB writes to multi-second inferences
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+    def collect_delta(self):
+        with self._lock:
+            values, self._values = self._values, {}
+        return values
+
+    def merge(self, delta):
+        with self._lock:
+            for key, value in delta.items():
+                self._values[key] = self._values.get(key, 0.0) + value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+    def collect_delta(self):
+        # Gauges are states, not increments: the current values are sent and overwrite the parent's
+        with self._lock:
+            return dict(self._values)
+
+    def merge(self, delta):
+        with self._lock:
+            self._values.update(delta)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (+Inf last, not cumulative), sum]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        lines = self.header()
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = ("le", _format_value(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+    def collect_delta(self):
+        with self._lock:
+            values, self._values = self._values, {}
+        return values
+
+    def merge(self, delta):
+        with self._lock:
+            for key, (counts, total) in delta.items():
+                state = self._values.get(key)
+                if state is None:
+                    self._values[key] = [list(counts), total]
+                    continue
+                state[0] = [a + b for a, b in zip(state[0], counts)]
+                state[1] += total
+
+
+class MetricsRegistry:
+    """
+    Process-wide set of metrics rendered in the Prometheus text format.
+
+    Analysis process workers record into their own registry and send collect_delta()
+    back with every result; the service process merges it, so /metrics covers them too.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labelnames, buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def collect_delta(self) -> dict:
+        """Picklable changes since the last call: counter/histogram increments and gauge values."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.collect_delta() for metric in metrics}
+
+    def merge(self, delta: dict):
+        """Adds a delta produced by collect_delta() in another process; unknown metrics are ignored."""
+        for name, values in delta.items():
+            metric = self._metrics.get(name)
+            if metric is not None and values:
+                metric.merge(values)
+
+
+registry = MetricsRegistry()
+
+# ---- Pipeline metrics ----
+STAGE_SECONDS = registry.histogram(
+    "audio_pipeline_stage_seconds", "Duration of each pipeline stage", ("stage",)
+)
+STAGE_TOTAL = registry.counter(
+    "audio_pipeline_stage_total", "Executions of each pipeline stage by outcome", ("stage", "outcome")
+)
+KAFKA_MESSAGES = registry.counter(
+    "audio_kafka_messages_total", "Input messages by intake outcome", ("outcome",)
+)
+JOBS_IN_FLIGHT = registry.gauge(
+    "audio_jobs_in_flight", "Fetched messages not finished yet"
+)
+SEMAPHORE_WAIT_SECONDS = registry.histogram(
+    "audio_semaphore_wait_seconds", "Time a job waited for a MAX_CONCURRENT_VIDEOS slot"
+)
+ANALYSIS_POOL_BREAKS = registry.counter(
+    "audio_analysis_pool_breaks_total", "Analysis jobs that saw their process pool break, by outcome", ("outcome",)
+)
+MODEL_LOADED = registry.gauge(
+    "audio_model_loaded", "1 when the basic_pitch model is loaded in the process", ("backend",)
+)
+MODEL_LOAD_SECONDS = registry.histogram(
+    "audio_model_load_seconds", "Time to load the basic_pitch model"
+)
+
+
+def record_stage(stage: str, seconds: float, outcome: str = "ok"):
+    """Records one execution of a pipeline stage timed by the caller."""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    STAGE_TOTAL.inc(stage=stage, outcome=outcome)
+
+
+@contextmanager
+def time_stage(stage: str) -> Iterator[None]:
+    """Records the duration and outcome (ok/error) of a pipeline stage."""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        record_stage(stage, time.perf_counter() - start, outcome)
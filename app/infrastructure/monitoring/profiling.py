@@ -0,0 +1,141 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILING_MODES = ("sampling", "cprofile")
+
+
+def should_profile(requested: bool = False) -> bool:
+    """True when the job asked for it or falls in the PROFILING_SAMPLE_RATE fraction of jobs."""
+    return requested or (settings.PROFILING_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_SAMPLE_RATE)
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Sampling profiler: a daemon thread reads the stacks of every other thread of the process
+    each `interval` seconds and counts them as collapsed stacks ("root;...;leaf count").
+
+    Unlike cProfile it also sees the segment threads of the job. In a process worker all the
+    threads belong to the job; with the thread executor, concurrent jobs share the samples.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self, top_n: int) -> str:
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for name in set(frames):
+                total[name] += count
+        n = max(1, sum(self.stacks.values()))
+        lines = [f"{self.samples} samples every {self.interval * 1000:.1f} ms, {n} thread stacks", ""]
+        lines.append(f"{'self %':>8} {'total %':>8}  function")
+        for name, count in own.most_common(top_n):
+            lines.append(f"{100 * count / n:8.1f} {100 * total[name] / n:8.1f}  {name}")
+        lines.append("")
+        lines.append(f"{'total %':>8}  function (inclusive)")
+        for name, count in total.most_common(top_n):
+            lines.append(f"{100 * count / n:8.1f}  {name}")
+        return "\n".join(lines) + "\n"
+
+
+def _write(path: str, content: str):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+@contextmanager
+def profile_job(job_name: str, mode: Optional[str] = None) -> Iterator[None]:
+    """
+    Profiles the enclosed block and writes to PROFILING_DIR:
+
+    - sampling: <job>.collapsed (flamegraph.pl / speedscope input) and <job>.txt
+    - cprofile: <job>.pstats (python -m pstats / snakeviz) and <job>.txt
+
+    The .txt is a summary of the PROFILING_TOP_N most expensive functions.
+    """
+    mode = mode or settings.PROFILING_MODE
+    if mode not in PROFILING_MODES:
+        raise ValueError(f"Unknown profiling mode: {mode}. Expected one of {PROFILING_MODES}")
+
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    base = os.path.join(settings.PROFILING_DIR, f"{job_name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+    top_n = settings.PROFILING_TOP_N
+    start = time.perf_counter()
+
+    if mode == "cprofile":
+        # Only sees the calling thread (segments run in the segment pool threads)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(base + ".pstats")
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top_n)
+            _write(base + ".txt", out.getvalue())
+    else:
+        sampler = StackSampler(settings.PROFILING_INTERVAL_MS / 1000.0)
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            _write(base + ".collapsed", sampler.collapsed())
+            _write(base + ".txt", sampler.summary(top_n))
+
+    logger.info("Profiled %s (%s) in %.2fs: %s.*", job_name, mode, time.perf_counter() - start, base)
+
+
+def run_profiled(job_name: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Runs fn(*args, **kwargs) inside profile_job; picklable, so it can be sent to the analysis executor."""
+    with profile_job(job_name):
+        return fn(*args, **kwargs)
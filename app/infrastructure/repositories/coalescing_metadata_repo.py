@@ -0,0 +1,79 @@
+import asyncio
+import logging
+from typing import List, Optional, Sequence, Tuple
+from app.domain.repositories.i_metadata_repo import IMetadataRepo
+
+logger = logging.getLogger(__name__)
+
+
+class CoalescingMetadataRepo(IMetadataRepo):
+    """
+    Write coalescer in front of an IMetadataRepo.
+
+    audio_done updates are buffered for up to `window_ms` or `max_items` updates and then
+    flushed as one mark_practices_audio_done call (a single bulk_write in Mongo). Every
+    caller awaits its own result; if the flush fails, all its callers get the exception.
+    """
+
+    def __init__(self, repo: IMetadataRepo, window_ms: float = 20.0, max_items: int = 100):
+        self.repo = repo
+        self.window = window_ms / 1000.0
+        self.max_items = max(1, max_items)
+        self._pending: List[Tuple[Tuple[str, int], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes = set()
+        self._closed = False
+
+    async def mark_practice_audio_done(self, uid: str, id_practice: int) -> bool:
+        if self._closed:
+            return await self.repo.mark_practice_audio_done(uid, id_practice)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(((uid, id_practice), future))
+        if len(self._pending) >= self.max_items:
+            self._schedule_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._schedule_flush)
+        return await future
+
+    async def mark_practices_audio_done(self, items: Sequence[Tuple[str, int]]) -> List[bool]:
+        return await self.repo.mark_practices_audio_done(items)
+
+    async def is_practice_audio_done(self, uid: str, id_practice: int) -> bool:
+        return await self.repo.is_practice_audio_done(uid, id_practice)
+
+    def _schedule_flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._flush_batch(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush_batch(self, batch: List[Tuple[Tuple[str, int], asyncio.Future]]):
+        try:
+            results = await self.repo.mark_practices_audio_done([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        logger.debug("Flushed %d coalesced audio_done updates", len(batch))
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def flush(self):
+        """Writes the buffered updates now and waits for every in-progress flush."""
+        self._schedule_flush()
+        if self._flushes:
+            await asyncio.gather(*list(self._flushes), return_exceptions=True)
+
+    async def close(self):
+        """Flush-on-shutdown hook: later updates go straight to the wrapped repository."""
+        self._closed = True
+        await self.flush()
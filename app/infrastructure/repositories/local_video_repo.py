@@ -1,15 +1,37 @@
 import logging
 import os
+from typing import Sequence
+from app.core.config import settings
 from app.domain.repositories.i_videos_repo import IVideoRepo
 
 logger = logging.getLogger(__name__)
 
+# Folders of a user where the files of a practice can be found, in order of preference
+AUDIO_DIR = "audios"
+VIDEO_DIR = "videos"
+
 class LocalVideoRepository(IVideoRepo):
     """Concrete implementation of IVideoRepo using local filesystem."""
     
-    def __init__(self, base_dir: str | None = None):
+    def __init__(self, base_dir: str | None = None, audio_extensions: Sequence[str] | None = None):
         self.base_dir = base_dir or os.getenv("CONTAINER_VIDEO_PATH", "/app/storage")
+        if audio_extensions is None:
+            audio_extensions = settings.AUDIO_ARTIFACT_EXTENSIONS.split(",")
+        self.audio_extensions = [ext.strip().lstrip(".").lower() for ext in audio_extensions if ext.strip()]
+
+    def _audio_artifact(self, uid: str, practice_id: str) -> str | None:
+        """Path of an audio-only file of the practice (in audios/ or next to the mp4), if there is one."""
+        for ext in self.audio_extensions:
+            for folder in (AUDIO_DIR, VIDEO_DIR):
+                path = self.base_dir + f"/{uid}/{folder}/practice_{practice_id}.{ext}"
+                if os.path.isfile(path):
+                    return path
+        return None
 
     async def read(self, uid: str, practice_id: str) -> str:
-        # currently, returns just the path, because of possible audio implementation
-        return self.base_dir + f"/{uid}/videos/practice_{practice_id}.mp4"
\ No newline at end of file
+        # currently, returns just the path; an audio artifact skips demuxing the video container
+        path = self._audio_artifact(uid, practice_id)
+        if path is not None:
+            logger.debug("Using audio artifact %s for practice %s", path, practice_id)
+            return path
+        return self.base_dir + f"/{uid}/{VIDEO_DIR}/practice_{practice_id}.mp4"
@@ -1,3 +1,5 @@
+from typing import List, Sequence, Tuple
+from pymongo import UpdateOne
 from app.domain.repositories.i_metadata_repo import IMetadataRepo
 from app.infrastructure.database.mongo_connection import mongo_connection
 import logging
@@ -40,3 +42,62 @@ class MongoMetadataRepo(IMetadataRepo):
                 id_practice,
             )
             raise
+
+    async def is_practice_audio_done(self, uid: str, id_practice: int) -> bool:
+        try:
+            user = await self.users_collection.find_one(
+                {"uid": uid, "practices": {"$elemMatch": {"id_practice": id_practice, "audio_done": True}}},
+                {"_id": 1},
+            )
+            return user is not None
+        except Exception as e:
+            logger.exception(
+                "Error reading audio_done for uid=%s, practice=%s",
+                uid,
+                id_practice,
+            )
+            raise
+
+    async def mark_practices_audio_done(self, items: Sequence[Tuple[str, int]]) -> List[bool]:
+        """
+        Marks every (uid, id_practice) with one unordered bulk_write.
+
+        bulk_write only reports totals, so when some update did not modify its document the
+        per-pair results come from one read of the involved users: a pair is True when its
+        practice exists and is marked (also if it already was).
+        """
+        if not items:
+            return []
+        try:
+            operations = [
+                UpdateOne(
+                    {"uid": uid, "practices.id_practice": id_practice},
+                    {"$set": {"practices.$.audio_done": True}},
+                )
+                for uid, id_practice in items
+            ]
+            result = await self.users_collection.bulk_write(operations, ordered=False)
+            if result.modified_count == len(items):
+                logger.info("Updated audio_done for %d practices", len(items))
+                return [True] * len(items)
+
+            done = set()
+            cursor = self.users_collection.find(
+                {"uid": {"$in": list({uid for uid, _ in items})}},
+                {"uid": 1, "practices.id_practice": 1, "practices.audio_done": 1},
+            )
+            async for user in cursor:
+                for practice in user.get("practices", []):
+                    if practice.get("audio_done"):
+                        done.add((user["uid"], practice.get("id_practice")))
+
+            results = [(uid, id_practice) in done for uid, id_practice in items]
+            logger.info(
+                "Updated audio_done for %d practices (%d modified, %d not found)",
+                len(items), result.modified_count, results.count(False),
+            )
+            return results
+
+        except Exception as e:
+            logger.exception("Error bulk updating audio_done for %d practices", len(items))
+            raise
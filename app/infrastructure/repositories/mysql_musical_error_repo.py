@@ -1,5 +1,7 @@
 import logging
-from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from typing import List, Optional
+from sqlalchemy import delete, insert, inspect, select
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError, OperationalError
 from app.domain.repositories.i_musical_error_repo import IMusicalErrorRepo
 from app.domain.entities.musical_error import MusicalError
 from app.infrastructure.database.models.MusicalErrorModel import MusicalErrorModel
@@ -8,6 +10,9 @@ from app.core.exceptions import DatabaseConnectionException
 
 logger = logging.getLogger(__name__)
 
+# ER_DUP_KEYNAME: the index already exists
+MYSQL_DUPLICATE_KEY_NAME = 1061
+
 class MySQLMusicalErrorRepository(IMusicalErrorRepo):
     """Concrete implementation of IMusicalErrorRepo using MySQL."""
 
@@ -43,6 +48,131 @@ class MySQLMusicalErrorRepository(IMusicalErrorRepo):
                 )
                 raise DatabaseConnectionException(f"Error creating musical error: {str(e)}")
 
+    async def create_many(self, musical_errors: List[MusicalError]) -> int:
+        """
+        Inserts all the errors in a single multi-row INSERT IGNORE inside one transaction:
+        rows that already exist (uq_musical_error) are skipped instead of failing the batch.
+        """
+        if not musical_errors:
+            return 0
+
+        rows = self._entities_to_rows(musical_errors)
+        stmt = insert(MusicalErrorModel).values(rows).prefix_with("IGNORE")
+
+        async with mysql_connection.get_async_session() as session:
+            try:
+                async with session.begin():
+                    result = await session.execute(stmt)
+
+                inserted = result.rowcount
+                logger.info(
+                    f"Inserted {inserted}/{len(rows)} musical errors for practice_id={musical_errors[0].id_practice}"
+                )
+                return inserted
+
+            except SQLAlchemyError as e:
+                logger.error(
+                    f"MySQL error bulk-inserting {len(rows)} musical errors for practice_id={musical_errors[0].id_practice}: {e}",
+                    exc_info=True
+                )
+                raise DatabaseConnectionException(f"Error creating musical errors: {str(e)}")
+
+    async def replace_for_practice(self, id_practice: int, musical_errors: List[MusicalError]) -> int:
+        """
+        Deletes the stored errors of the practice (through ix_musical_error_practice) and
+        bulk-inserts the new ones in the same transaction, so readers never see a mix.
+        """
+        async with mysql_connection.get_async_session() as session:
+            try:
+                inserted = 0
+                async with session.begin():
+                    deleted = await session.execute(
+                        delete(MusicalErrorModel).where(MusicalErrorModel.id_practice == id_practice)
+                    )
+                    if musical_errors:
+                        rows = self._entities_to_rows(musical_errors)
+                        result = await session.execute(
+                            insert(MusicalErrorModel).values(rows).prefix_with("IGNORE")
+                        )
+                        inserted = result.rowcount
+
+                logger.info(
+                    f"Replaced musical errors for practice_id={id_practice}: "
+                    f"deleted={deleted.rowcount}, inserted={inserted}"
+                )
+                return inserted
+
+            except SQLAlchemyError as e:
+                logger.error(f"MySQL error replacing musical errors for practice_id={id_practice}: {e}", exc_info=True)
+                raise DatabaseConnectionException(f"Error replacing musical errors: {str(e)}")
+
+    async def list_by_practice(self, id_practice: int, limit: int = 100, after_id: Optional[int] = None) -> List[MusicalError]:
+        """Keyset pagination over (id_practice, id): pass the last id of a page as `after_id` to get the next one."""
+        stmt = (
+            select(MusicalErrorModel)
+            .where(MusicalErrorModel.id_practice == id_practice)
+            .order_by(MusicalErrorModel.id)
+            .limit(limit)
+        )
+        if after_id is not None:
+            stmt = stmt.where(MusicalErrorModel.id > after_id)
+
+        async with mysql_connection.get_async_session() as session:
+            try:
+                result = await session.execute(stmt)
+                return [self._model_to_entity(model) for model in result.scalars()]
+            except SQLAlchemyError as e:
+                logger.error(f"MySQL error listing musical errors for practice_id={id_practice}: {e}", exc_info=True)
+                raise DatabaseConnectionException(f"Error listing musical errors: {str(e)}")
+
+    async def ensure_indexes(self):
+        """
+        Creates the secondary indexes declared on MusicalErrorModel that are missing in the table.
+
+        Best effort: the indexes belong to the schema (database/migrations), so a failure here is
+        only logged. Another worker creating the same index at the same time (MySQL error 1061)
+        counts as done.
+        """
+
+        def create_missing(sync_conn):
+            existing = {index["name"] for index in inspect(sync_conn).get_indexes(MusicalErrorModel.__tablename__)}
+            created = []
+            for index in MusicalErrorModel.__table__.indexes:
+                if index.name in existing:
+                    continue
+                try:
+                    index.create(sync_conn)
+                    created.append(index.name)
+                except OperationalError as e:
+                    if getattr(e.orig, "args", (None,))[0] != MYSQL_DUPLICATE_KEY_NAME:
+                        raise
+                    logger.info(f"Index {index.name} was created concurrently by another worker")
+            return created
+
+        mysql_connection.init_engine()
+        try:
+            async with mysql_connection.async_engine.begin() as conn:
+                created = await conn.run_sync(create_missing)
+            if created:
+                logger.info(f"Created indexes on {MusicalErrorModel.__tablename__}: {', '.join(created)}")
+        except SQLAlchemyError as e:
+            logger.warning(
+                f"Could not ensure indexes on {MusicalErrorModel.__tablename__} ({e}); "
+                f"apply app/infrastructure/database/migrations with a user allowed to create indexes"
+            )
+
+    @staticmethod
+    def _entities_to_rows(musical_errors: List[MusicalError]) -> List[dict]:
+        return [
+            {
+                "min_sec": error.min_sec,
+                "note_played": error.note_played,
+                "note_correct": error.note_correct,
+                "id_practice": error.id_practice,
+            }
+            for error in musical_errors
+        ]
+
     def _model_to_entity(self, model: MusicalErrorModel) -> MusicalError:
         return  MusicalError(
             id=model.id,
@@ -1,13 +1,21 @@
+import os
+import sys
+import signal
 import logging
 import asyncio
-import numpy as np
-import soundfile as sf
+import argparse
 from app.core.config import settings
 from app.core.logging_config import configure_logging
+from app.core.supervisor import WorkerSupervisor
 from app.infrastructure.audio.model_manager import ModelManager
+from app.infrastructure.audio.analysis_executor import AnalysisExecutor
 from app.infrastructure.database import mongo_connection, mysql_connection
 from app.infrastructure.kafka.kafka_consumer import start_kafka_consumer
 from app.infrastructure.kafka.kafka_producer import KafkaProducer
+from app.infrastructure.repositories.mysql_musical_error_repo import MySQLMusicalErrorRepository
+from app.infrastructure.repositories.mongo_metadata_repo import MongoMetadataRepo
+from app.infrastructure.repositories.coalescing_metadata_repo import CoalescingMetadataRepo
+from app.infrastructure.monitoring.metrics_server import start_metrics_server
 from contextlib import asynccontextmanager
 
 
@@ -22,10 +30,16 @@ async def lifespan():
     logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     logger.info(f"Environment: {settings.APP_ENV}")
 
+    # ---- Metrics ----
+    metrics_server = None
+    if settings.METRICS_ENABLED:
+        metrics_server = await start_metrics_server(settings.METRICS_HOST, settings.METRICS_PORT)
+
     # ---- DB COnnections ----
     try:
         # MySQL
         mysql_connection.mysql_connection.init_engine()
+        await MySQLMusicalErrorRepository().ensure_indexes()
         logger.info("MySQL connection initialized")
 
         # Mongo
@@ -39,54 +53,142 @@ async def lifespan():
     # ---- Load Audio Models ----
     try:
         logger.info("Pre-loading audio analysis models...")
-        predict, model_path = ModelManager.get_basic_pitch()
-        # Load model weights by running predict on dummy audio
-
-        # Write a short silent WAV file
-        dummy_path = "dummy.wav"
-        sf.write(dummy_path, np.zeros(48000), 48000)  # 1 second of silence at 48kHz
-
-        # Actually load the model weights
-        predict(dummy_path, model_or_model_path=model_path)
+        layout = ModelManager.configure_threads()
+        logger.info(
+            "Thread layout (executor=%s, workers=%d): %s",
+            settings.ANALYSIS_EXECUTOR,
+            settings.ANALYSIS_WORKERS,
+            layout.describe(),
+        )
+        if not AnalysisExecutor.uses_processes():
+            # Thread executor shares this process' model; process workers warm up their own
+            ModelManager.warmup()
+        await AnalysisExecutor.start()
         logger.info("Audio models loaded successfully")
     except Exception as e:
         logger.exception("Error loading audio models")
         raise
 
     # ---- Kafka ----
-    producer = KafkaProducer(bootstrap_servers=settings.KAFKA_BROKER)
+    producer = KafkaProducer(
+        bootstrap_servers=settings.KAFKA_BROKER,
+        linger_ms=settings.KAFKA_PRODUCER_LINGER_MS,
+        max_batch_size=settings.KAFKA_PRODUCER_MAX_BATCH_SIZE,
+        compression_type=settings.KAFKA_PRODUCER_COMPRESSION,
+    )
     await producer.start()
 
+    # audio_done updates of concurrent practices share one Mongo bulk_write
+    metadata_repo = MongoMetadataRepo()
+    if settings.MONGO_COALESCE_WINDOW_MS > 0:
+        metadata_repo = CoalescingMetadataRepo(
+            metadata_repo,
+            window_ms=settings.MONGO_COALESCE_WINDOW_MS,
+            max_items=settings.MONGO_COALESCE_MAX_ITEMS,
+        )
+
     loop = asyncio.get_event_loop()
-    consumer_task = loop.create_task(start_kafka_consumer(producer))
+    consumer_task = loop.create_task(start_kafka_consumer(producer, metadata_repo))
 
-    yield
+    yield consumer_task
 
     # ---- Shutdown ----
+    consumer_failure = None
     consumer_task.cancel()
     try:
         await consumer_task
     except asyncio.CancelledError:
         logger.info("Kafka consumer stopped")
+    except Exception as e:
+        # Cleanup still runs; the failure is raised at the end so the worker exits with an error
+        logger.error(f"Kafka consumer failed: {e}")
+        consumer_failure = e
+
+    if isinstance(metadata_repo, CoalescingMetadataRepo):
+        await metadata_repo.close()
+        logger.info("Pending Mongo updates flushed")
 
     await producer.stop()
     logger.info("Kafka producer stopped")
 
+    AnalysisExecutor.shutdown()
+
     # Close DBs
     await mysql_connection.mysql_connection.close_connections()
     await mongo_connection.mongo_connection.close()
 
     logger.info("Database connections closed")
 
+    if metrics_server is not None:
+        metrics_server.close()
+        await metrics_server.wait_closed()
+
+    if consumer_failure is not None:
+        raise consumer_failure
+
 
 async def main():
-    async with lifespan():
-        while True:
-            await asyncio.sleep(3600)
+    # SIGTERM/SIGINT end the service through the lifespan teardown
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    async with lifespan() as consumer_task:
+        # A failed consumer (e.g. undeliverable output) ends the service too: the supervisor or the
+        # container restarts it from the last committed offset
+        stopped = asyncio.ensure_future(stop.wait())
+        await asyncio.wait({stopped, consumer_task}, return_when=asyncio.FIRST_COMPLETED)
+        stopped.cancel()
+
+
+def run_worker(index: int) -> int:
+    """Entry point of a supervised worker: its own model, DB pools, producer and consumer."""
+    logger.info(f"Worker {index} started (pid {os.getpid()})")
+    # One metrics endpoint per worker process
+    settings.METRICS_PORT += index
+    asyncio.run(main())
+    return 0
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=settings.APP_NAME)
+    parser.add_argument(
+        "--workers", type=int, default=settings.WORKERS,
+        help="Consumer processes joining the same group (default: WORKERS setting)",
+    )
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
+    args = parse_args()
+    settings.WORKERS = max(1, args.workers)
+    # Spawned analysis processes read their settings from the environment: --workers must reach
+    # them too, or they split the whole machine instead of this worker's share of the cores
+    os.environ["WORKERS"] = str(settings.WORKERS)
+
+    if settings.WORKERS > 1:
+        if settings.ANALYSIS_EXECUTOR == "thread":
+            # Workers run the model themselves: heavy imports happen before forking so they share them copy-on-write
+            ModelManager.preload_modules()
+        else:
+            # Spawned analysis processes re-import TF and load their own model: nothing is shared across workers
+            logger.warning(
+                "WORKERS=%d with ANALYSIS_EXECUTOR=process loads %d models (%d analysis processes per worker); "
+                "ANALYSIS_EXECUTOR=thread keeps one model per worker",
+                settings.WORKERS,
+                settings.WORKERS * max(1, settings.ANALYSIS_WORKERS),
+                max(1, settings.ANALYSIS_WORKERS),
+            )
+        supervisor = WorkerSupervisor(
+            run_worker,
+            settings.WORKERS,
+            max_backoff=settings.WORKER_RESTART_MAX_BACKOFF,
+            shutdown_timeout=settings.WORKER_SHUTDOWN_TIMEOUT,
+        )
+        sys.exit(supervisor.run())
+
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        logger.info("Service stopped manually (Ctrl+C)")
\ No newline at end of file
+        logger.info("Service stopped manually (Ctrl+C)")
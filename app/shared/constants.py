@@ -0,0 +1,5 @@
+# Native sample rate of the basic_pitch model; audio is decoded straight to it
+AUDIO_SAMPLE_RATE = 22050
+
+# MIDI number of the first pitch bin of the basic_pitch posteriorgrams (A0)
+MODEL_MIDI_OFFSET = 21
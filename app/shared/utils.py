@@ -0,0 +1,39 @@
+import os
+from collections import OrderedDict
+from typing import Hashable
+
+
+def available_cores() -> int:
+    """Number of CPU cores this process may run on (honours affinity/cpusets)."""
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class BoundedLRU:
+    """Set of recently seen keys that forgets the least recently used one past `max_size`."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._keys: "OrderedDict[Hashable, None]" = OrderedDict()
+
+    def add(self, key: Hashable):
+        if self.max_size <= 0:
+            return
+        self._keys[key] = None
+        self._keys.move_to_end(key)
+        while len(self._keys) > self.max_size:
+            self._keys.popitem(last=False)
+
+    def discard(self, key: Hashable):
+        self._keys.pop(key, None)
+
+    def __contains__(self, key: Hashable) -> bool:
+        if key in self._keys:
+            self._keys.move_to_end(key)
+            return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self._keys)
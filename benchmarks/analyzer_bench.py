@@ -0,0 +1,159 @@
+"""
+Analyzer benchmark suite on synthetic practices.
+
+For every size (octaves, bpm, figure) it synthesizes a practice with a few injected wrong
+and missing notes, wraps it in an mp4 and times separately:
+
+    decode       ffmpeg decode of the mp4 (decode_audio, no cache)
+    inference    basic_pitch on the whole practice (ModelManager.infer)
+    binning      note events -> one note per bin (select_notes_per_bin)
+    comparison   expected vs extracted notes -> MusicalError list (build_musical_errors)
+    end_to_end   extract_notes_audio, as the service runs it
+
+plus the per-bin accuracy against the notes actually played. Results are written as JSON;
+with --baseline, every stage latency is compared with the stored one and the run fails
+(exit code 1) when one regresses by more than --tolerance.
+
+Usage:
+    python -m benchmarks.analyzer_bench --output baseline.json
+    python -m benchmarks.analyzer_bench --baseline baseline.json --tolerance 0.2
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from typing import Dict, List
+import numpy as np
+from app.core.config import settings
+from app.domain.services.musical_error_service import build_musical_errors
+from app.infrastructure.audio.analyzer import (
+    FRAME_TH,
+    MIN_NOTE_LEN_FR,
+    MISSING_NOTE,
+    ONSET_TH,
+    extract_notes_audio,
+    note_events_to_array,
+    select_notes_per_bin,
+    shifted_edges,
+)
+from app.infrastructure.audio.decoder import decode_audio
+from app.infrastructure.audio.model_manager import ModelManager
+from app.infrastructure.audio.utils.note_utils import get_correct_notes, solfege_to_note
+from benchmarks.common import latency_summary, note_name_agreement, timed, write_report
+from benchmarks.synthetic_audio import generate_practice, write_mp4
+
+STAGES = ("decode", "inference", "binning", "comparison", "end_to_end")
+
+# name -> (scale, scale_type, octaves, bpm, figure)
+SIZES = {
+    "small": ("Do Mayor", "Mayor", 1, 120, 1.0),
+    "medium": ("La Menor", "Menor", 2, 90, 0.5),
+    "large": ("Sol Mayor", "Mayor", 4, 60, 0.5),
+}
+
+
+def inject_errors(n_notes: int, seed: int) -> tuple:
+    """About 10% wrong and 5% missing notes, deterministic for a seed (never the first note)."""
+    rng = np.random.default_rng(seed)
+    positions = rng.permutation(np.arange(1, n_notes))
+    n_wrong, n_missing = max(1, n_notes // 10), max(1, n_notes // 20)
+    wrong = {int(p): int(rng.choice([-2, -1, 1, 2])) for p in positions[:n_wrong]}
+    missing = [int(p) for p in positions[n_wrong:n_wrong + n_missing]]
+    return wrong, missing
+
+
+def bench_size(name: str, spec: tuple, workdir: str, repeats: int, seed: int) -> dict:
+    scale, scale_type, octaves, bpm, figure = spec
+    expected_names = get_correct_notes(solfege_to_note(scale.split()[0]), scale_type, octaves)
+    wrong, missing = inject_errors(len(expected_names), seed)
+    practice = generate_practice(scale, scale_type, octaves, bpm, figure, wrong=wrong, missing=missing, seed=seed)
+    path = os.path.join(workdir, f"{name}.mp4")
+    write_mp4(path, practice.audio, practice.sample_rate, ffmpeg=settings.FFMPEG_BINARY)
+
+    n_notes = len(expected_names)
+    note_length = practice.note_length_seconds
+    edges = np.arange(n_notes + 1) * note_length
+    latencies: Dict[str, List[float]] = {}
+
+    audio, latencies["decode"] = timed(decode_audio, path, repeats=repeats)
+    (_, note_events), latencies["inference"] = timed(
+        ModelManager.infer, audio, ONSET_TH, FRAME_TH, MIN_NOTE_LEN_FR, repeats=repeats
+    )
+    notes, latencies["binning"] = timed(
+        lambda: select_notes_per_bin(note_events_to_array(note_events), shifted_edges(edges), 0, n_notes),
+        repeats=repeats,
+    )
+    _, latencies["comparison"] = timed(build_musical_errors, expected_names, notes, 0, repeats=repeats)
+    extracted, latencies["end_to_end"] = timed(extract_notes_audio, path, bpm, figure, n_notes, repeats=repeats)
+
+    extracted_names = [n["name"] for n in extracted]
+    return {
+        "spec": {"scale": scale, "scale_type": scale_type, "octaves": octaves, "bpm": bpm, "figure": figure},
+        "notes": n_notes,
+        "audio_seconds": practice.audio.size / practice.sample_rate,
+        "injected": {"wrong": sorted(wrong), "missing": missing},
+        # Against what was played: a missing note is correct only if reported as missing
+        "accuracy": note_name_agreement(
+            [n if n is not None else MISSING_NOTE for n in practice.played_names], extracted_names
+        ),
+        "stages": {stage: latency_summary(latencies[stage]) for stage in STAGES},
+    }
+
+
+def find_regressions(report: dict, baseline: dict, tolerance: float, metric: str = "p50_s") -> List[dict]:
+    """Stages whose `metric` grew more than `tolerance` (fraction) over the baseline."""
+    regressions = []
+    for size, result in report["sizes"].items():
+        base = baseline.get("sizes", {}).get(size)
+        if base is None:
+            continue
+        for stage, summary in result["stages"].items():
+            old = base["stages"].get(stage, {}).get(metric)
+            new = summary.get(metric)
+            if old and new is not None and new > old * (1 + tolerance):
+                regressions.append({"size": size, "stage": stage, "baseline": old, "current": new, "ratio": new / old})
+        if result["accuracy"] < base.get("accuracy", 0.0) - 1e-9:
+            regressions.append({"size": size, "stage": "accuracy", "baseline": base["accuracy"], "current": result["accuracy"]})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="*", default=list(SIZES), choices=list(SIZES))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Path of the JSON report (use it as the next --baseline)")
+    parser.add_argument("--baseline", help="JSON report of a previous run to check regressions against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown of p50 per stage")
+    args = parser.parse_args()
+
+    # Model load and first-call graph setup are not part of any stage
+    ModelManager.warmup()
+
+    report = {
+        "config": {
+            "model_backend": settings.MODEL_BACKEND,
+            "model_quantization": settings.MODEL_QUANTIZATION,
+            "analysis_mode": settings.ANALYSIS_MODE,
+            "repeats": args.repeats,
+            "seed": args.seed,
+        },
+        "sizes": {},
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in args.sizes:
+            report["sizes"][name] = bench_size(name, SIZES[name], workdir, args.repeats, args.seed)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = find_regressions(report, json.load(f), args.tolerance)
+
+    write_report(report, args.output)
+    if report.get("regressions"):
+        print(f"{len(report['regressions'])} regression(s) against {args.baseline}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
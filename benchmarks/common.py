@@ -0,0 +1,95 @@
+import json
+import os
+import time
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+import numpy as np
+
+
+def timed(fn: Callable, *args, repeats: int = 1, **kwargs) -> Tuple[object, List[float]]:
+    """Runs fn `repeats` times and returns the last result plus the latency of every run in seconds."""
+    latencies = []
+    result = None
+    for _ in range(max(1, repeats)):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        latencies.append(time.perf_counter() - start)
+    return result, latencies
+
+
+def latency_summary(latencies: Sequence[float]) -> Dict[str, float]:
+    values = np.asarray(latencies, dtype=float)
+    if values.size == 0:
+        return {"runs": 0}
+    return {
+        "runs": int(values.size),
+        "mean_s": float(values.mean()),
+        "min_s": float(values.min()),
+        "p50_s": float(np.percentile(values, 50)),
+        "p95_s": float(np.percentile(values, 95)),
+        "p99_s": float(np.percentile(values, 99)),
+    }
+
+
+def rss_bytes(pid: Union[int, str] = "self") -> int:
+    """Current resident set size of a process, this one by default (0 once it exited)."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        if pid != "self":
+            return 0
+        import resource
+
+        # ru_maxrss is the peak, in KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def match_note_events(reference: Sequence[tuple], other: Sequence[tuple], onset_tolerance: float = 0.05) -> Dict[str, float]:
+    """
+    Note-level agreement between two lists of note events (start_s, end_s, pitch, amplitude).
+
+    A note matches when the other list has an unmatched note of the same pitch whose onset
+    is within onset_tolerance seconds. Returns precision/recall/F1 of `other` against `reference`.
+    """
+    unmatched: Dict[int, List[float]] = {}
+    for start, _, pitch, _ in other:
+        unmatched.setdefault(int(pitch), []).append(float(start))
+
+    matches = 0
+    for start, _, pitch, _ in reference:
+        candidates = unmatched.get(int(pitch))
+        if not candidates:
+            continue
+        diffs = np.abs(np.asarray(candidates) - float(start))
+        best = int(diffs.argmin())
+        if diffs[best] <= onset_tolerance:
+            candidates.pop(best)
+            matches += 1
+
+    precision = matches / len(other) if other else 1.0
+    recall = matches / len(reference) if reference else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        "reference_notes": len(reference),
+        "other_notes": len(other),
+        "matched": matches,
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+    }
+
+
+def note_name_agreement(reference: Sequence[str], other: Sequence[str]) -> float:
+    """Fraction of positions where two per-bin note name lists agree."""
+    n = max(len(reference), len(other))
+    if n == 0:
+        return 1.0
+    return sum(1 for a, b in zip(reference, other) if a == b) / n
+
+
+def write_report(report: dict, path: str | None):
+    text = json.dumps(report, indent=2, default=float)
+    if path:
+        with open(path, "w") as f:
+            f.write(text + "\n")
+    print(text)
@@ -0,0 +1,93 @@
+"""
+Compares basic_pitch inference backends on the same audio.
+
+For every backend it reports the model load time, the RSS added by loading the model,
+the inference latency per file and the note-level agreement (and maximum posteriorgram
+difference) against the first backend of the list.
+
+Usage:
+    python -m benchmarks.compare_backends practice_1.mp4 practice_2.mp4 --backends tf tflite onnx
+"""
+import argparse
+import gc
+import time
+import numpy as np
+from app.infrastructure.audio.analyzer import FRAME_TH, MIN_NOTE_LEN_FR, ONSET_TH
+from app.infrastructure.audio.decoder import decode_audio
+from app.infrastructure.audio.model_manager import MODEL_BACKENDS, ModelManager
+from benchmarks.common import latency_summary, match_note_events, rss_bytes, timed, write_report
+
+
+def run_model(model, audio: np.ndarray, repeats: int):
+    # One untimed run so lazy graph/session initialization does not count as latency
+    ModelManager.infer(audio, ONSET_TH, FRAME_TH, MIN_NOTE_LEN_FR, model=model)
+    (model_output, note_events), latencies = timed(
+        ModelManager.infer, audio, ONSET_TH, FRAME_TH, MIN_NOTE_LEN_FR, model=model, repeats=repeats
+    )
+    return model_output, note_events, latencies
+
+
+def compare_models(models: dict, audios: dict, repeats: int = 3, onset_tolerance: float = 0.05) -> dict:
+    """
+    Runs every audio through every model.
+
+    Args:
+        models: name -> {"model": Model, "load_s": float, "rss_delta_bytes": int}, the first one is the reference
+        audios: name -> decoded audio
+    """
+    reference_name = next(iter(models))
+    reference_outputs = {}
+    report = {"reference": reference_name, "models": {}}
+
+    for name, info in models.items():
+        files = {}
+        all_latencies = []
+        for audio_name, audio in audios.items():
+            model_output, note_events, latencies = run_model(info["model"], audio, repeats)
+            all_latencies += latencies
+            entry = {"latency": latency_summary(latencies), "notes": len(note_events)}
+            if name == reference_name:
+                reference_outputs[audio_name] = (model_output, note_events)
+            else:
+                ref_output, ref_events = reference_outputs[audio_name]
+                entry["agreement"] = match_note_events(ref_events, note_events, onset_tolerance)
+                n = min(ref_output["onset"].shape[0], model_output["onset"].shape[0])
+                entry["max_onset_posterior_diff"] = float(
+                    np.abs(ref_output["onset"][:n] - model_output["onset"][:n]).max()
+                ) if n else 0.0
+            files[audio_name] = entry
+
+        report["models"][name] = {
+            "load_s": info["load_s"],
+            "rss_delta_bytes": info["rss_delta_bytes"],
+            "latency": latency_summary(all_latencies),
+            "files": files,
+        }
+    return report
+
+
+def load_timed(loader) -> dict:
+    gc.collect()
+    rss_before = rss_bytes()
+    start = time.perf_counter()
+    model = loader()
+    load_s = time.perf_counter() - start
+    return {"model": model, "load_s": load_s, "rss_delta_bytes": rss_bytes() - rss_before}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="Practice videos or audio files")
+    parser.add_argument("--backends", nargs="+", default=list(MODEL_BACKENDS), choices=MODEL_BACKENDS)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--onset-tolerance", type=float, default=0.05, help="Seconds")
+    parser.add_argument("--output", help="Optional path of the JSON report")
+    args = parser.parse_args()
+
+    audios = {path: decode_audio(path) for path in args.files}
+    models = {backend: load_timed(lambda b=backend: ModelManager.load_model(b)) for backend in args.backends}
+    write_report(compare_models(models, audios, args.repeats, args.onset_tolerance), args.output)
+
+
+if __name__ == "__main__":
+    main()
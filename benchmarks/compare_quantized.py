@@ -0,0 +1,104 @@
+"""
+Compares a full-precision basic_pitch model with its quantized variant on real practices.
+
+Every practice goes through analyze_audio with both models, run by the same backend. The
+report gives, per model, the per-note accuracy against get_correct_notes, the agreement
+between both models, the analysis latency and the model load time/RSS, plus the deltas of
+the quantized model.
+
+Usage:
+    python -m benchmarks.compare_quantized \\
+        --practice practice_1.mp4 "Do Mayor" Mayor 1 60 1 \\
+        --practice practice_2.mp4 "Re Menor" Menor 2 90 0.5 \\
+        --backend onnx --mode dynamic_int8
+"""
+import argparse
+from app.infrastructure.audio.analyzer import analyze_audio
+from app.infrastructure.audio.decoder import decode_audio
+from app.infrastructure.audio.model_manager import ModelManager
+from app.infrastructure.audio.model_quantization import QUANTIZATION_MODES
+from app.infrastructure.audio.utils.note_utils import get_correct_notes, solfege_to_note
+from benchmarks.common import latency_summary, note_name_agreement, timed, write_report
+from benchmarks.compare_backends import load_timed
+
+
+def run_practices(model, practices: list, repeats: int) -> dict:
+    results = {}
+    for practice in practices:
+        expected = practice["expected"]
+        # Untimed run to initialize lazy state of the backend
+        analyze_audio(practice["audio"], practice["bpm"], practice["figure"], len(expected), model=model)
+        notes, latencies = timed(
+            analyze_audio, practice["audio"], practice["bpm"], practice["figure"], len(expected),
+            model=model, repeats=repeats,
+        )
+        names = [n["name"] for n in notes]
+        results[practice["path"]] = {
+            "names": names,
+            "accuracy": note_name_agreement(expected, names),
+            "latency": latency_summary(latencies),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--practice", nargs=6, action="append", required=True,
+        metavar=("FILE", "SCALE", "SCALE_TYPE", "OCTAVES", "BPM", "FIGURE"),
+        help='e.g. practice.mp4 "Do Mayor" Mayor 1 60 1',
+    )
+    parser.add_argument("--backend", default="onnx", choices=("tflite", "onnx"))
+    parser.add_argument("--mode", default="dynamic_int8", choices=QUANTIZATION_MODES[1:])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="Optional path of the JSON report")
+    args = parser.parse_args()
+
+    practices = []
+    for path, scale, scale_type, octaves, bpm, figure in args.practice:
+        practices.append({
+            "path": path,
+            "audio": decode_audio(path),
+            "bpm": int(bpm),
+            "figure": float(figure),
+            "expected": get_correct_notes(solfege_to_note(scale.split()[0]), scale_type, int(octaves)),
+        })
+
+    # Same runtime for both: the quantized TFLite model is compared with basic_pitch's float TFLite model,
+    # not with the TF SavedModel it is converted from
+    full_path = ModelManager.resolve_model_path(args.backend)
+    # Built (or found in QUANTIZED_MODEL_DIR) before timing, so load_s only measures the load
+    quantized_path = ModelManager.resolve_model_path(args.backend, args.mode)
+    models = {
+        "full": load_timed(lambda: ModelManager.load_model(args.backend, model_path=full_path)),
+        "quantized": load_timed(lambda: ModelManager.load_model(args.backend, model_path=quantized_path)),
+    }
+    results = {name: run_practices(info["model"], practices, args.repeats) for name, info in models.items()}
+
+    report = {
+        "backend": args.backend,
+        "mode": args.mode,
+        "model_paths": {"full": full_path, "quantized": quantized_path},
+        "practices": {},
+        "models": {},
+    }
+    for practice in practices:
+        path = practice["path"]
+        full, quantized = results["full"][path], results["quantized"][path]
+        report["practices"][path] = {
+            "expected": practice["expected"],
+            "full": full,
+            "quantized": quantized,
+            "agreement_full_vs_quantized": note_name_agreement(full["names"], quantized["names"]),
+            "accuracy_delta": quantized["accuracy"] - full["accuracy"],
+            "mean_latency_delta_s": quantized["latency"]["mean_s"] - full["latency"]["mean_s"],
+        }
+    for name, info in models.items():
+        report["models"][name] = {"load_s": info["load_s"], "rss_delta_bytes": info["rss_delta_bytes"]}
+    report["rss_delta_bytes"] = models["quantized"]["rss_delta_bytes"] - models["full"]["rss_delta_bytes"]
+
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
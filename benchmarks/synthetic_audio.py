@@ -0,0 +1,193 @@
+"""
+Deterministic generator of piano-like scale practices.
+
+A practice is the scale the service expects for (scale, scale_type, octaves): ascending from
+the root in octave 4 through `octaves` octaves and back down, one note per bin of
+(60 / bpm) * figure seconds. Every note is a decaying sum of slightly inharmonic partials,
+like a struck string. Wrong notes (shifted by some semitones) and missing notes (silence)
+can be injected at given positions.
+
+Usage:
+    python -m benchmarks.synthetic_audio "Do Mayor" Mayor 2 90 0.5 practice.mp4 --wrong 3:1 --missing 7
+"""
+import argparse
+import os
+import subprocess
+import tempfile
+import wave
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from music21 import scale as m21_scale
+from app.infrastructure.audio.utils.note_utils import MIDI_NOTE_NAMES, solfege_to_note
+from app.shared.constants import AUDIO_SAMPLE_RATE
+
+MISSING = None
+
+# Relative amplitude of the partials (1 = fundamental) and string inharmonicity coefficient
+PARTIALS = (1.0, 0.55, 0.3, 0.18, 0.1, 0.06)
+INHARMONICITY = 0.0004
+
+
+@dataclass
+class SyntheticPractice:
+    audio: np.ndarray
+    sample_rate: int
+    bpm: int
+    figure: float
+    # MIDI pitch played in every bin (None where the note is missing)
+    played: List[Optional[int]] = field(default_factory=list)
+    # MIDI pitch the scale expects in every bin
+    expected: List[int] = field(default_factory=list)
+
+    @property
+    def played_names(self) -> List[Optional[str]]:
+        return [MIDI_NOTE_NAMES[p] if p is not None else None for p in self.played]
+
+    @property
+    def note_length_seconds(self) -> float:
+        return (60 / self.bpm) * self.figure
+
+
+def scale_pitches(scale: str, scale_type: str, octaves: int) -> List[int]:
+    """MIDI pitches of the practice, same order and length as note_utils.get_correct_notes."""
+    root = solfege_to_note(scale.split()[0])
+    if scale_type == "Mayor":
+        s = m21_scale.MajorScale(root)
+    elif scale_type == "Menor":
+        s = m21_scale.MinorScale(root)
+    else:
+        raise ValueError("Unknown scale type")
+
+    ascending = [p.midi for p in s.getPitches(f"{root}4", f"{root}{4 + octaves}")]
+    return ascending + ascending[::-1][1:]
+
+
+def piano_tone(midi: int, duration: float, sample_rate: int, velocity: float = 0.8) -> np.ndarray:
+    """One struck note: inharmonic partials with a fast attack and per-partial exponential decay."""
+    t = np.arange(int(round(duration * sample_rate))) / sample_rate
+    f0 = 440.0 * 2 ** ((midi - 69) / 12)
+    tone = np.zeros_like(t)
+    for k, amplitude in enumerate(PARTIALS, start=1):
+        fk = k * f0 * np.sqrt(1 + INHARMONICITY * k * k)
+        if fk >= sample_rate / 2:
+            break
+        # Higher partials and higher notes die out faster
+        decay = 2.0 + 0.8 * k + f0 / 400
+        tone += amplitude * np.exp(-decay * t) * np.sin(2 * np.pi * fk * t)
+
+    attack = min(len(t), int(0.005 * sample_rate))
+    tone[:attack] *= np.linspace(0, 1, attack, endpoint=False)
+    release = min(len(t), int(0.02 * sample_rate))
+    tone[len(t) - release:] *= np.linspace(1, 0, release)
+    return velocity * tone / sum(PARTIALS)
+
+
+def generate_practice(
+    scale: str,
+    scale_type: str,
+    octaves: int,
+    bpm: int,
+    figure: float,
+    wrong: Optional[Dict[int, int]] = None,
+    missing: Sequence[int] = (),
+    sample_rate: int = AUDIO_SAMPLE_RATE,
+    seed: int = 0,
+    tail_seconds: float = 1.0,
+) -> SyntheticPractice:
+    """
+    Synthesizes a practice.
+
+    Args:
+        scale, scale_type, octaves, bpm, figure: same values as the input Kafka message
+        wrong: position -> semitone shift of a note played wrong
+        missing: positions left silent
+        seed: seeds the small velocity/timing humanization and the noise floor
+    """
+    rng = np.random.default_rng(seed)
+    expected = scale_pitches(scale, scale_type, octaves)
+    wrong = wrong or {}
+    missing = set(missing)
+
+    note_length = (60 / bpm) * figure
+    total = int(round((len(expected) * note_length + tail_seconds) * sample_rate))
+    audio = rng.normal(0, 1e-4, total)  # noise floor, as a real recording
+
+    played: List[Optional[int]] = []
+    for i, pitch in enumerate(expected):
+        if i in missing:
+            played.append(MISSING)
+            continue
+        pitch = pitch + wrong.get(i, 0)
+        played.append(pitch)
+
+        jitter = rng.uniform(-0.01, 0.01) if i else 0.0
+        start = max(0, int(round((i * note_length + jitter) * sample_rate)))
+        # The note rings a bit into the next bin, as with a held key
+        tone = piano_tone(pitch, note_length * 1.2, sample_rate, velocity=rng.uniform(0.6, 0.9))
+        end = min(total, start + len(tone))
+        audio[start:end] += tone[: end - start]
+
+    audio = np.clip(audio, -1.0, 1.0).astype(np.float32)
+    return SyntheticPractice(audio, sample_rate, bpm, figure, played, expected)
+
+
+def write_wav(path: str, audio: np.ndarray, sample_rate: int):
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+
+
+def write_mp4(path: str, audio: np.ndarray, sample_rate: int, ffmpeg: str = "ffmpeg"):
+    """Wraps the audio in an mp4 with a tiny black video track, like the practice recordings."""
+    with tempfile.TemporaryDirectory() as tmp:
+        wav_path = os.path.join(tmp, "audio.wav")
+        write_wav(wav_path, audio, sample_rate)
+        cmd = [
+            ffmpeg, "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", "color=c=black:s=64x64:r=10",
+            "-i", wav_path,
+            "-shortest", "-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac", "-b:a", "128k",
+            path,
+        ]
+        subprocess.run(cmd, check=True)
+
+
+def parse_positions(values: Sequence[str]) -> Dict[int, int]:
+    """'3:1' -> {3: 1} (position 3 played one semitone up); a bare '3' means +1."""
+    wrong = {}
+    for value in values:
+        position, _, shift = value.partition(":")
+        wrong[int(position)] = int(shift or 1)
+    return wrong
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scale", help='e.g. "Do Mayor"')
+    parser.add_argument("scale_type", choices=("Mayor", "Menor"))
+    parser.add_argument("octaves", type=int)
+    parser.add_argument("bpm", type=int)
+    parser.add_argument("figure", type=float)
+    parser.add_argument("output", help="Output .wav or .mp4")
+    parser.add_argument("--wrong", nargs="*", default=[], metavar="POS[:SEMITONES]")
+    parser.add_argument("--missing", nargs="*", type=int, default=[], metavar="POS")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    practice = generate_practice(
+        args.scale, args.scale_type, args.octaves, args.bpm, args.figure,
+        wrong=parse_positions(args.wrong), missing=args.missing, seed=args.seed,
+    )
+    if args.output.endswith(".mp4"):
+        write_mp4(args.output, practice.audio, practice.sample_rate)
+    else:
+        write_wav(args.output, practice.audio, practice.sample_rate)
+    print(f"{args.output}: {len(practice.played)} notes, {practice.audio.size / practice.sample_rate:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
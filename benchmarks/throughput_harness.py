@@ -0,0 +1,488 @@
+"""
+End-to-end throughput harness for the consumer pipeline without Kafka, MySQL or Mongo.
+
+start_kafka_consumer and ProcessAndStoreErrorUseCase run unchanged against in-memory
+stand-ins for AIOKafkaConsumer, KafkaProducer, IMusicalErrorRepo and IMetadataRepo, each
+with a configurable injected latency. N synthetic practices are fed through the consumer
+for every combination of MAX_CONCURRENT_VIDEOS and ANALYSIS_WORKERS, reporting messages/s,
+p50/p95/p99 job latency (fetch -> output message delivered), event-loop lag and the peak
+RSS of the point (this process and its analysis processes, sampled from /proc).
+
+By default the real analysis runs on synthetic mp4 practices (needs the model and ffmpeg).
+With --fake-analysis-ms the analysis is replaced by a wait of that length that releases the
+GIL, like native inference and ffmpeg do, on the thread executor: this tunes the Kafka/DB
+side without the model.
+
+Every point exports its settings to the environment (spawned analysis processes read them
+from there) and derives the thread layout and segment pool again, as the service startup
+does. With the thread executor the TensorFlow runtime of this process keeps the op threads
+of the first point. Connection settings get placeholders, so no .env is needed.
+
+Usage:
+    python -m benchmarks.throughput_harness --messages 60 --concurrency 1 2 4 --workers 1 2 4
+    python -m benchmarks.throughput_harness --fake-analysis-ms 300 --mysql-ms 5 --mongo-ms 3 --kafka-ms 10
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import tempfile
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import orjson
+from aiokafka import TopicPartition
+
+# Connection settings are required by the config but never used here (every client is in memory);
+# placeholders let the harness run without a .env. Real values in the environment win.
+HARNESS_ENV_DEFAULTS = {
+    "KAFKA_BROKER": "localhost:9092",
+    "KAFKA_INPUT_TOPIC": "harness-input",
+    "KAFKA_OUTPUT_TOPIC": "harness-output",
+    "KAFKA_GROUP_ID": "throughput-harness",
+    "MYSQL_HOST": "localhost",
+    "MYSQL_PORT": "3306",
+    "MYSQL_USER": "harness",
+    "MYSQL_PASSWORD": "harness",
+    "MYSQL_DB": "harness",
+    "MONGO_HOST": "localhost",
+    "MONGO_PORT": "27017",
+    "MONGO_USER": "harness",
+    "MONGO_PASSWORD": "harness",
+    "MONGO_DB": "harness",
+    "HOST_VIDEO_PATH": tempfile.gettempdir(),
+    "CONTAINER_VIDEO_PATH": tempfile.gettempdir(),
+}
+for _name, _value in HARNESS_ENV_DEFAULTS.items():
+    os.environ.setdefault(_name, _value)
+
+from app.core.config import settings
+from app.application.use_cases.process_and_store_error import ProcessAndStoreErrorUseCase
+from app.domain.entities.musical_error import MusicalError
+from app.domain.repositories.i_metadata_repo import IMetadataRepo
+from app.domain.repositories.i_musical_error_repo import IMusicalErrorRepo
+from app.domain.repositories.i_videos_repo import IVideoRepo
+from app.domain.services.metadata_practice_service import MetadataPracticeService
+from app.domain.services.musical_error_service import MusicalErrorService
+from app.infrastructure.audio.analysis_executor import AnalysisExecutor
+from app.infrastructure.audio.analyzer import MISSING_NOTE, shutdown_segment_pool
+from app.infrastructure.audio.model_manager import THREAD_ENV_VARS, ModelManager
+from app.infrastructure.kafka.kafka_consumer import start_kafka_consumer
+from app.infrastructure.repositories.coalescing_metadata_repo import CoalescingMetadataRepo
+from benchmarks.analyzer_bench import SIZES
+from benchmarks.common import latency_summary, rss_bytes, write_report
+from benchmarks.synthetic_audio import generate_practice, write_mp4
+
+INPUT_TOPIC = "harness-input"
+# Read by the fake analysis in the analysis threads
+FAKE_ANALYSIS_ENV = "THROUGHPUT_HARNESS_ANALYSIS_MS"
+
+
+class Latency:
+    """Injected latency: `ms` milliseconds +- `jitter` (fraction), 0 = no await at all."""
+
+    def __init__(self, ms: float, jitter: float = 0.2):
+        self.ms = ms
+        self.jitter = jitter
+
+    def seconds(self) -> float:
+        return max(0.0, self.ms * (1 + random.uniform(-self.jitter, self.jitter))) / 1000.0
+
+    async def wait(self):
+        if self.ms > 0:
+            await asyncio.sleep(self.seconds())
+
+
+class FakeRecord(NamedTuple):
+    offset: int
+    value: bytes
+
+
+class InMemoryConsumer:
+    """AIOKafkaConsumer stand-in serving pre-loaded messages round-robin from its partitions."""
+
+    def __init__(self, payloads: Sequence[bytes], partitions: int, commit_latency: Latency):
+        self.tps = [TopicPartition(INPUT_TOPIC, p) for p in range(max(1, partitions))]
+        self.records: Dict[TopicPartition, List[FakeRecord]] = {tp: [] for tp in self.tps}
+        for i, payload in enumerate(payloads):
+            tp = self.tps[i % len(self.tps)]
+            self.records[tp].append(FakeRecord(len(self.records[tp]), payload))
+        self.position = {tp: 0 for tp in self.tps}
+        self.paused = set()
+        self.committed: Dict[TopicPartition, int] = {}
+        self.fetched_at: Dict[Tuple[int, int], float] = {}  # (partition, offset) -> fetch time
+        self.commit_latency = commit_latency
+
+    def subscribe(self, topics, listener=None):
+        pass
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def assignment(self):
+        return set(self.tps)
+
+    def pause(self, *tps):
+        self.paused.update(tps)
+
+    def resume(self, *tps):
+        self.paused.difference_update(tps)
+
+    async def getmany(self, timeout_ms: int = 0, max_records: Optional[int] = None):
+        budget = max_records or float("inf")
+        batches = {}
+        now = time.perf_counter()
+        for tp in self.tps:
+            if tp in self.paused or budget <= 0:
+                continue
+            start = self.position[tp]
+            records = self.records[tp][start:start + int(min(budget, len(self.records[tp])))]
+            if records:
+                self.position[tp] += len(records)
+                budget -= len(records)
+                batches[tp] = records
+                for record in records:
+                    self.fetched_at[(tp.partition, record.offset)] = now
+        if not batches:
+            # Nothing to fetch (paused or drained): block like a real poll would
+            await asyncio.sleep(min(timeout_ms, 50) / 1000.0)
+        return batches
+
+    async def commit(self, offsets):
+        await self.commit_latency.wait()
+        self.committed.update(offsets)
+
+
+class InMemoryProducer:
+    """KafkaProducer stand-in; delivery futures resolve after the injected broker latency."""
+
+    def __init__(self, latency: Latency, expected: int):
+        self.latency = latency
+        self.delivered_at: Dict[int, float] = {}  # practice_id -> delivery time
+        self.expected = expected
+        self.all_delivered = asyncio.Event()
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def flush(self):
+        pass
+
+    def _deliver(self, message, future: Optional[asyncio.Future] = None):
+        self.delivered_at[message.practice_id] = time.perf_counter()
+        if future is not None and not future.done():
+            future.set_result(None)
+        if len(self.delivered_at) >= self.expected:
+            self.all_delivered.set()
+
+    async def publish_message(self, topic: str, message, wait: bool = True) -> Optional[asyncio.Future]:
+        orjson.dumps(message)  # same serialization cost as the real producer
+        if wait:
+            await self.latency.wait()
+            self._deliver(message)
+            return None
+        future = asyncio.get_running_loop().create_future()
+        asyncio.get_running_loop().call_later(self.latency.seconds(), self._deliver, message, future)
+        return future
+
+    async def publish_many(self, topic: str, messages, wait: bool = True) -> List[asyncio.Future]:
+        return [await self.publish_message(topic, message, wait) for message in messages]
+
+
+class InMemoryMusicalErrorRepo(IMusicalErrorRepo):
+    def __init__(self, latency: Latency):
+        self.latency = latency
+        self.rows: Dict[int, List[MusicalError]] = {}
+
+    async def create(self, musical_error: MusicalError) -> MusicalError:
+        await self.latency.wait()
+        self.rows.setdefault(musical_error.id_practice, []).append(musical_error)
+        return musical_error
+
+    async def create_many(self, musical_errors: List[MusicalError]) -> int:
+        await self.latency.wait()
+        for error in musical_errors:
+            self.rows.setdefault(error.id_practice, []).append(error)
+        return len(musical_errors)
+
+    async def replace_for_practice(self, id_practice: int, musical_errors: List[MusicalError]) -> int:
+        await self.latency.wait()
+        self.rows[id_practice] = list(musical_errors)
+        return len(musical_errors)
+
+    async def list_by_practice(self, id_practice: int, limit: int = 100, after_id: Optional[int] = None) -> List[MusicalError]:
+        await self.latency.wait()
+        return self.rows.get(id_practice, [])[:limit]
+
+
+class InMemoryMetadataRepo(IMetadataRepo):
+    def __init__(self, latency: Latency):
+        self.latency = latency
+        self.done = set()
+
+    async def mark_practice_audio_done(self, uid: str, id_practice: int) -> bool:
+        await self.latency.wait()
+        self.done.add((uid, id_practice))
+        return True
+
+    async def mark_practices_audio_done(self, items) -> List[bool]:
+        await self.latency.wait()
+        self.done.update(items)
+        return [True] * len(items)
+
+    async def is_practice_audio_done(self, uid: str, id_practice: int) -> bool:
+        await self.latency.wait()
+        return (uid, id_practice) in self.done
+
+
+class SyntheticVideoRepo(IVideoRepo):
+    """Maps every practice to one of the synthetic mp4 files."""
+
+    def __init__(self, paths: Dict[int, str]):
+        self.paths = paths
+
+    async def read(self, uid: str, practice_id: str) -> str:
+        return self.paths[int(practice_id)]
+
+
+def fake_extract_notes_audio(video_file, tempo, rhythmic_Value, notes_quantity):
+    """Stand-in for extract_notes_audio: waits and reports every bin as missing (every note is an error)."""
+    time.sleep(float(os.environ.get(FAKE_ANALYSIS_ENV, "0")) / 1000.0)
+    note_length = (60 / tempo) * rhythmic_Value
+    return [{"name": MISSING_NOTE, "start": i * note_length, "velocity": 0} for i in range(notes_quantity)]
+
+
+def build_messages(n: int) -> Tuple[List[bytes], Dict[int, str]]:
+    """N input payloads cycling through the analyzer_bench sizes; practice ids 1..N."""
+    payloads, specs = [], {}
+    sizes = list(SIZES.items())
+    for practice_id in range(1, n + 1):
+        size, (scale, scale_type, octaves, bpm, figure) = sizes[(practice_id - 1) % len(sizes)]
+        specs[practice_id] = size
+        payloads.append(orjson.dumps({
+            "uid": f"user-{practice_id}", "practice_id": practice_id, "date": "2024-01-01", "time": "10:00",
+            "message": "new_practice", "scale": scale, "scale_type": scale_type, "duration": 0,
+            "bpm": bpm, "figure": figure, "octaves": octaves,
+        }))
+    return payloads, specs
+
+
+async def monitor_loop_lag(stop: asyncio.Event, interval: float, lags: List[float]):
+    """Measures how late the event loop wakes up from a sleep of `interval` seconds."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - start - interval))
+
+
+def child_pids() -> List[int]:
+    """Live children of this process (the analysis process workers), read from /proc."""
+    pids = []
+    try:
+        for task in os.listdir("/proc/self/task"):
+            with open(f"/proc/self/task/{task}/children") as f:
+                pids.extend(int(pid) for pid in f.read().split())
+    except OSError:
+        pass
+    return pids
+
+
+class PeakRssSampler:
+    """
+    Peak RSS of this process and of its children during one sweep point, polled from /proc.
+    ru_maxrss would report the peak of the whole sweep instead. A thread rather than a task,
+    so a busy event loop does not skip samples.
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.self_bytes = 0
+        self.children_bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _sample(self):
+        self.self_bytes = max(self.self_bytes, rss_bytes())
+        self.children_bytes = max(self.children_bytes, sum(rss_bytes(pid) for pid in child_pids()))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._sample()
+        self._thread.start()
+
+    def stop(self) -> Dict[str, int]:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return {"self_bytes": self.self_bytes, "children_bytes": self.children_bytes}
+
+
+def configure_point(overrides: Dict[str, object], base_thread_env: Dict[str, Optional[str]]):
+    """
+    Applies the settings of one sweep point as the service would see them at startup: in this
+    process and in the environment (spawned analysis processes reload the settings from it),
+    with the thread layout and the segment pool derived again from the new values.
+    """
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+        os.environ[name] = str(value)
+
+    # Layout variables exported for the previous point must not stick (configure_threads only sets
+    # them when absent); values given by the user are kept
+    for name in THREAD_ENV_VARS:
+        if base_thread_env[name] is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = base_thread_env[name]
+    ModelManager.reset_thread_layout()
+    shutdown_segment_pool()
+    return ModelManager.configure_threads()
+
+
+async def run_point(args, payloads: List[bytes], video_paths: Dict[int, str]) -> dict:
+    """One run of the whole backlog with the current settings."""
+    producer = InMemoryProducer(Latency(args.kafka_ms), expected=len(payloads))
+    consumer = InMemoryConsumer(payloads, args.partitions, Latency(args.kafka_ms))
+    metadata_repo: IMetadataRepo = InMemoryMetadataRepo(Latency(args.mongo_ms))
+    if settings.MONGO_COALESCE_WINDOW_MS > 0:
+        metadata_repo = CoalescingMetadataRepo(
+            metadata_repo, settings.MONGO_COALESCE_WINDOW_MS, settings.MONGO_COALESCE_MAX_ITEMS
+        )
+    use_case = ProcessAndStoreErrorUseCase(
+        music_service=MusicalErrorService(InMemoryMusicalErrorRepo(Latency(args.mysql_ms)), SyntheticVideoRepo(video_paths)),
+        mongo_service=MetadataPracticeService(metadata_repo),
+        kafka_producer=producer,
+    )
+
+    # Started first: the model loading of the analysis processes is part of the point's footprint
+    rss = PeakRssSampler()
+    rss.start()
+    await AnalysisExecutor.start()
+    lags: List[float] = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(monitor_loop_lag(stop, 0.01, lags))
+
+    start = time.perf_counter()
+    consumer_task = asyncio.create_task(start_kafka_consumer(producer, use_case=use_case, consumer=consumer))
+    done, _ = await asyncio.wait(
+        [asyncio.create_task(producer.all_delivered.wait()), consumer_task],
+        timeout=args.timeout,
+        return_when=asyncio.FIRST_COMPLETED,
+    )
+    elapsed = time.perf_counter() - start
+
+    consumer_task.cancel()
+    await asyncio.gather(consumer_task, return_exceptions=True)
+    if isinstance(metadata_repo, CoalescingMetadataRepo):
+        await metadata_repo.close()
+    stop.set()
+    await monitor
+    peak_rss = rss.stop()
+    AnalysisExecutor.shutdown()
+
+    latencies = []
+    for tp in consumer.tps:
+        for record in consumer.records[tp]:
+            practice_id = orjson.loads(record.value)["practice_id"]
+            if practice_id in producer.delivered_at:
+                latencies.append(producer.delivered_at[practice_id] - consumer.fetched_at[(tp.partition, record.offset)])
+
+    delivered = len(producer.delivered_at)
+    return {
+        "delivered": delivered,
+        "timed_out": delivered < len(payloads),
+        "elapsed_s": elapsed,
+        "messages_per_s": delivered / elapsed if elapsed else 0.0,
+        "job_latency": latency_summary(latencies),
+        "loop_lag": latency_summary(lags) | {"max_s": max(lags, default=0.0)},
+        "committed": {f"{tp.topic}[{tp.partition}]": offset for tp, offset in consumer.committed.items()},
+        "peak_rss": peak_rss,
+    }
+
+
+def prepare_videos(specs: Dict[int, str], workdir: str, fake: bool) -> Dict[int, str]:
+    if fake:
+        return {practice_id: f"synthetic://{size}" for practice_id, size in specs.items()}
+    paths = {}
+    for size in set(specs.values()):
+        scale, scale_type, octaves, bpm, figure = SIZES[size]
+        practice = generate_practice(scale, scale_type, octaves, bpm, figure, wrong={1: 1}, missing=[2])
+        paths[size] = os.path.join(workdir, f"{size}.mp4")
+        write_mp4(paths[size], practice.audio, practice.sample_rate, ffmpeg=settings.FFMPEG_BINARY)
+    return {practice_id: paths[size] for practice_id, size in specs.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[settings.MAX_CONCURRENT_VIDEOS],
+                        help="MAX_CONCURRENT_VIDEOS values to sweep")
+    parser.add_argument("--workers", type=int, nargs="+", default=[settings.ANALYSIS_WORKERS],
+                        help="ANALYSIS_WORKERS values to sweep")
+    parser.add_argument("--partitions", type=int, default=3)
+    parser.add_argument("--mysql-ms", type=float, default=5.0)
+    parser.add_argument("--mongo-ms", type=float, default=3.0)
+    parser.add_argument("--kafka-ms", type=float, default=5.0)
+    parser.add_argument("--fake-analysis-ms", type=float, help="Replace the analysis by a wait of this length")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Seconds per sweep point")
+    parser.add_argument("--output", help="Optional path of the JSON report")
+    args = parser.parse_args()
+
+    fake = args.fake_analysis_ms is not None
+    if fake:
+        import app.domain.services.musical_error_service as musical_error_service
+
+        os.environ[FAKE_ANALYSIS_ENV] = str(args.fake_analysis_ms)
+        musical_error_service.extract_notes_audio = fake_extract_notes_audio
+        # Process workers would load the model at startup
+        settings.ANALYSIS_EXECUTOR = "thread"
+
+    payloads, specs = build_messages(args.messages)
+    report = {
+        "messages": args.messages,
+        "analysis": f"fake {args.fake_analysis_ms} ms" if fake else "real",
+        "executor": settings.ANALYSIS_EXECUTOR,
+        "injected_latency_ms": {"mysql": args.mysql_ms, "mongo": args.mongo_ms, "kafka": args.kafka_ms},
+        "runs": [],
+    }
+    max_in_flight = settings.KAFKA_MAX_IN_FLIGHT
+    base_thread_env = {name: os.environ.get(name) for name in THREAD_ENV_VARS}
+    with tempfile.TemporaryDirectory() as workdir:
+        video_paths = prepare_videos(specs, workdir, fake)
+        for concurrency, workers in itertools.product(args.concurrency, args.workers):
+            layout = configure_point(
+                {
+                    "ANALYSIS_EXECUTOR": settings.ANALYSIS_EXECUTOR,
+                    "MAX_CONCURRENT_VIDEOS": concurrency,
+                    "ANALYSIS_WORKERS": workers,
+                    "KAFKA_MAX_IN_FLIGHT": max(max_in_flight, concurrency),
+                },
+                base_thread_env,
+            )
+            result = asyncio.run(run_point(args, payloads, video_paths))
+            report["runs"].append({
+                "max_concurrent_videos": concurrency,
+                "analysis_workers": workers,
+                "thread_layout": layout.describe(),
+                **result,
+            })
+            print(
+                f"concurrency={concurrency} workers={workers}: {result['messages_per_s']:.2f} msg/s, "
+                f"p95={result['job_latency'].get('p95_s', 0):.3f}s, loop lag max={result['loop_lag']['max_s'] * 1000:.1f}ms"
+            )
+
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import asyncio
+import pytest
+
+pytest.importorskip("aiokafka")
+pytest.importorskip("orjson")
+pytest.importorskip("music21")
+pytest.importorskip("pydantic_settings")
+
+from app.application.dto.practice_data_dto import PracticeDataDTO
+from app.application.use_cases.process_and_store_error import ProcessAndStoreErrorUseCase
+from app.core.config import settings
+
+
+class FakeMusicService:
+    def __init__(self):
+        self.analyzed = []
+
+    async def process_and_store_error(self, practice):
+        self.analyzed.append(practice.practice_id)
+        return []
+
+
+class FakeMongoService:
+    def __init__(self, done: bool = False, fail: bool = False):
+        self.done = done
+        self.fail = fail
+        self.checks = 0
+        self.marked = []
+
+    async def is_audio_done(self, uid, id_practice):
+        self.checks += 1
+        if self.fail:
+            raise RuntimeError("mongo unavailable")
+        return self.done
+
+    async def mark_audio_done(self, uid, id_practice):
+        self.marked.append((uid, id_practice))
+        return True
+
+
+class FakeProducer:
+    def __init__(self):
+        self.published = []
+
+    async def publish_message(self, topic, message, wait=True):
+        self.published.append(message.practice_id)
+        return None  # Sync mode: already confirmed
+
+
+def practice(practice_id: int = 7, force_reprocess: bool = False) -> PracticeDataDTO:
+    return PracticeDataDTO(
+        uid="user-1", practice_id=practice_id, date="2024-01-01", time="10:00",
+        scale="Do Mayor", scale_type="major", num_postural_errors=0, num_musical_errors=0,
+        duration=30, bpm=60, figure=1.0, octaves=1, force_reprocess=force_reprocess,
+    )
+
+
+@pytest.fixture
+def dedup_settings(monkeypatch):
+    monkeypatch.setattr(settings, "DEDUP_CACHE_SIZE", 100)
+    monkeypatch.setattr(settings, "DEDUP_CHECK_METADATA", True)
+
+
+def build(mongo: FakeMongoService):
+    music, producer = FakeMusicService(), FakeProducer()
+    use_case = ProcessAndStoreErrorUseCase(music_service=music, mongo_service=mongo, kafka_producer=producer)
+    return use_case, music, producer
+
+
+def test_redelivery_of_a_delivered_practice_is_skipped(dedup_settings):
+    mongo = FakeMongoService()
+    use_case, music, producer = build(mongo)
+
+    async def scenario():
+        await use_case.execute(practice())
+        # Delivery callbacks run on the next loop iteration
+        await asyncio.sleep(0)
+        return await use_case.process(practice())
+
+    assert asyncio.run(scenario()) == ([], None)
+    assert music.analyzed == [7]
+    assert producer.published == [7]
+    # The cache hit does not even ask Mongo
+    assert mongo.checks == 1
+
+
+def test_practice_already_done_in_mongo_is_only_republished(dedup_settings):
+    mongo = FakeMongoService(done=True)
+    use_case, music, producer = build(mongo)
+
+    async def scenario():
+        errors, delivery = await use_case.process(practice())
+        await delivery
+        return errors
+
+    assert asyncio.run(scenario()) == []
+    assert music.analyzed == []
+    assert mongo.marked == []
+    assert producer.published == [7]
+
+
+def test_force_reprocess_bypasses_both_checks(dedup_settings):
+    mongo = FakeMongoService(done=True)
+    use_case, music, producer = build(mongo)
+
+    async def scenario():
+        await use_case.execute(practice())
+        await asyncio.sleep(0)
+        await use_case.execute(practice(force_reprocess=True))
+
+    asyncio.run(scenario())
+
+    assert music.analyzed == [7]
+    assert producer.published == [7, 7]
+    assert mongo.checks == 1
+
+
+def test_failed_mongo_pre_check_processes_the_practice(dedup_settings):
+    mongo = FakeMongoService(fail=True)
+    use_case, music, producer = build(mongo)
+
+    asyncio.run(use_case.execute(practice()))
+
+    assert music.analyzed == [7]
+    assert mongo.marked == [("user-1", 7)]
+    assert producer.published == [7]
@@ -0,0 +1,23 @@
+import os
+
+# Connection settings required by app.core.config; tests never connect, real values win
+_TEST_ENV = {
+    "KAFKA_BROKER": "localhost:9092",
+    "KAFKA_INPUT_TOPIC": "test-input",
+    "KAFKA_OUTPUT_TOPIC": "test-output",
+    "KAFKA_GROUP_ID": "test-group",
+    "MYSQL_HOST": "localhost",
+    "MYSQL_PORT": "3306",
+    "MYSQL_USER": "test",
+    "MYSQL_PASSWORD": "test",
+    "MYSQL_DB": "test",
+    "MONGO_HOST": "localhost",
+    "MONGO_PORT": "27017",
+    "MONGO_USER": "test",
+    "MONGO_PASSWORD": "test",
+    "MONGO_DB": "test",
+    "HOST_VIDEO_PATH": "/tmp",
+    "CONTAINER_VIDEO_PATH": "/tmp",
+}
+for name, value in _TEST_ENV.items():
+    os.environ.setdefault(name, value)
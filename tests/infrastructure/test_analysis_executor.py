@@ -0,0 +1,67 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.core.config import settings
+from app.core.exceptions import AnalysisWorkerCrashException
+from app.infrastructure.audio.analysis_executor import AnalysisExecutor
+
+
+def square(value: int) -> int:
+    return value * value
+
+
+def crash():
+    os._exit(1)
+
+
+def crash_once(marker: str) -> str:
+    # The first run leaves the marker and dies, the retry on the rebuilt pool succeeds
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    return "recovered"
+
+
+@pytest.fixture
+def process_executor(monkeypatch):
+    """A forked process pool without the model warmup of the real analysis workers."""
+    monkeypatch.setattr(settings, "ANALYSIS_WORKERS", 1)
+    monkeypatch.setattr(
+        AnalysisExecutor,
+        "_create_executor",
+        lambda self: ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("fork")),
+    )
+    AnalysisExecutor.shutdown()
+    yield AnalysisExecutor
+    AnalysisExecutor.shutdown()
+    AnalysisExecutor._rebuild_lock = None
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 30.0))
+
+
+def test_a_job_that_kills_its_worker_twice_fails_alone(process_executor):
+    async def scenario():
+        with pytest.raises(AnalysisWorkerCrashException):
+            await process_executor.run(crash)
+        # The process keeps serving the next jobs on a rebuilt pool
+        return await process_executor.run(square, 7)
+
+    assert run(scenario()) == 49
+
+
+def test_a_job_is_retried_once_on_a_rebuilt_pool(process_executor, tmp_path):
+    marker = str(tmp_path / "crashed")
+
+    async def scenario():
+        broken = process_executor.get_executor()
+        result = await process_executor.run(crash_once, marker)
+        return result, process_executor.get_executor() is not broken
+
+    assert run(scenario()) == ("recovered", True)
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("music21")
+pytest.importorskip("pydantic_settings")
+
+from app.infrastructure.audio.analyzer import (
+    MIN_VELOCITY,
+    MISSING_NOTE,
+    NOTE_DTYPE,
+    select_notes_per_bin,
+    shifted_edges,
+)
+
+EDGES = np.array([0.0, 1.0, 2.0, 3.0])
+
+
+def notes(*rows):
+    """(start, end, pitch, velocity) tuples -> NOTE_DTYPE array."""
+    return np.array(list(rows), dtype=NOTE_DTYPE)
+
+
+def test_loudest_note_of_each_bin_wins():
+    selected = select_notes_per_bin(
+        notes((0.1, 0.5, 60, 80), (0.2, 0.6, 62, 100), (1.1, 1.5, 64, 90)),
+        EDGES, 0, 3,
+    )
+
+    assert [n["pitch"] for n in selected] == [62, 64]
+    assert [n["name"] for n in selected] == ["D", "E"]
+
+
+def test_ties_go_to_the_earliest_note():
+    selected = select_notes_per_bin(notes((0.4, 0.9, 60, 90), (0.1, 0.9, 67, 90)), EDGES, 0, 3)
+
+    assert selected[0]["pitch"] == 67
+    assert selected[0]["start"] == pytest.approx(0.1)
+
+
+def test_quiet_notes_are_reported_missing():
+    selected = select_notes_per_bin(notes((0.1, 0.5, 60, MIN_VELOCITY)), EDGES, 0, 3)
+
+    assert selected[0]["name"] == MISSING_NOTE
+    assert selected[0]["velocity"] == MIN_VELOCITY
+
+
+def test_only_bins_in_range_are_returned():
+    all_notes = notes((0.1, 0.5, 60, 100), (1.1, 1.5, 62, 100), (2.1, 2.5, 64, 100), (3.5, 3.9, 65, 100))
+
+    selected = select_notes_per_bin(all_notes, EDGES, 1, 2)
+
+    # Notes of other bins (segment overlap) and past the last edge are ignored
+    assert [n["pitch"] for n in selected] == [62]
+
+
+def test_empty_input_and_empty_bins():
+    assert select_notes_per_bin(notes(), EDGES, 0, 3) == []
+    # Bin 1 has no note: nothing is returned for it
+    selected = select_notes_per_bin(notes((0.1, 0.5, 60, 100), (2.1, 2.5, 64, 100)), EDGES, 0, 3)
+    assert [n["pitch"] for n in selected] == [60, 64]
+
+
+def test_shifted_edges_anticipate_attacks():
+    shifted = shifted_edges(EDGES)
+
+    np.testing.assert_allclose(shifted, [0.0, 0.95, 1.95, 2.95])
+    # A slightly early attack lands in the bin it was meant for
+    selected = select_notes_per_bin(notes((0.97, 1.4, 62, 100)), shifted, 1, 2)
+    assert [n["pitch"] for n in selected] == [62]
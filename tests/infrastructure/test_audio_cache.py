@@ -0,0 +1,96 @@
+import os
+import numpy as np
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.infrastructure.audio.audio_cache import DecodedAudioCache
+
+SAMPLES = 1000
+# A cached .npy entry: the float32 samples plus the header
+ENTRY_BYTES = SAMPLES * 4 + 128
+
+
+class CountingDecoder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, path: str) -> np.ndarray:
+        self.calls.append(os.path.basename(path))
+        return np.full(SAMPLES, len(self.calls), dtype=np.float32)
+
+
+def media(tmp_path, name: str) -> str:
+    path = tmp_path / name
+    path.write_bytes(name.encode())
+    return str(path)
+
+
+def cached_entry(cache: DecodedAudioCache, path: str) -> str:
+    return os.path.join(cache.cache_dir, f"{cache.key_for(path)}.npy")
+
+
+def age(cache: DecodedAudioCache, path: str, seconds: int):
+    """Sets the last use of the cached entry of path."""
+    os.utime(cached_entry(cache, path), ns=(seconds * 10**9, seconds * 10**9))
+
+
+def test_hit_returns_the_cached_audio_memory_mapped(tmp_path):
+    cache = DecodedAudioCache(str(tmp_path / "cache"), max_bytes=10 * ENTRY_BYTES)
+    decode = CountingDecoder()
+    path = media(tmp_path, "a.mp4")
+
+    first = cache.get_or_decode(path, decode)
+    second = cache.get_or_decode(path, decode)
+
+    assert decode.calls == ["a.mp4"]
+    assert isinstance(second, np.memmap)
+    np.testing.assert_array_equal(first, second)
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = DecodedAudioCache(str(tmp_path / "cache"), max_bytes=2 * ENTRY_BYTES)
+    decode = CountingDecoder()
+    a, b, c = (media(tmp_path, name) for name in ("a.mp4", "b.mp4", "c.mp4"))
+
+    cache.get_or_decode(a, decode)
+    cache.get_or_decode(b, decode)
+    age(cache, a, 1)
+    age(cache, b, 2)
+    # The hit makes a the most recently used entry, so c pushes b out
+    cache.get_or_decode(a, decode)
+    cache.get_or_decode(c, decode)
+
+    assert os.path.exists(cached_entry(cache, a))
+    assert not os.path.exists(cached_entry(cache, b))
+    assert os.path.exists(cached_entry(cache, c))
+
+    # The evicted b is decoded again
+    cache.get_or_decode(b, decode)
+    assert decode.calls == ["a.mp4", "b.mp4", "c.mp4", "b.mp4"]
+
+
+def test_evicted_entry_stays_readable_through_its_memory_map(tmp_path):
+    cache = DecodedAudioCache(str(tmp_path / "cache"), max_bytes=ENTRY_BYTES)
+    decode = CountingDecoder()
+    a, b = media(tmp_path, "a.mp4"), media(tmp_path, "b.mp4")
+
+    audio_a = cache.get_or_decode(a, decode)
+    age(cache, a, 1)
+    cache.get_or_decode(b, decode)
+
+    assert not os.path.exists(cached_entry(cache, a))
+    np.testing.assert_array_equal(audio_a, np.full(SAMPLES, 1, dtype=np.float32))
+
+
+def test_changed_file_is_a_miss_in_stat_mode(tmp_path):
+    cache = DecodedAudioCache(str(tmp_path / "cache"), max_bytes=10 * ENTRY_BYTES)
+    decode = CountingDecoder()
+    path = media(tmp_path, "a.mp4")
+
+    cache.get_or_decode(path, decode)
+    with open(path, "ab") as f:
+        f.write(b"re-uploaded")
+    cache.get_or_decode(path, decode)
+
+    assert decode.calls == ["a.mp4", "a.mp4"]
@@ -0,0 +1,124 @@
+import asyncio
+from typing import List, Sequence, Tuple
+import pytest
+from app.domain.repositories.i_metadata_repo import IMetadataRepo
+from app.infrastructure.repositories.coalescing_metadata_repo import CoalescingMetadataRepo
+
+
+class RecordingRepo(IMetadataRepo):
+    """In-memory repository that records every batch it receives."""
+
+    def __init__(self, fail: bool = False):
+        self.batches: List[List[Tuple[str, int]]] = []
+        self.single: List[Tuple[str, int]] = []
+        self.fail = fail
+
+    async def mark_practice_audio_done(self, uid: str, id_practice: int) -> bool:
+        self.single.append((uid, id_practice))
+        return True
+
+    async def mark_practices_audio_done(self, items: Sequence[Tuple[str, int]]) -> List[bool]:
+        if self.fail:
+            raise RuntimeError("bulk_write failed")
+        self.batches.append(list(items))
+        # Odd practices "do not exist"
+        return [id_practice % 2 == 0 for _, id_practice in items]
+
+    async def is_practice_audio_done(self, uid: str, id_practice: int) -> bool:
+        return False
+
+
+def test_updates_within_the_window_are_flushed_as_one_batch():
+    async def scenario():
+        repo = RecordingRepo()
+        coalescer = CoalescingMetadataRepo(repo, window_ms=50, max_items=100)
+        results = await asyncio.gather(*(coalescer.mark_practice_audio_done("u", i) for i in range(4)))
+        return repo, results
+
+    repo, results = asyncio.run(scenario())
+
+    assert repo.batches == [[("u", 0), ("u", 1), ("u", 2), ("u", 3)]]
+    # Every caller gets the result of its own update
+    assert results == [True, False, True, False]
+
+
+def test_max_items_flushes_without_waiting_for_the_window():
+    async def scenario():
+        repo = RecordingRepo()
+        # A window this long would time the test out if max_items did not trigger the flushes
+        coalescer = CoalescingMetadataRepo(repo, window_ms=60_000, max_items=2)
+        await asyncio.wait_for(
+            asyncio.gather(*(coalescer.mark_practice_audio_done("u", i) for i in range(4))), timeout=5
+        )
+        return repo
+
+    repo = asyncio.run(scenario())
+
+    assert [len(batch) for batch in repo.batches] == [2, 2]
+
+
+def test_flush_writes_the_buffered_updates_now():
+    async def scenario():
+        repo = RecordingRepo()
+        coalescer = CoalescingMetadataRepo(repo, window_ms=60_000, max_items=100)
+        pending = [asyncio.create_task(coalescer.mark_practice_audio_done("u", i)) for i in (2, 4)]
+        await asyncio.sleep(0)
+        assert repo.batches == []
+
+        await coalescer.flush()
+        return repo, await asyncio.gather(*pending)
+
+    repo, results = asyncio.run(scenario())
+
+    assert repo.batches == [[("u", 2), ("u", 4)]]
+    assert results == [True, True]
+
+
+def test_a_failed_flush_fails_every_caller_of_the_batch():
+    async def scenario():
+        coalescer = CoalescingMetadataRepo(RecordingRepo(fail=True), window_ms=1, max_items=100)
+        return await asyncio.gather(
+            *(coalescer.mark_practice_audio_done("u", i) for i in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_close_flushes_and_later_updates_bypass_the_buffer():
+    async def scenario():
+        repo = RecordingRepo()
+        coalescer = CoalescingMetadataRepo(repo, window_ms=60_000, max_items=100)
+        pending = asyncio.create_task(coalescer.mark_practice_audio_done("u", 2))
+        await asyncio.sleep(0)
+
+        await coalescer.close()
+        assert await pending is True
+        assert await coalescer.mark_practice_audio_done("u", 8) is True
+        return repo
+
+    repo = asyncio.run(scenario())
+
+    assert repo.batches == [[("u", 2)]]
+    assert repo.single == [("u", 8)]
+
+
+def test_window_must_elapse_before_a_timer_flush():
+    async def scenario():
+        repo = RecordingRepo()
+        coalescer = CoalescingMetadataRepo(repo, window_ms=30, max_items=100)
+        task = asyncio.create_task(coalescer.mark_practice_audio_done("u", 0))
+        await asyncio.sleep(0.005)
+        assert repo.batches == []
+        await asyncio.wait_for(task, timeout=5)
+        return repo
+
+    repo = asyncio.run(scenario())
+
+    assert repo.batches == [[("u", 0)]]
+
+
+@pytest.mark.parametrize("max_items", [0, -5])
+def test_max_items_is_at_least_one(max_items):
+    assert CoalescingMetadataRepo(RecordingRepo(), max_items=max_items).max_items == 1
@@ -0,0 +1,223 @@
+import asyncio
+import pytest
+
+pytest.importorskip("aiokafka")
+pytest.importorskip("orjson")
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("motor")
+
+import orjson
+from aiokafka import TopicPartition
+from app.core.config import settings
+from app.core.exceptions import MessageDeliveryException
+from app.infrastructure.kafka.kafka_consumer import decode_practice_batch, start_kafka_consumer
+
+TP = TopicPartition("practices", 0)
+
+
+class Record:
+    def __init__(self, offset: int, value):
+        self.offset = offset
+        self.value = value
+
+
+def practice(practice_id: int, **extra) -> bytes:
+    return orjson.dumps({
+        "uid": "user-1",
+        "practice_id": practice_id,
+        "date": "2024-01-01",
+        "time": "10:00",
+        "scale": "C",
+        "scale_type": "major",
+        "duration": 30,
+        "bpm": 60,
+        "figure": 1.0,
+        "octaves": 1,
+        **extra,
+    })
+
+
+def test_batch_decode_matches_decoding_each_record():
+    records = [
+        Record(10, practice(1)),
+        Record(11, b"not json"),
+        Record(12, practice(2, force_reprocess=True, profile="yes")),
+        Record(13, None),  # tombstone
+        Record(14, b"[1, 2]"),
+        Record(15, orjson.dumps({"uid": "user-1", "practice_id": 3})),
+        Record(16, practice(4, message="ignored")),
+    ]
+
+    accepted, rejected = decode_practice_batch(records)
+
+    one_by_one = [decode_practice_batch([record]) for record in records]
+    assert accepted == [item for single, _ in one_by_one for item in single]
+    assert rejected == [offset for _, single in one_by_one for offset in single]
+    assert [offset for offset, _ in accepted] == [10, 12, 16]
+    assert rejected == [11, 13, 14, 15]
+
+
+def test_decoded_practice_fields_and_flags():
+    records = [Record(0, practice(1)), Record(1, practice(2, force_reprocess=True, profile="yes"))]
+
+    (_, plain), (_, flagged) = decode_practice_batch(records)[0]
+
+    assert (plain.uid, plain.practice_id, plain.scale, plain.bpm, plain.figure) == ("user-1", 1, "C", 60, 1.0)
+    assert (plain.force_reprocess, plain.profile) == (False, False)
+    # Only a JSON true enables a flag
+    assert (flagged.force_reprocess, flagged.profile) == (True, False)
+
+
+class FakeConsumer:
+    """Serves the given records from one partition and records pauses and commits."""
+
+    def __init__(self, records):
+        self.pending = list(records)
+        self.paused = set()
+        self.commits = []
+        self.stopped = False
+
+    def subscribe(self, topics, listener=None):
+        self.listener = listener
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        self.stopped = True
+
+    def assignment(self):
+        return {TP}
+
+    def pause(self, *partitions):
+        self.paused.update(partitions)
+
+    def resume(self, *partitions):
+        self.paused.difference_update(partitions)
+
+    async def getmany(self, timeout_ms=0, max_records=None):
+        if TP in self.paused or not self.pending:
+            await asyncio.sleep(timeout_ms / 1000)
+            return {}
+        batch, self.pending = self.pending[:max_records], self.pending[max_records:]
+        return {TP: batch}
+
+    async def commit(self, offsets):
+        self.commits.append(dict(offsets))
+
+
+class FakeUseCase:
+    """Processes instantly; the output message fails the first `failures` publishes."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.publishes = 0
+
+    async def process(self, dto):
+        return [], await self.republish(dto)
+
+    async def republish(self, dto):
+        self.publishes += 1
+        delivery = asyncio.get_running_loop().create_future()
+        if self.publishes <= self.failures:
+            delivery.set_exception(RuntimeError("broker unavailable"))
+        else:
+            delivery.set_result(None)
+        return delivery
+
+
+class BlockingUseCase(FakeUseCase):
+    """Never finishes the practice with the given id."""
+
+    def __init__(self, blocked_practice_id: int):
+        super().__init__(failures=0)
+        self.blocked_practice_id = blocked_practice_id
+
+    async def process(self, dto):
+        if dto.practice_id == self.blocked_practice_id:
+            await asyncio.Event().wait()
+        return await super().process(dto)
+
+
+@pytest.fixture
+def consumer_settings(monkeypatch):
+    monkeypatch.setattr(settings, "KAFKA_MAX_IN_FLIGHT", 2)
+    monkeypatch.setattr(settings, "KAFKA_MAX_POLL_RECORDS", 10)
+    monkeypatch.setattr(settings, "KAFKA_POLL_TIMEOUT_MS", 10)
+    monkeypatch.setattr(settings, "MAX_CONCURRENT_VIDEOS", 2)
+    monkeypatch.setattr(settings, "KAFKA_DELIVERY_RETRIES", 1)
+    monkeypatch.setattr(settings, "KAFKA_DELIVERY_RETRY_BACKOFF_S", 0)
+
+
+def consume(use_case, consumer, timeout: float = 5.0):
+    asyncio.run(asyncio.wait_for(start_kafka_consumer(None, use_case=use_case, consumer=consumer), timeout))
+
+
+def consume_until_commit(use_case, consumer, timeout: float = 5.0):
+    """Runs the consumer until its first commit, then cancels it."""
+    async def run():
+        task = asyncio.create_task(start_kafka_consumer(None, use_case=use_case, consumer=consumer))
+        while not consumer.commits:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(asyncio.wait_for(run(), timeout))
+
+
+def test_undeliverable_outputs_stop_the_consumer_without_committing(consumer_settings):
+    # More failing deliveries than in-flight slots: the consumer must not stay paused forever
+    records = [Record(offset, practice(offset)) for offset in range(5)]
+    consumer = FakeConsumer(records)
+    use_case = FakeUseCase(failures=100)
+
+    with pytest.raises(MessageDeliveryException):
+        consume(use_case, consumer)
+
+    assert consumer.stopped
+    assert consumer.commits == []
+    # Fetch paused at the in-flight limit: both fetched messages were published and retried once
+    assert use_case.publishes == 4
+    assert len(consumer.pending) == 3
+
+
+def test_delivery_recovered_by_a_retry_commits_the_offset(consumer_settings):
+    consumer = FakeConsumer([Record(0, practice(1))])
+    use_case = FakeUseCase(failures=1)
+
+    consume_until_commit(use_case, consumer)
+
+    assert consumer.commits == [{TP: 1}]
+    assert use_case.publishes == 2
+
+
+def test_rejected_messages_are_committed(consumer_settings):
+    consumer = FakeConsumer([Record(0, b"not json"), Record(1, None)])
+    use_case = FakeUseCase(failures=0)
+
+    consume_until_commit(use_case, consumer)
+
+    assert consumer.commits == [{TP: 2}]
+    assert use_case.publishes == 0
+
+
+def test_cancelled_practice_leaves_its_offset_uncommitted(consumer_settings):
+    consumer = FakeConsumer([Record(0, practice(1)), Record(1, practice(2))])
+    use_case = BlockingUseCase(blocked_practice_id=2)
+
+    async def run():
+        task = asyncio.create_task(start_kafka_consumer(None, use_case=use_case, consumer=consumer))
+        while not consumer.commits:
+            await asyncio.sleep(0.01)
+        # The first cancel waits for the running practice, the second one cancels it
+        task.cancel()
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(asyncio.wait_for(run(), 5.0))
+
+    assert consumer.commits == [{TP: 1}]
@@ -0,0 +1,78 @@
+import os
+import pytest
+from app.infrastructure.audio import model_quantization
+from app.infrastructure.audio.model_quantization import build_quantized_model
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """Replaces the ONNX quantizer with a copy and records every build."""
+    calls = []
+
+    def fake_quantize(source_path, output_path):
+        calls.append(source_path)
+        with open(source_path, "rb") as src, open(output_path, "wb") as dst:
+            dst.write(src.read())
+
+    monkeypatch.setattr(model_quantization, "_quantize_onnx", fake_quantize)
+    return calls
+
+
+def write(path, content: bytes, mtime_ns: int):
+    path.write_bytes(content)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+    return str(path)
+
+
+def test_quantized_model_is_built_once_per_source(tmp_path, builds):
+    source = write(tmp_path / "model.onnx", b"v1", 1_000_000_000)
+    cache = str(tmp_path / "cache")
+
+    first = build_quantized_model("onnx", source, "dynamic_int8", cache)
+    again = build_quantized_model("onnx", source, "dynamic_int8", cache)
+
+    assert first == again
+    assert builds == [source]
+    assert os.listdir(cache) == [os.path.basename(first)]
+
+
+def test_changed_source_is_quantized_again(tmp_path, builds):
+    source = write(tmp_path / "model.onnx", b"v1", 1_000_000_000)
+    cache = str(tmp_path / "cache")
+    first = build_quantized_model("onnx", source, "dynamic_int8", cache)
+
+    # An upgraded model at the same path
+    write(tmp_path / "model.onnx", b"v2 weights", 2_000_000_000)
+    second = build_quantized_model("onnx", source, "dynamic_int8", cache)
+
+    assert second != first
+    assert len(builds) == 2
+    with open(second, "rb") as f:
+        assert f.read() == b"v2 weights"
+
+
+def test_sources_at_different_paths_do_not_share_the_cache(tmp_path, builds):
+    cache = str(tmp_path / "cache")
+    a = write(tmp_path / "a.onnx", b"same", 1_000_000_000)
+    b = write(tmp_path / "b.onnx", b"same", 1_000_000_000)
+
+    assert build_quantized_model("onnx", a, "dynamic_int8", cache) != build_quantized_model("onnx", b, "dynamic_int8", cache)
+
+
+def test_saved_model_directory_fingerprint_follows_its_files(tmp_path):
+    saved_model = tmp_path / "saved_model"
+    (saved_model / "variables").mkdir(parents=True)
+    write(saved_model / "saved_model.pb", b"graph", 1_000_000_000)
+    write(saved_model / "variables" / "variables.data", b"w1", 1_000_000_000)
+    before = model_quantization.source_fingerprint(str(saved_model))
+
+    write(saved_model / "variables" / "variables.data", b"w2", 2_000_000_000)
+
+    assert model_quantization.source_fingerprint(str(saved_model)) != before
+
+
+def test_unknown_mode_and_backend_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        build_quantized_model("onnx", str(tmp_path), "none", str(tmp_path))
+    with pytest.raises(ValueError):
+        build_quantized_model("tf", str(tmp_path), "dynamic_int8", str(tmp_path))
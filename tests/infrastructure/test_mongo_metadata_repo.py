@@ -0,0 +1,65 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("pymongo")
+pytest.importorskip("motor")
+
+from app.infrastructure.repositories.mongo_metadata_repo import MongoMetadataRepo
+
+
+class FakeUsersCollection:
+    """users collection whose bulk_write modifies `modified_count` documents."""
+
+    def __init__(self, users, modified_count: int):
+        self.users = users
+        self.modified_count = modified_count
+        self.reads = 0
+
+    async def bulk_write(self, operations, ordered=True):
+        return SimpleNamespace(modified_count=self.modified_count)
+
+    def find(self, filter, projection=None):
+        self.reads += 1
+        uids = set(filter["uid"]["$in"])
+        return self._iterate([user for user in self.users if user["uid"] in uids])
+
+    async def _iterate(self, users):
+        for user in users:
+            yield user
+
+
+def repo_with(collection) -> MongoMetadataRepo:
+    # Skips __init__, which connects to Mongo
+    repo = MongoMetadataRepo.__new__(MongoMetadataRepo)
+    repo.users_collection = collection
+    return repo
+
+
+def test_all_modified_needs_no_read():
+    collection = FakeUsersCollection([], modified_count=2)
+
+    results = asyncio.run(repo_with(collection).mark_practices_audio_done([("a", 1), ("b", 2)]))
+
+    assert results == [True, True]
+    assert collection.reads == 0
+
+
+def test_already_marked_practices_are_reported_done():
+    users = [
+        # Practice 1 was marked by an earlier delivery, so the bulk_write did not modify it
+        {"uid": "a", "practices": [{"id_practice": 1, "audio_done": True}, {"id_practice": 2, "audio_done": True}]},
+        {"uid": "b", "practices": [{"id_practice": 3, "audio_done": False}]},
+    ]
+    collection = FakeUsersCollection(users, modified_count=1)
+
+    items = [("a", 1), ("a", 2), ("b", 9)]
+    results = asyncio.run(repo_with(collection).mark_practices_audio_done(items))
+
+    # ("b", 9) does not exist
+    assert results == [True, True, False]
+    assert collection.reads == 1
+
+
+def test_empty_batch():
+    assert asyncio.run(repo_with(FakeUsersCollection([], 0)).mark_practices_audio_done([])) == []
@@ -0,0 +1,89 @@
+import pytest
+
+pytest.importorskip("aiokafka")
+
+from aiokafka import TopicPartition
+from app.infrastructure.kafka.offset_tracker import OffsetTracker
+
+TP0 = TopicPartition("practices", 0)
+TP1 = TopicPartition("practices", 1)
+
+
+def track_all(tracker: OffsetTracker, tp: TopicPartition, offsets):
+    for offset in offsets:
+        tracker.track(tp, offset)
+
+
+def test_nothing_committable_until_the_first_offset_completes():
+    tracker = OffsetTracker()
+    track_all(tracker, TP0, [10, 11, 12])
+
+    tracker.complete(TP0, 11)
+    tracker.complete(TP0, 12)
+
+    assert tracker.committable() == {}
+    assert tracker.in_flight == 3
+
+
+def test_out_of_order_completion_commits_up_to_the_contiguous_offset():
+    tracker = OffsetTracker()
+    track_all(tracker, TP0, [10, 11, 12, 13])
+
+    tracker.complete(TP0, 12)
+    tracker.complete(TP0, 10)
+    assert tracker.committable() == {TP0: 11}
+    assert tracker.in_flight == 3
+
+    tracker.complete(TP0, 11)
+    assert tracker.committable() == {TP0: 13}
+    assert tracker.in_flight == 1
+
+
+def test_committed_positions_are_not_returned_again():
+    tracker = OffsetTracker()
+    track_all(tracker, TP0, [0, 1])
+    tracker.complete(TP0, 0)
+
+    tracker.mark_committed(tracker.committable())
+    assert tracker.committable() == {}
+
+    tracker.complete(TP0, 1)
+    assert tracker.committable() == {TP0: 2}
+
+
+def test_partitions_are_independent_and_can_be_filtered():
+    tracker = OffsetTracker()
+    track_all(tracker, TP0, [5, 6])
+    track_all(tracker, TP1, [100])
+
+    tracker.complete(TP0, 5)
+    tracker.complete(TP1, 100)
+
+    assert tracker.committable() == {TP0: 6, TP1: 101}
+    assert tracker.committable([TP1]) == {TP1: 101}
+    assert tracker.in_flight == 1
+
+
+def test_forget_drops_revoked_partitions():
+    tracker = OffsetTracker()
+    track_all(tracker, TP0, [1, 2])
+    track_all(tracker, TP1, [7])
+
+    tracker.forget([TP0])
+
+    assert tracker.in_flight == 1
+    # A message of the revoked partition finishing later is ignored
+    tracker.complete(TP0, 1)
+    assert tracker.committable() == {}
+
+
+def test_pending_offset_holds_back_the_commit_of_its_partition():
+    tracker = OffsetTracker()
+    track_all(tracker, TP0, [0, 1, 2])
+
+    tracker.complete(TP0, 1)
+    tracker.complete(TP0, 2)
+
+    # Offset 0 is still being processed
+    assert tracker.committable() == {}
+    assert tracker.in_flight == 3
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("basic_pitch")
+pytest.importorskip("music21")
+pytest.importorskip("pydantic_settings")
+
+from basic_pitch.constants import AUDIO_N_SAMPLES
+from app.core.config import settings
+from app.infrastructure.audio.analyzer import analyze_audio, analyze_audio_stream
+from app.infrastructure.audio.model_manager import ModelManager
+from app.shared.constants import AUDIO_SAMPLE_RATE
+
+# Frames the ICASSP 2022 model outputs per window
+WINDOW_FRAMES = 172
+SAMPLES_PER_FRAME = AUDIO_N_SAMPLES // WINDOW_FRAMES
+
+
+class FakeModel:
+    """
+    Deterministic stand-in for the basic_pitch model: every frame activates the pitch given by
+    its peak amplitude, with its mean amplitude as note and onset activation.
+    """
+
+    def predict(self, windows: np.ndarray) -> dict:
+        frames = np.abs(windows[:, :WINDOW_FRAMES * SAMPLES_PER_FRAME, 0]).reshape(
+            windows.shape[0], WINDOW_FRAMES, SAMPLES_PER_FRAME
+        )
+        energy = frames.mean(axis=2)
+        pitch = (frames.max(axis=2) * 100).astype(int) % 88
+        onset = np.zeros((windows.shape[0], WINDOW_FRAMES, 88), dtype=np.float32)
+        np.put_along_axis(onset, pitch[:, :, np.newaxis], energy[:, :, np.newaxis], axis=2)
+        return {"note": onset, "onset": onset, "contour": np.repeat(onset, 3, axis=2)}
+
+
+def chunked(audio: np.ndarray, size: int):
+    return (audio[i:i + size] for i in range(0, audio.shape[0], size))
+
+
+def practice_audio(notes: int, seconds_per_note: float) -> np.ndarray:
+    """A burst of a different amplitude (so a different fake pitch) shortly after each bin start."""
+    note_samples = int(seconds_per_note * AUDIO_SAMPLE_RATE)
+    audio = np.zeros(notes * note_samples + AUDIO_SAMPLE_RATE, dtype=np.float32)
+    for i in range(notes):
+        start = i * note_samples + 2000
+        audio[start:start + 6000] = 0.6 + 0.01 * i
+    return audio
+
+
+@pytest.fixture
+def analysis_settings(monkeypatch):
+    monkeypatch.setattr(settings, "INFERENCE_BATCHING", False)
+    monkeypatch.setattr(settings, "INFERENCE_MAX_BATCH_SIZE", 4)
+    # One segment: the batch path then sees the whole practice at once, like the stream
+    monkeypatch.setattr(settings, "ANALYSIS_SEGMENTS", 1)
+    monkeypatch.setattr(settings, "ANALYSIS_SEGMENT_OVERLAP", 0.5)
+    return monkeypatch
+
+
+@pytest.mark.parametrize("length", [1000, AUDIO_N_SAMPLES, 3 * AUDIO_N_SAMPLES + 7000, 37 * AUDIO_SAMPLE_RATE + 123])
+@pytest.mark.parametrize("block_size", [1000, ModelManager.window_hop_samples(), 50000])
+@pytest.mark.parametrize("windows_per_call", [1, 3])
+def test_streamed_posteriorgram_equals_the_batch_one(analysis_settings, length, block_size, windows_per_call):
+    model = FakeModel()
+    audio = np.random.default_rng(length).uniform(-1, 1, length).astype(np.float32)
+
+    expected = ModelManager.infer_posteriorgram(audio, model=model)
+    blocks = list(ModelManager.iter_posteriorgram(chunked(audio, block_size), model=model, windows_per_call=windows_per_call))
+
+    for key, value in expected.items():
+        streamed = np.concatenate([block[key] for block in blocks])
+        assert streamed.shape == value.shape
+        np.testing.assert_allclose(streamed, value)
+
+
+@pytest.mark.parametrize("mode", ["notes", "posteriorgram"])
+@pytest.mark.parametrize("block_size", [4096, ModelManager.window_hop_samples()])
+def test_streamed_notes_per_bin_equal_the_batch_ones(analysis_settings, mode, block_size):
+    analysis_settings.setattr(settings, "ANALYSIS_MODE", mode)
+    model = FakeModel()
+    tempo, rhythmic_value, notes = 60, 1.0, 24
+    audio = practice_audio(notes, 60 / tempo * rhythmic_value)
+
+    expected = analyze_audio(audio, tempo, rhythmic_value, notes, model=model)
+    streamed = analyze_audio_stream(chunked(audio, block_size), tempo, rhythmic_value, notes, model=model)
+
+    assert len(expected) == notes
+    assert [(n["name"], n["pitch"]) for n in streamed] == [(n["name"], n["pitch"]) for n in expected]
+    np.testing.assert_allclose([n["start"] for n in streamed], [n["start"] for n in expected])
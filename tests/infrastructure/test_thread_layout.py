@@ -0,0 +1,72 @@
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.core.config import settings
+from app.infrastructure.audio import thread_layout
+from app.infrastructure.audio.thread_layout import compute_thread_layout
+
+
+@pytest.fixture
+def layout_settings(monkeypatch):
+    """16 cores, 2 supervisor workers, 4 concurrent jobs per worker, no explicit thread counts."""
+    monkeypatch.setattr(thread_layout, "available_cores", lambda: 16)
+    values = {
+        "WORKERS": 2,
+        "MAX_CONCURRENT_VIDEOS": 4,
+        "ANALYSIS_WORKERS": 4,
+        "ANALYSIS_EXECUTOR": "thread",
+        "ANALYSIS_SEGMENTS": 0,
+        "ANALYSIS_SEGMENT_WORKERS": 0,
+        "MODEL_INTRA_OP_THREADS": 0,
+        "MODEL_INTER_OP_THREADS": 0,
+        "INFERENCE_BATCHING": False,
+    }
+    for name, value in values.items():
+        monkeypatch.setattr(settings, name, value)
+    return monkeypatch
+
+
+def test_unbatched_layout_splits_the_worker_cores_between_jobs_and_segments(layout_settings):
+    layout = compute_thread_layout()
+
+    assert layout.cores == 8
+    assert layout.concurrent_jobs == 4
+    assert layout.segment_workers == 2
+    assert layout.intra_op_threads == 1
+    assert layout.runnable_threads == 8
+    assert layout.segment_pool_size == 8
+
+
+def test_batched_layout_gives_the_batcher_thread_the_worker_cores(layout_settings):
+    layout_settings.setattr(settings, "INFERENCE_BATCHING", True)
+
+    layout = compute_thread_layout()
+
+    assert layout.segment_workers == 2
+    assert layout.model_callers == 1
+    assert layout.intra_op_threads == 8
+    assert layout.runnable_threads == 8
+
+
+def test_batched_layout_with_process_executor_splits_cores_between_processes(layout_settings):
+    layout_settings.setattr(settings, "INFERENCE_BATCHING", True)
+    layout_settings.setattr(settings, "ANALYSIS_EXECUTOR", "process")
+
+    layout = compute_thread_layout()
+
+    # One batcher per analysis process
+    assert layout.model_callers == 4
+    assert layout.intra_op_threads == 2
+    assert layout.segment_pool_size == 2
+
+
+def test_explicit_thread_counts_take_precedence(layout_settings):
+    layout_settings.setattr(settings, "INFERENCE_BATCHING", True)
+    layout_settings.setattr(settings, "ANALYSIS_SEGMENT_WORKERS", 3)
+    layout_settings.setattr(settings, "MODEL_INTRA_OP_THREADS", 5)
+    layout_settings.setattr(settings, "MODEL_INTER_OP_THREADS", 2)
+
+    layout = compute_thread_layout()
+
+    assert (layout.segment_workers, layout.intra_op_threads, layout.inter_op_threads) == (3, 5, 2)
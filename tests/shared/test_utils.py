@@ -0,0 +1,45 @@
+from app.shared.utils import BoundedLRU
+
+
+def test_evicts_the_least_recently_used_key():
+    lru = BoundedLRU(2)
+    lru.add("a")
+    lru.add("b")
+    lru.add("c")
+
+    assert "a" not in lru
+    assert "b" in lru and "c" in lru
+    assert len(lru) == 2
+
+
+def test_lookup_refreshes_the_key():
+    lru = BoundedLRU(2)
+    lru.add("a")
+    lru.add("b")
+
+    assert "a" in lru  # "b" is now the least recently used
+    lru.add("c")
+
+    assert "a" in lru
+    assert "b" not in lru
+
+
+def test_adding_an_existing_key_does_not_grow():
+    lru = BoundedLRU(2)
+    lru.add(("uid", 1))
+    lru.add(("uid", 1))
+
+    assert len(lru) == 1
+
+
+def test_discard_and_disabled_cache():
+    lru = BoundedLRU(3)
+    lru.add("a")
+    lru.discard("a")
+    lru.discard("missing")
+    assert "a" not in lru
+
+    disabled = BoundedLRU(0)
+    disabled.add("a")
+    assert "a" not in disabled
+    assert len(disabled) == 0